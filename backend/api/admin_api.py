@@ -1,55 +1,106 @@
-from fastapi import APIRouter, Depends, Query
-from models.schemas import User, UserCreate
+from fastapi import APIRouter, Depends, Query, UploadFile, File
+from fastapi.responses import StreamingResponse
+from models.schemas import User, UserCreate, FarmerPage
 from service.admin_service import admin_service
 from utils.security_manager import security_manager
+from utils.db_manager import db_manager
+from utils.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
 from typing import List, Optional
 
 router = APIRouter(prefix="/admin", tags=["Admin"])
 
-@router.get("/farmers", response_model=List[User])
+@router.get("/farmers", response_model=FarmerPage)
 async def list_farmers(
+    q: Optional[str] = Query(None, description="Fuzzy match on name, email, city, state or a mobile prefix"),
     full_name: Optional[str] = Query(None),
     mobile: Optional[str] = Query(None),
     email: Optional[str] = Query(None),
     city: Optional[str] = Query(None),
     state: Optional[str] = Query(None),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None),
+    db=Depends(db_manager.get_session),
     # current_user: dict = Depends(security_manager.get_current_user)
 ):
     # In a real app, we would verify if current_user has "Admin" role
     filters = {
+        "q": q,
         "full_name": full_name,
         "mobile": mobile,
         "email": email,
         "city": city,
         "state": state
     }
-    return admin_service.list_farmers(filters)
+    return await admin_service.list_farmers(db, filters, limit, cursor)
+
+@router.get("/farmers/export")
+async def export_farmers(
+    format: str = Query("csv", pattern="^(csv|ndjson)$"),
+    with_land: bool = Query(False, description="Add land parcel count and total area"),
+    with_crops: bool = Query(False, description="Add crop count"),
+    compress: bool = Query(False, alias="gzip"),
+    full_name: Optional[str] = Query(None),
+    mobile: Optional[str] = Query(None),
+    email: Optional[str] = Query(None),
+    city: Optional[str] = Query(None),
+    state: Optional[str] = Query(None),
+):
+    filters = {
+        "full_name": full_name,
+        "mobile": mobile,
+        "email": email,
+        "city": city,
+        "state": state
+    }
+    chunks, media_type, filename = admin_service.export_farmers(filters, format, with_land, with_crops, compress)
+    return StreamingResponse(
+        chunks,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+@router.post("/farmers/import")
+async def import_farmers(
+    file: UploadFile = File(..., description="CSV with a header row, or NDJSON (.ndjson/.jsonl)"),
+    format: Optional[str] = Query(None, pattern="^(csv|ndjson)$"),
+    db=Depends(db_manager.get_session)
+):
+    return await admin_service.import_farmers(db, file, format)
 
 @router.post("/farmers", response_model=User)
-async def create_farmer(farmer_data: UserCreate):
-    return admin_service.create_farmer(farmer_data.dict())
+async def create_farmer(farmer_data: UserCreate, db=Depends(db_manager.get_session)):
+    return await admin_service.create_farmer(db, farmer_data.dict())
 
 @router.get("/farmers/{farmer_id}", response_model=User)
-async def get_farmer_details(farmer_id: int):
-    return admin_service.get_farmer_details(farmer_id)
+async def get_farmer_details(farmer_id: int, db=Depends(db_manager.get_session)):
+    return await admin_service.get_farmer_details(db, farmer_id)
 
 @router.put("/farmers/{farmer_id}", response_model=User)
-async def update_farmer(farmer_id: int, farmer_data: dict):
-    return admin_service.update_farmer(farmer_id, farmer_data)
+async def update_farmer(farmer_id: int, farmer_data: dict, db=Depends(db_manager.get_session)):
+    return await admin_service.update_farmer(db, farmer_id, farmer_data)
 
 @router.delete("/farmers/{farmer_id}")
-async def delete_farmer(farmer_id: int):
-    return admin_service.delete_farmer(farmer_id)
+async def delete_farmer(farmer_id: int, db=Depends(db_manager.get_session)):
+    return await admin_service.delete_farmer(db, farmer_id)
 
 @router.patch("/farmers/{farmer_id}/status")
-async def toggle_farmer_status(farmer_id: int, is_active: bool):
-    return admin_service.toggle_farmer_status(farmer_id, is_active)
+async def toggle_farmer_status(farmer_id: int, is_active: bool, db=Depends(db_manager.get_session)):
+    return await admin_service.toggle_farmer_status(db, farmer_id, is_active)
 
 @router.post("/broadcast")
 async def broadcast_alert(
     state: str = Query(...),
     city: str = Query(...),
     type: str = Query(...), # Weather or Disease
-    language: str = Query("English") # English, Hindi, Marathi
+    language: str = Query("English"), # English, Hindi, Marathi
+    db=Depends(db_manager.get_session)
 ):
-    return await admin_service.broadcast_alert(state, city, type, language)
+    return await admin_service.broadcast_alert(db, state, city, type, language)
+
+@router.get("/jobs/{job_id}")
+async def get_job(job_id: int, db=Depends(db_manager.get_session)):
+    return await admin_service.get_job(db, job_id)
+
+@router.get("/metrics")
+async def get_metrics():
+    return admin_service.get_metrics()
@@ -1,19 +1,20 @@
 from fastapi import APIRouter, Depends, HTTPException
 from models.schemas import UserCreate, UserLogin, Token
 from service.auth_service import auth_service
+from utils.db_manager import db_manager
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
 @router.post("/signup")
-def signup(user: UserCreate):
-    return auth_service.signup(user)
+async def signup(user: UserCreate, db=Depends(db_manager.get_session)):
+    return await auth_service.signup(db, user)
 
 @router.post("/login", response_model=Token)
-def login(user: UserLogin):
-    return auth_service.login(user.username, user.password)
+async def login(user: UserLogin, db=Depends(db_manager.get_session)):
+    return await auth_service.login(db, user.username, user.password)
 
 @router.post("/reset-password")
-def reset_password(data: dict):
+async def reset_password(data: dict, db=Depends(db_manager.get_session)):
     if "username" not in data or "new_password" not in data:
         raise HTTPException(status_code=400, detail="Missing username or new_password")
-    return auth_service.reset_password(data["username"], data["new_password"])
+    return await auth_service.reset_password(db, data["username"], data["new_password"])
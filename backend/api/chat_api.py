@@ -1,85 +1,300 @@
-from fastapi import APIRouter, Depends, UploadFile, File, Form, HTTPException
+from fastapi import APIRouter, Depends, UploadFile, File, Form, HTTPException, Response
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
 from typing import List, Optional
+from config import settings
 from service.gemini_service import gemini_service
-from service.weather_service import weather_service
-from repository.user_repository import user_repository
-from repository.history_repository import history_repository
-from repository.crop_repository import crop_repository
-from repository.discussion_repository import discussion_repository
+from service.image_service import image_service
+from service.chat_context_service import chat_context_service, server_timing
+from service.image_index_service import image_index_service, DEFAULT_QUESTION
+from service.question_index_service import question_index_service
+from service.user_cache import user_cache
+from service.discussion_writer import discussion_writer
 from utils.security_manager import security_manager
+from utils.db_manager import db_manager
+from utils.uploads import read_uploads, close_uploads
+from contextlib import aclosing
+import asyncio
 import json
 
 router = APIRouter(prefix="/chat", tags=["chat"])
 
+async def _read_images(images: Optional[List[UploadFile]], max_request_bytes: Optional[int] = None) -> List[dict]:
+    # Streamed in chunks with size limits (413), hashed on the way and spooled to disk when large
+    uploads = await read_uploads(images, max_request_bytes=max_request_bytes)
+    try:
+        # Decoded, orientation-fixed and downscaled off the event loop, tagged with their real mime type
+        return await image_service.prepare(uploads)
+    finally:
+        close_uploads(uploads)
+
+async def _context_and_images(user, crop_type: Optional[str], images: Optional[List[UploadFile]], timings: dict,
+                              max_request_bytes: Optional[int] = None):
+    """
+    (context task, prepared images). The context starts building before the uploads are read and
+    runs alongside them; the caller awaits the task when it needs the context.
+    """
+    context = asyncio.create_task(chat_context_service.build(user, crop_type, timings))
+    try:
+        image_parts = await chat_context_service.timed("images", _read_images(images, max_request_bytes), timings)
+    except BaseException:
+        context.cancel()
+        raise
+    return context, image_parts
+
+def _discussion_row(farmer_id: int, crop_type: str, message: Optional[str], result, image_parts: List[dict]) -> dict:
+    hashes = [part.get("phash") for part in image_parts]
+    # The model does not always answer with an object, or with a diagnosis in it
+    diagnosis = result.get("diagnosis") if isinstance(result, dict) else None
+    return {
+        "farmer_id": farmer_id,
+        "heading": f"{crop_type} - {str(diagnosis or 'Analysis')[:50]}",
+        "question": message or DEFAULT_QUESTION,
+        "answer": result,
+        "crop_type": crop_type,
+        "image_hashes": ",".join(hashes) if hashes and None not in hashes else None
+    }
+
+async def _save_discussion(farmer_id: int, crop_type: str, message: Optional[str], result, image_parts: List[dict]):
+    # Queued for the write-behind flush; the reuse indexes pick the discussion up once it is committed
+    def index(discussion_id: int):
+        image_index_service.add(farmer_id, crop_type, [part.get("phash") for part in image_parts], discussion_id, message)
+        if not image_parts and not (isinstance(result, dict) and "similar_question_of" in result):
+            question_index_service.add(discussion_id, crop_type, message)
+
+    await discussion_writer.submit(_discussion_row(farmer_id, crop_type, message, result, image_parts), index)
+
+async def _reuse_answer(db, farmer_id: int, crop_type: str, message: Optional[str], image_parts: List[dict]):
+    """
+    (stored result to send instead of calling the model, or None; past discussions for the prompt).
+    Photos are matched on their hashes, text-only questions against past questions about the same crop.
+    """
+    if image_parts:
+        reused = await image_index_service.find_match(db, farmer_id, crop_type, [part["phash"] for part in image_parts], message)
+        return reused, []
+    return await question_index_service.search(db, crop_type, message)
+
+def _mark_related(result: dict, related: List[dict]) -> dict:
+    # Tells the client the model was shown other farmers' answers
+    if not related or "error" in result:
+        return result
+    return {**result, "related_discussions": [item["id"] for item in related]}
+
+async def _single_result(result: dict):
+    yield "result", result
+
+async def _close_stream(stream):
+    # BackgroundTask runs anything it does not see as a coroutine function in a thread,
+    # which a bare `aclose` method would be
+    await stream.aclose()
+
+def _rounded(timings: dict) -> dict:
+    return {stage: round(elapsed, 1) for stage, elapsed in timings.items()}
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
 @router.post("/analyze")
 async def analyze_crop(
+    response: Response,
     images: List[UploadFile] = File(None),
     crop_type: Optional[str] = Form(None),
     message: Optional[str] = Form(None),
     language: str = Form("en"),
-    current_user: dict = Depends(security_manager.get_current_user)
+    current_user: dict = Depends(security_manager.get_current_user),
+    db=Depends(db_manager.get_session)
 ):
     # 1. Fetch User details
-    username = current_user.get("sub")
-    user = user_repository.get_user_by_username(username)
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
+    user = await user_cache.get_user(db, current_user)
     
-    # 2. Get Location & Weather
-    location = user.city or user.state or "Unknown Location"
-    weather_data = await weather_service.get_weather(user.city or user.state)
-    
-    # 3. Get History & Crops
-    history_records = history_repository.get_history_by_farmer(user.id)
-    history_context = [
-        {
-            "crop": h.crop,
-            "year": h.year,
-            "disease": h.disease_record,
-            "treatment": h.treatment_record
-        } for h in history_records[-5:]
-    ]
-
-    # If crop_type is missing, get from current crops
-    if not crop_type or crop_type.strip() == "" or crop_type.lower() == "detect":
-        user_crops = crop_repository.get_crops_by_farmer(user.id)
-        if user_crops:
-            crop_type = ", ".join([c.crop_name for c in user_crops])
-        else:
-            crop_type = "General (Not specified)"
-    
-    # 4. Read Images
-    image_contents = []
-    if images:
-        for img in images:
-            if img.filename:
-                content = await img.read()
-                image_contents.append(content)
+    # 2-4. Location, weather, history & crops, built while the images are read
+    timings = {}
+    context_task, image_parts = await _context_and_images(user, crop_type, images, timings)
+    context = await context_task
+    response.headers["Server-Timing"] = server_timing(timings)
         
-    # 5. Call Gemini
-    result = await gemini_service.analyze_crop_disease(
-        images=image_contents,
-        crop_type=crop_type,
-        location=location,
-        weather_data=weather_data,
-        history=history_context,
-        language=language,
-        message=message
-    )
+    # 5. Reuse the diagnosis of a near-identical recent photo or question, otherwise call Gemini
+    result, related = await _reuse_answer(db, user.id, context["crop_type"], message, image_parts)
+    if result is None:
+        result = await gemini_service.analyze_crop_disease(
+            images=image_parts,
+            language=language,
+            message=message,
+            related=related,
+            **context
+        )
+        result = _mark_related(result, related)
     
     if "error" in result:
         raise HTTPException(status_code=500, detail=result["error"])
     
     # 6. Save to Discussion Table
-    try:
-        heading = f"{crop_type} - {result.get('diagnosis', 'Analysis')[:50]}"
-        discussion_repository.create_discussion({
-            "farmer_id": user.id,
-            "heading": heading,
-            "question": message or "Image-based Analysis",
-            "answer": json.dumps(result)
-        })
-    except Exception as e:
-        print(f"Error saving discussion: {e}")
+    await _save_discussion(user.id, context["crop_type"], message, result, image_parts)
         
     return result
+
+@router.post("/analyze/stream")
+async def analyze_crop_stream(
+    images: List[UploadFile] = File(None),
+    crop_type: Optional[str] = Form(None),
+    message: Optional[str] = Form(None),
+    language: str = Form("en"),
+    current_user: dict = Depends(security_manager.get_current_user)
+):
+    """
+    Same analysis as /chat/analyze delivered as Server-Sent Events: "status" progress events,
+    "chunk" events with partial model text, and the parsed diagnosis as the final "result"
+    (or "error") event. The discussion is queued for saving before the result event is sent.
+    """
+    async with db_manager.session() as db:
+        user = await user_cache.get_user(db, current_user)
+
+    # Uploads are read before streaming starts, the request body is gone once the response begins
+    timings = {}
+    context_task, image_parts = await _context_and_images(user, crop_type, images, timings)
+
+    async def events():
+        yield _sse("status", {"stage": "started"})
+
+        # The session is only held for the reuse lookups, not during generation
+        context = await context_task
+        async with db_manager.session() as db:
+            reused, related = await _reuse_answer(db, user.id, context["crop_type"], message, image_parts)
+        yield _sse("status", {"stage": "context_gathered", "timings_ms": _rounded(timings)})
+
+        if reused is not None:
+            analysis = _single_result(reused)
+        else:
+            analysis = gemini_service.analyze_crop_disease_stream(
+                images=image_parts,
+                language=language,
+                message=message,
+                related=related,
+                **context
+            )
+
+        # Closing the analysis releases the Gemini permit when the client goes away mid-stream
+        async with aclosing(analysis) as stream:
+            async for event, data in stream:
+                if event == "result":
+                    data = _mark_related(data, related)
+                    await _save_discussion(user.id, context["crop_type"], message, data, image_parts)
+                yield _sse(event, data)
+
+    # A disconnect while a chunk is being sent leaves events() parked at its yield,
+    # the background task closes it (and the analysis with it) once the response ends
+    body = events()
+    return StreamingResponse(
+        body,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=BackgroundTask(_close_stream, body)
+    )
+
+def _plot_groups(image_parts: List[dict], plots: Optional[str]) -> dict:
+    # Images by plot label, in upload order
+    if not image_parts:
+        raise HTTPException(status_code=400, detail="No images uploaded")
+    if plots:
+        try:
+            labels = json.loads(plots)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="plots must be a JSON list")
+        if not isinstance(labels, list) or len(labels) != len(image_parts):
+            raise HTTPException(status_code=400, detail="plots must have one label per image")
+    else:
+        labels = list(range(len(image_parts)))
+
+    groups = {}
+    for label, part in zip(labels, image_parts):
+        groups.setdefault(str(label), []).append(part)
+    if len(groups) > settings.CHAT_BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"At most {settings.CHAT_BATCH_MAX_ITEMS} items per batch")
+    return groups
+
+@router.post("/analyze/batch")
+async def analyze_crop_batch(
+    images: List[UploadFile] = File(...),
+    plots: Optional[str] = Form(None),
+    crop_type: Optional[str] = Form(None),
+    message: Optional[str] = Form(None),
+    language: str = Form("en"),
+    current_user: dict = Depends(security_manager.get_current_user)
+):
+    """
+    Analyses many photos in one request, e.g. a field visit. `plots` is an optional JSON list with one
+    label per image; images sharing a label are analysed together as one item, otherwise every image
+    is its own item. Farmer context is built once, items run CHAT_BATCH_CONCURRENCY at a time, and each
+    result is sent as an "item" Server-Sent Event as soon as it completes. All discussions are queued
+    for the write-behind flush before the closing "done" event.
+    """
+    async with db_manager.session() as db:
+        user = await user_cache.get_user(db, current_user)
+
+    timings = {}
+    context_task, image_parts = await _context_and_images(
+        user, crop_type, images, timings, max_request_bytes=settings.UPLOAD_MAX_BATCH_BYTES
+    )
+    try:
+        groups = _plot_groups(image_parts, plots)
+    except HTTPException:
+        context_task.cancel()
+        raise
+
+    async def events():
+        yield _sse("status", {"stage": "started", "items": len(groups)})
+
+        context = await context_task
+        async with db_manager.session() as db:
+            reused = {
+                plot: await image_index_service.find_match(
+                    db, user.id, context["crop_type"], [part["phash"] for part in parts], message
+                )
+                for plot, parts in groups.items()
+            }
+        yield _sse("status", {"stage": "context_gathered", "timings_ms": _rounded(timings)})
+
+        limiter = asyncio.Semaphore(settings.CHAT_BATCH_CONCURRENCY)
+
+        async def analyze(plot: str, parts: List[dict]):
+            if reused[plot] is not None:
+                return plot, reused[plot]
+            async with limiter:
+                return plot, await gemini_service.analyze_crop_disease(
+                    images=parts,
+                    language=language,
+                    message=message,
+                    **context
+                )
+
+        tasks = [asyncio.create_task(analyze(plot, parts)) for plot, parts in groups.items()]
+        completed = {}
+        try:
+            for finished in asyncio.as_completed(tasks):
+                plot, result = await finished
+                completed[plot] = result
+                yield _sse("item", {"plot": plot, "images": len(groups[plot]), **(
+                    {"error": result["error"]} if "error" in result else {"result": result}
+                )})
+        finally:
+            # A client that disconnects mid-batch should not leave model calls running
+            for task in tasks:
+                task.cancel()
+
+        saved = 0
+        for plot, result in completed.items():
+            if "error" not in result:
+                await _save_discussion(user.id, context["crop_type"], message, result, groups[plot])
+                saved += 1
+
+        yield _sse("done", {
+            "items": len(groups),
+            "failed": len(groups) - saved,
+            "saved": saved
+        })
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -1,17 +1,38 @@
-from fastapi import APIRouter, Depends, HTTPException
-from typing import List
-from repository.discussion_repository import discussion_repository
-from repository.user_repository import user_repository
+from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import Optional
+from models.schemas import Discussion, DiscussionPage
+from repository.discussion_repository import async_discussion_repository as discussion_repository
+from service.user_cache import user_cache
+from utils.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, decode_cursor, next_cursor
 from utils.security_manager import security_manager
+from utils.db_manager import db_manager
 
 router = APIRouter(prefix="/discussions", tags=["discussions"])
 
-@router.get("/")
-async def get_my_discussions(current_user: dict = Depends(security_manager.get_current_user)):
-    username = current_user.get("sub")
-    user = user_repository.get_user_by_username(username)
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    
-    discussions = discussion_repository.get_discussions_by_farmer(user.id)
-    return discussions
+@router.get("/", response_model=DiscussionPage)
+async def get_my_discussions(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None),
+    severity: Optional[str] = Query(None),
+    disease: Optional[str] = Query(None),
+    crop_type: Optional[str] = Query(None),
+    current_user: dict = Depends(security_manager.get_current_user),
+    db=Depends(db_manager.get_session)
+):
+    # Newest first, headings and summary fields only; the full answer comes from /discussions/{id}
+    user = await user_cache.get_user(db, current_user)
+    filters = {"severity": severity, "disease": disease, "crop_type": crop_type}
+    items = await discussion_repository.get_discussion_page(db, user.id, limit, decode_cursor(cursor), filters)
+    return {"items": items, "next_cursor": next_cursor(items, limit)}
+
+@router.get("/{discussion_id}", response_model=Discussion)
+async def get_discussion(
+    discussion_id: int,
+    current_user: dict = Depends(security_manager.get_current_user),
+    db=Depends(db_manager.get_session)
+):
+    user = await user_cache.get_user(db, current_user)
+    discussion = await discussion_repository.get_discussion_by_id(db, discussion_id)
+    if not discussion or discussion.farmer_id != user.id:
+        raise HTTPException(status_code=404, detail="Discussion not found")
+    return discussion
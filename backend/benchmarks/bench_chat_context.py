@@ -0,0 +1,116 @@
+"""
+Chat context benchmark: the time before the model is called, assembled one dependency after another
+(the old path) against the concurrent context stage, cold and cached.
+
+Runs against a throwaway SQLite file unless BENCH_DATABASE_URL is set. The weather API is replaced by
+a fake that sleeps for FAKE_WEATHER_LATENCY seconds, the farmer has HISTORY_ROWS history records and
+the request carries the sample photos, read and prepared the way the endpoint does.
+
+    cd backend
+    python benchmarks/bench_chat_context.py
+    FAKE_WEATHER_LATENCY=0.8 HISTORY_ROWS=5000 python benchmarks/bench_chat_context.py
+"""
+import asyncio
+import io
+import os
+import sys
+import tempfile
+import time
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ["DATABASE_URL"] = os.environ.get("BENCH_DATABASE_URL") or f"sqlite:///{tempfile.mkdtemp()}/bench.db"
+
+from sqlalchemy import insert
+from starlette.datastructures import Headers, UploadFile
+from api.chat_api import _read_images
+from models.database import UserDB, LandDB, CropDB, HistoryDB
+from models.schemas import User
+from repository.history_repository import async_history_repository as history_repository
+from repository.crop_repository import async_crop_repository as crop_repository
+from service.chat_context_service import chat_context_service
+from service.weather_service import weather_service
+from utils.db_manager import db_manager
+
+FAKE_WEATHER_LATENCY = float(os.environ.get("FAKE_WEATHER_LATENCY", "0.3"))
+HISTORY_ROWS = int(os.environ.get("HISTORY_ROWS", "2000"))
+SAMPLES = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "sample")
+RUNS = 5
+
+async def fake_weather(city: str) -> dict:
+    await asyncio.sleep(FAKE_WEATHER_LATENCY)
+    return {"status": "success", "city": city, "temp_c": "31", "humidity": "70"}
+
+def seed():
+    db = db_manager.get_db()
+    try:
+        db.execute(insert(UserDB), [{"id": 1, "username": "bench@example.com", "password": "x", "role": "Farmer", "city": "Karnal"}])
+        db.execute(insert(LandDB), [{"id": 1, "farmer_id": 1, "land_name": "North", "area_size": 2.0}])
+        db.execute(insert(CropDB), [{"farmer_id": 1, "land_id": 1, "crop_name": name, "planted_date": date(2025, 11, 10)} for name in ("Wheat", "Mustard")])
+        db.execute(insert(HistoryDB), [
+            {"farmer_id": 1, "land_id": 1, "crop": "Wheat", "year": 1990 + i % 35, "yield_amount": 4.2,
+             "disease_record": "Yellow rust", "treatment_record": "Propiconazole"}
+            for i in range(HISTORY_ROWS)
+        ])
+        db.commit()
+    finally:
+        db.close()
+
+def uploads() -> list:
+    photos = sorted(name for name in os.listdir(SAMPLES) if name.lower().endswith((".jpg", ".jpeg", ".png")))[:2]
+    return [
+        UploadFile(io.BytesIO(open(os.path.join(SAMPLES, name), "rb").read()), filename=name,
+                   headers=Headers({"content-type": "image/jpeg"}))
+        for name in photos
+    ]
+
+async def serial(user: User):
+    # How /chat/analyze assembled its context before the concurrent stage
+    async with db_manager.session() as db:
+        weather = await weather_service.get_weather(user.city)
+        history = (await history_repository.get_history_by_farmer(db, user.id))[-5:]
+        crops = await crop_repository.get_crops_by_farmer(db, user.id)
+        images = await _read_images(uploads())
+    return weather, history, crops, images
+
+async def concurrent(user: User):
+    timings = {}
+    context = asyncio.create_task(chat_context_service.build(user, None, timings))
+    images = await chat_context_service.timed("images", _read_images(uploads()), timings)
+    return await context, images, timings
+
+async def measure(call) -> tuple:
+    best, result = None, None
+    for _ in range(RUNS):
+        started = time.perf_counter()
+        result = await call()
+        elapsed = (time.perf_counter() - started) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+async def main():
+    weather_service.get_weather = fake_weather
+    user = User(id=1, username="bench@example.com", role="Farmer", city="Karnal", is_active=True)
+    print(f"weather {FAKE_WEATHER_LATENCY * 1000:.0f}ms, {HISTORY_ROWS:,} history records, best of {RUNS}\n")
+
+    elapsed, _ = await measure(lambda: serial(user))
+    print(f"{'serial':<22} {elapsed:8.1f}ms")
+
+    def cold():
+        chat_context_service.cache.clear()
+        return concurrent(user)
+    elapsed, (_, _, timings) = await measure(cold)
+    stages = "  ".join(f"{stage} {value:.1f}" for stage, value in timings.items())
+    print(f"{'concurrent, cold':<22} {elapsed:8.1f}ms  ({stages})")
+
+    elapsed, (_, _, timings) = await measure(lambda: concurrent(user))
+    stages = "  ".join(f"{stage} {value:.1f}" for stage, value in timings.items())
+    print(f"{'concurrent, cached':<22} {elapsed:8.1f}ms  ({stages})")
+
+if __name__ == "__main__":
+    db_manager.create_tables()
+    seed()
+    try:
+        asyncio.run(main())
+    finally:
+        db_manager.drop_tables()
@@ -0,0 +1,91 @@
+"""
+Discussion write benchmark: the per-answer insert and commit the chat endpoints used to wait on,
+against handing the row to the write-behind queue, and the time the queue takes to drain.
+
+Runs against a throwaway SQLite file unless BENCH_DATABASE_URL is set. Every row carries a
+full-size diagnosis.
+
+    cd backend
+    python benchmarks/bench_discussion_writer.py
+    python benchmarks/bench_discussion_writer.py 10000
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+folder = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = os.environ.get("BENCH_DATABASE_URL") or f"sqlite:///{folder}/bench.db"
+os.environ["DISCUSSION_SPILL_PATH"] = f"{folder}/spill.jsonl"
+
+from sqlalchemy import insert
+from models.database import UserDB
+from repository.discussion_repository import async_discussion_repository as discussion_repository
+from service.discussion_writer import discussion_writer
+from utils.db_manager import db_manager
+
+SIZE = 2_000
+
+def diagnosis(i: int) -> dict:
+    return {
+        "diagnosis": f"Yellow rust on flag leaves, plot {i}",
+        "diseases": ["Yellow Rust", "Leaf Blight"] if i % 2 else ["Powdery Mildew"],
+        "severity": ("Low", "Medium", "High")[i % 3],
+        "reasoning": "Elongated yellow pustules in stripes along the veins. " * 20,
+        "advisory": {"preventive_care": "Sow resistant varieties and monitor fields after humid spells. " * 3},
+    }
+
+def row(i: int) -> dict:
+    return {"farmer_id": 1, "heading": f"Wheat - Yellow rust {i}", "question": "Why are the leaves turning yellow?",
+            "answer": diagnosis(i), "crop_type": "Wheat", "image_hashes": None}
+
+def percentile(timings: list, share: float) -> float:
+    return sorted(timings)[int(share * (len(timings) - 1))] * 1000
+
+async def commit_each(size: int) -> list:
+    timings = []
+    for i in range(size):
+        started = time.perf_counter()
+        async with db_manager.session() as db:
+            await discussion_repository.create_discussion(db, row(i))
+            await db_manager.commit(db)
+        timings.append(time.perf_counter() - started)
+    return timings
+
+async def write_behind(size: int) -> list:
+    timings = []
+    for i in range(size):
+        started = time.perf_counter()
+        await discussion_writer.submit(row(i))
+        timings.append(time.perf_counter() - started)
+        if i % 50 == 0:
+            await asyncio.sleep(0)  # requests arrive over time, the flush task gets its turns
+    return timings
+
+async def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else SIZE
+    print(f"{size:,} discussions\n")
+    for label, call in (("insert + commit", commit_each), ("write-behind submit", write_behind)):
+        started = time.perf_counter()
+        timings = await call(size)
+        answered = time.perf_counter() - started
+        await discussion_writer.close()
+        drained = time.perf_counter() - started
+        print(f"{label:<20} p50 {percentile(timings, 0.5):7.3f}ms  p99 {percentile(timings, 0.99):7.3f}ms  "
+              f"all answered {answered:6.2f}s  all stored {drained:6.2f}s")
+    stats = discussion_writer.stats()
+    print(f"\n{stats['flushes']} flushes, {stats['flush_ms'] / max(stats['flushes'], 1):.1f}ms each, "
+          f"{stats['spilled']} spilled")
+
+if __name__ == "__main__":
+    db_manager.create_tables()
+    db = db_manager.get_db()
+    db.execute(insert(UserDB), [{"id": 1, "username": "heavy@example.com", "password": "x", "role": "Farmer"}])
+    db.commit()
+    db.close()
+    try:
+        asyncio.run(main())
+    finally:
+        db_manager.drop_tables()
@@ -0,0 +1,110 @@
+"""
+Discussion history benchmark: the old full-row list against the paginated summary projection, for
+one heavy farmer.
+
+Runs against a throwaway SQLite file unless BENCH_DATABASE_URL is set. Every discussion carries a
+full-size diagnosis, so the cost of sending answers with the list is realistic. Prints the JSON
+payload and the time to build it for each way of listing.
+
+    cd backend
+    python benchmarks/bench_discussions.py
+    python benchmarks/bench_discussions.py 20000
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ["DATABASE_URL"] = os.environ.get("BENCH_DATABASE_URL") or f"sqlite:///{tempfile.mkdtemp()}/bench.db"
+os.environ["DB_ASYNC"] = "false"
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import insert
+from models.database import UserDB, DiscussionDB
+from models.schemas import Discussion, DiscussionPage
+from repository.discussion_repository import discussion_repository
+from utils.db_manager import db_manager
+from utils.pagination import next_cursor
+
+SIZE = 5_000
+PAGE = 20
+RUNS = 5
+INSERT_CHUNK = 1_000
+
+def diagnosis(i: int) -> dict:
+    return {
+        "diagnosis": f"Yellow rust on flag leaves, plot {i}",
+        "diseases": ["Yellow Rust", "Leaf Blight"] if i % 2 else ["Powdery Mildew"],
+        "severity": ("Low", "Medium", "High")[i % 3],
+        "spread_risk": "Medium",
+        "confidence_score": 0.87,
+        "reasoning": "Elongated yellow pustules in stripes along the veins. " * 20,
+        "advisory": {
+            "chemical_solution": {"name": "Propiconazole 25 EC", "dosage": "1 ml per litre of water"},
+            "bio_organic_solution": "Spray neem oil at 5 ml per litre at 10 day intervals. " * 3,
+            "organic_treatment": "Remove and burn infected leaves, avoid overhead irrigation. " * 3,
+            "fertilizer_support": "Split nitrogen doses and add potash to strengthen tissue. " * 3,
+            "preventive_care": "Sow resistant varieties and monitor fields after humid spells. " * 3,
+        },
+    }
+
+def seed(size: int):
+    db = db_manager.get_db()
+    try:
+        db.execute(insert(UserDB), [{"id": 1, "username": "heavy@example.com", "password": "x", "role": "Farmer"}])
+        started = datetime(2025, 1, 1, tzinfo=timezone.utc)
+        for first in range(0, size, INSERT_CHUNK):
+            db.execute(insert(DiscussionDB), [
+                {"farmer_id": 1, "heading": f"Wheat - Yellow rust {i}", "question": "Why are the leaves turning yellow? " * 4,
+                 "answer": diagnosis(i), "crop_type": "Wheat", "created_at": started + timedelta(hours=i)}
+                for i in range(first, min(size, first + INSERT_CHUNK))
+            ])
+        db.commit()
+    finally:
+        db.close()
+
+def full_list() -> bytes:
+    db = db_manager.get_db()
+    try:
+        rows = discussion_repository.get_discussions_by_farmer(db, 1)
+        return json.dumps(jsonable_encoder([Discussion.model_validate(row) for row in rows])).encode()
+    finally:
+        db.close()
+
+def first_page(filters: dict = None) -> bytes:
+    db = db_manager.get_db()
+    try:
+        items = discussion_repository.get_discussion_page(db, 1, PAGE, None, filters)
+        page = DiscussionPage.model_validate({"items": items, "next_cursor": next_cursor(items, PAGE)})
+        return page.model_dump_json().encode()
+    finally:
+        db.close()
+
+def measure(call) -> tuple:
+    timings = []
+    for _ in range(RUNS):
+        started = time.perf_counter()
+        payload = call()
+        timings.append(time.perf_counter() - started)
+    return min(timings) * 1000, len(payload)
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else SIZE
+    db_manager.create_tables()
+    seed(size)
+    print(f"{size:,} discussions for one farmer, best of {RUNS}\n")
+    for label, call in (
+        ("all rows, full answers", full_list),
+        (f"first page of {PAGE}", first_page),
+        ("first page, severity=high", lambda: first_page({"severity": "high"})),
+        ("first page, disease=blight", lambda: first_page({"disease": "blight"})),
+    ):
+        elapsed, written = measure(call)
+        print(f"{label:<28} {elapsed:9.1f}ms  {written / 1024:10.1f} KB")
+    db_manager.drop_tables()
+
+if __name__ == "__main__":
+    main()
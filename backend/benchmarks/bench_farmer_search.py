@@ -0,0 +1,115 @@
+"""
+Admin farmer search benchmark: in-process n-gram index latency on generated farmers.
+
+Names are drawn from common first and last names, so like real data many farmers share one;
+usernames and mobile numbers are unique. Each query shape runs against a freshly built
+FarmerSearchIndex, which is the SQLite fallback path (PostgreSQL uses its trigram indexes).
+
+    cd backend
+    python benchmarks/bench_farmer_search.py
+    python benchmarks/bench_farmer_search.py 100000
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/bench.db"
+os.environ["DB_ASYNC"] = "false"
+
+from config import settings
+from service.farmer_search_service import FarmerSearchIndex, farmer_search_service, _record
+
+SIZE = 1_000_000
+RUNS = 50
+LIMIT = 20
+COLUMNS = ["id", "full_name", "username", "mobile", "city", "state"]
+
+FIRST_NAMES = [
+    "Ramesh", "Suresh", "Mahesh", "Rajesh", "Ganesh", "Dinesh", "Mukesh", "Naresh", "Sunil", "Anil",
+    "Vijay", "Ajay", "Sanjay", "Manoj", "Ravi", "Amit", "Rahul", "Rohit", "Sandeep", "Pradeep",
+    "Harpreet", "Gurpreet", "Baldev", "Jaswant", "Kuldeep", "Lakshmi", "Sunita", "Anita", "Geeta", "Sita",
+    "Kamla", "Savitri", "Pooja", "Priya", "Neha", "Kavita", "Rekha", "Meena", "Asha", "Usha",
+]
+LAST_NAMES = [
+    "Kumar", "Singh", "Sharma", "Verma", "Yadav", "Patel", "Reddy", "Naidu", "Gowda", "Patil",
+    "Jadhav", "Pawar", "Deshmukh", "Chauhan", "Rathore", "Meena", "Gupta", "Mishra", "Tiwari", "Pandey",
+    "Sandhu", "Gill", "Dhillon", "Bhat", "Nair", "Pillai", "Iyer", "Das", "Ghosh", "Mandal",
+]
+PLACES = {
+    "Punjab": ["Ludhiana", "Amritsar", "Bathinda", "Patiala", "Jalandhar"],
+    "Haryana": ["Karnal", "Hisar", "Rohtak", "Panipat", "Sirsa"],
+    "Maharashtra": ["Nashik", "Pune", "Nagpur", "Aurangabad", "Solapur"],
+    "Uttar Pradesh": ["Lucknow", "Meerut", "Agra", "Varanasi", "Bareilly"],
+    "Karnataka": ["Mysuru", "Belagavi", "Hubballi", "Davangere", "Mandya"],
+    "Andhra Pradesh": ["Guntur", "Kurnool", "Nellore", "Anantapur", "Kadapa"],
+}
+
+QUERIES = [
+    ("name", {"full_name": "ramesh"}),
+    ("name typo", {"full_name": "rmesh kumr"}),
+    ("two words", {"full_name": "sunita patil"}),
+    ("short prefix", {"full_name": "ra"}),
+    ("email fragment", {"email": "gurpreet.sandhu12"}),
+    ("mobile prefix", {"mobile": "98765"}),
+    ("city filter", {"city": "karnal"}),
+    ("name + state", {"full_name": "kavita", "state": "maharashtra"}),
+    ("q text", {"q": "dinesh yadav"}),
+    ("q mobile", {"q": "9123"}),
+]
+
+def make_rows(count: int):
+    states = list(PLACES)
+    mobiles = random.sample(range(6_000_000_000, 10_000_000_000), count)
+    rows = []
+    for user_id in range(1, count + 1):
+        first, last = random.choice(FIRST_NAMES), random.choice(LAST_NAMES)
+        state = random.choice(states)
+        rows.append((
+            user_id,
+            f"{first} {last}",
+            f"{first.lower()}.{last.lower()}{user_id}@example.com",
+            str(mobiles[user_id - 1]),
+            random.choice(PLACES[state]),
+            state,
+        ))
+    return rows
+
+def percentile(samples, share):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * share))]
+
+def main():
+    random.seed(11)
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else SIZE
+    print(f"{size:,} farmers, min score {settings.SEARCH_MIN_SCORE}, page size {LIMIT}\n")
+
+    started = time.perf_counter()
+    rows = make_rows(size)
+    print(f"generate {time.perf_counter() - started:8.2f}s")
+    started = time.perf_counter()
+    index = FarmerSearchIndex(rows, settings.SEARCH_MIN_SCORE)
+    print(f"build    {time.perf_counter() - started:8.2f}s\n")
+
+    # A few hundred farmers edited since the build, as between two rebuilds
+    pending = [_record(SimpleNamespace(**dict(zip(COLUMNS, row)))) for row in random.sample(rows, 500)]
+    for record in pending:
+        index.retire(record["id"])
+
+    for label, criteria in QUERIES:
+        timings = []
+        for _ in range(RUNS):
+            started = time.perf_counter()
+            page = farmer_search_service._rank(index, pending, criteria, LIMIT)
+            timings.append((time.perf_counter() - started) * 1000)
+        matches = len(index.search(criteria)[0])
+        print(
+            f"{label:<15} p50 {percentile(timings, 0.5):7.2f}ms  p95 {percentile(timings, 0.95):7.2f}ms"
+            f"  matches {matches:>9,}  top {page[0][1] if page else '-'}"
+        )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Gemini concurrency benchmark against a local fake model, no API key or network needed.
+
+The fake model sleeps for FAKE_LATENCY seconds per call and fails a fraction of calls with
+ServiceUnavailable. While diagnoses are in flight, a probe task measures how late the event
+loop wakes up, which is what every other request on the worker would feel.
+
+    cd backend
+    python benchmarks/bench_gemini_concurrency.py
+    FAKE_LATENCY=2 FAKE_FAILURE_RATE=0.2 DIAGNOSES=200 python benchmarks/bench_gemini_concurrency.py
+"""
+import asyncio
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from google.api_core import exceptions as google_exceptions
+from config import settings
+from service.gemini_service import gemini_service
+
+FAKE_LATENCY = float(os.environ.get("FAKE_LATENCY", "1.0"))
+FAKE_FAILURE_RATE = float(os.environ.get("FAKE_FAILURE_RATE", "0.05"))
+DIAGNOSES = int(os.environ.get("DIAGNOSES", "100"))
+LEGACY_DIAGNOSES = 5
+
+class FakeResponse:
+    text = '```json\n{"diagnosis": "Healthy", "diseases": [], "severity": "Low"}\n```'
+
+class FakeModel:
+    def generate_content(self, contents):
+        time.sleep(FAKE_LATENCY)
+        return FakeResponse()
+
+    async def generate_content_async(self, contents):
+        await asyncio.sleep(FAKE_LATENCY)
+        if random.random() < FAKE_FAILURE_RATE:
+            raise google_exceptions.ServiceUnavailable("fake overload")
+        return FakeResponse()
+
+async def probe_loop_lag(stop: asyncio.Event, samples: list):
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(0.01)
+        samples.append(time.perf_counter() - started - 0.01)
+
+async def run(label: str, count: int, call):
+    stop = asyncio.Event()
+    samples = []
+    probe = asyncio.create_task(probe_loop_lag(stop, samples))
+    started = time.perf_counter()
+    results = await asyncio.gather(*(call(i) for i in range(count)), return_exceptions=True)
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await probe
+    failed = sum(1 for r in results if isinstance(r, Exception) or "error" in r)
+    print(
+        f"{label:<10} {count:>6} diagnoses  {elapsed:8.2f}s  {count / elapsed:7.1f}/s  "
+        f"failed={failed:<4} max loop lag={max(samples, default=0) * 1000:8.1f}ms"
+    )
+
+async def main():
+    gemini_service.model = FakeModel()
+    print(f"fake latency {FAKE_LATENCY}s, failure rate {FAKE_FAILURE_RATE:.0%}, concurrency {settings.GEMINI_MAX_CONCURRENCY}")
+
+    async def legacy(i):
+        # What analyze_crop_disease did before: a blocking call inside the coroutine
+        gemini_service.model.generate_content(["prompt", i])
+        return {}
+
+    async def current(i):
+        return await gemini_service.analyze_crop_disease([str(i).encode()], "Wheat", "Karnal", {}, [])
+
+    await run("blocking", LEGACY_DIAGNOSES, legacy)
+    await run("async", DIAGNOSES, current)
+    print("gemini stats:", gemini_service.stats())
+
+if __name__ == "__main__":
+    asyncio.run(main())
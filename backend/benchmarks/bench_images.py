@@ -0,0 +1,72 @@
+"""
+Image preprocessing benchmark over the photos in sample/.
+
+Each sample is measured as uploaded and as a phone-sized copy (4032x3024, quality 95), which is
+what farmers' cameras actually produce. Reports bytes saved and time per image in-process, then
+the throughput of the process pool used by the API.
+
+    cd backend
+    python benchmarks/bench_images.py
+    IMAGE_MAX_EDGE=1024 IMAGE_JPEG_QUALITY=80 python benchmarks/bench_images.py
+"""
+import asyncio
+import glob
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import Image
+from config import settings
+from service.image_service import image_service, preprocess_image
+
+SAMPLE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "sample")
+PHONE_SIZE = (4032, 3024)
+POOL_BATCH = 24
+
+def phone_sized(data: bytes) -> bytes:
+    with Image.open(io.BytesIO(data)) as img:
+        out = io.BytesIO()
+        img.convert("RGB").resize(PHONE_SIZE, Image.BICUBIC).save(out, format="JPEG", quality=95)
+        return out.getvalue()
+
+def measure(label: str, data: bytes):
+    started = time.perf_counter()
+    part = preprocess_image(data, settings.IMAGE_MAX_EDGE, settings.IMAGE_JPEG_QUALITY)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    saved = len(data) - len(part["data"])
+    print(
+        f"{label:<36} {len(data):>11,} -> {len(part['data']):>9,} bytes  "
+        f"saved {saved / len(data):6.1%}  {elapsed_ms:8.1f}ms  {part['mime_type']}"
+    )
+    return data
+
+async def pool_throughput(images):
+    batch = (images * POOL_BATCH)[:POOL_BATCH]
+    await image_service.prepare(batch[:settings.IMAGE_WORKERS or 1])  # warm the workers up
+    started = time.perf_counter()
+    await image_service.prepare(batch)
+    elapsed = time.perf_counter() - started
+    print(f"\npool of {settings.IMAGE_WORKERS}: {len(batch)} phone-sized images in {elapsed:.2f}s ({len(batch) / elapsed:.1f}/s)")
+
+def main():
+    paths = sorted(glob.glob(os.path.join(SAMPLE_DIR, "*")))
+    if not paths:
+        sys.exit(f"No images found in {SAMPLE_DIR}")
+    print(f"max edge {settings.IMAGE_MAX_EDGE}px, quality {settings.IMAGE_JPEG_QUALITY}\n")
+
+    large = []
+    for path in paths:
+        with open(path, "rb") as f:
+            data = f.read()
+        name = os.path.basename(path)
+        measure(name, data)
+        large.append(measure(f"{name} @ {PHONE_SIZE[0]}x{PHONE_SIZE[1]}", phone_sized(data)))
+
+    asyncio.run(pool_throughput(large))
+    image_service.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Bulk farmer import benchmark: a 10k-row district CSV through the import path, end to end.
+
+Runs against a throwaway SQLite file unless BENCH_DATABASE_URL is set. Every row gets one land
+parcel and its own password. Also prints the per-farmer cost of the old one-by-one path at
+BCRYPT_ROUNDS for comparison.
+
+    cd backend
+    python benchmarks/bench_import.py
+    python benchmarks/bench_import.py 50000
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ["DATABASE_URL"] = os.environ.get("BENCH_DATABASE_URL") or f"sqlite:///{tempfile.mkdtemp()}/bench.db"
+os.environ["DB_ASYNC"] = "false"
+
+from fastapi import UploadFile
+from starlette.datastructures import Headers
+import io
+from config import settings
+from utils.db_manager import db_manager
+from utils.password_hasher import password_hasher
+from service.admin_service import admin_service
+
+SIZE = 10_000
+SINGLE_SAMPLES = 3
+
+def make_csv(count: int) -> bytes:
+    lines = ["username,password,full_name,mobile,city,state,land_name,area_size"]
+    lines += [
+        f"import{i}@example.com,initial-{i:06d},Import Farmer {i},9{i:09d},Karnal,Haryana,Plot {i},{1 + i % 7}.5"
+        for i in range(count)
+    ]
+    return "\n".join(lines).encode()
+
+async def run_import(data: bytes) -> dict:
+    upload = UploadFile(io.BytesIO(data), filename="district.csv", headers=Headers({"content-type": "text/csv"}))
+    async with db_manager.session() as db:
+        return await admin_service.import_farmers(db, upload)
+
+async def single_create(index: int):
+    async with db_manager.session() as db:
+        await admin_service.create_farmer(db, {
+            "username": f"single{index}@example.com", "password": "initial", "full_name": "Single Farmer",
+            "city": "Karnal", "state": "Haryana"
+        })
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else SIZE
+    db_manager.create_tables()
+    data = make_csv(size)
+    print(f"{size:,} rows, {len(data) / 1_048_576:.1f} MB, batch {settings.IMPORT_BATCH_SIZE}, "
+          f"bcrypt rounds {settings.BCRYPT_ROUNDS}, {password_hasher.bulk_workers} hash workers\n")
+
+    started = time.perf_counter()
+    report = asyncio.run(run_import(data))
+    elapsed = time.perf_counter() - started
+    print(f"bulk import      {elapsed:7.2f}s  {size / elapsed:8,.0f} farmers/s  created {report['created']:,}  failed {report['failed']}")
+
+    started = time.perf_counter()
+    report = asyncio.run(run_import(data))
+    print(f"re-import        {time.perf_counter() - started:7.2f}s  all duplicates: {report['failed'] == size}")
+
+    started = time.perf_counter()
+    for index in range(SINGLE_SAMPLES):
+        asyncio.run(single_create(index))
+    per_farmer = (time.perf_counter() - started) / SINGLE_SAMPLES
+    print(f"POST /admin/farmers at {settings.BCRYPT_ROUNDS} rounds: {per_farmer * 1000:.0f}ms per farmer, "
+          f"~{per_farmer * size / 60:.0f} min for {size:,}")
+
+    password_hasher.close()
+    db_manager.drop_tables()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""
+Near-duplicate photo index benchmark: multi-index Hamming lookup latency at realistic index sizes.
+
+Hashes are random 64-bit values, so chunk buckets are evenly loaded.
+Each query is a stored hash with a few bits flipped, like a second shot of the same leaf.
+
+    cd backend
+    python benchmarks/bench_phash_index.py
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import settings
+from utils.hamming_index import HammingIndex
+
+SIZES = [1_000, 10_000, 50_000]
+QUERIES = 2_000
+
+def near(value: int, bits: int) -> int:
+    for bit in random.sample(range(64), bits):
+        value ^= 1 << bit
+    return value
+
+def main():
+    random.seed(7)
+    radius = settings.PHASH_MAX_DISTANCE
+    print(f"radius {radius} bits\n")
+    for size in SIZES:
+        hashes = [random.getrandbits(64) for _ in range(size)]
+        started = time.perf_counter()
+        index = HammingIndex(radius)
+        for i, value in enumerate(hashes):
+            index.add(value, i)
+        build = time.perf_counter() - started
+
+        queries = [near(random.choice(hashes), random.randint(0, radius)) for _ in range(QUERIES)]
+        started = time.perf_counter()
+        found = sum(1 for q in queries if index.search(q, radius))
+        per_query_us = (time.perf_counter() - started) / QUERIES * 1_000_000
+
+        print(f"{size:>7,} hashes  build {build * 1000:8.1f}ms  lookup {per_query_us:8.1f}us  found {found}/{QUERIES}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Question index benchmark: build time and lookup latency of the TF-IDF question index at up to a
+million past questions.
+
+Questions are stitched from symptom, plant part, crop, place and time phrases drawn with a Zipf-like
+skew, so a few phrasings dominate the way real questions do. One set of queries retypes stored
+questions (repeat questions, answered from the index), the other draws fresh ones (context lookups).
+
+    cd backend
+    python benchmarks/bench_question_index.py
+    python benchmarks/bench_question_index.py 200000
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import settings
+from utils.text_index import TextIndex
+
+SIZE = 1_000_000
+QUERIES = 1_000
+CROPS = ["wheat", "rice", "cotton", "maize", "mustard", "sugarcane", "soybean", "tomato", "potato", "chilli"]
+SYMPTOMS = [
+    "yellow spots", "brown patches", "white powder", "leaf curl", "wilting", "black spots", "holes",
+    "rust pustules", "stunted growth", "dry tips", "sticky residue", "orange streaks", "rotting roots",
+    "purple veins", "pale leaves", "webbing", "dark lesions", "mosaic pattern", "fruit drop", "cracked stems",
+]
+PARTS = ["leaves", "stems", "roots", "fruits", "flowers", "pods", "ears", "tillers", "seedlings", "bolls"]
+PLACES = ["haryana", "punjab", "bihar", "gujarat", "maharashtra", "rajasthan", "karnataka", "odisha"]
+WHEN = ["after rain", "this february", "since last week", "after irrigation", "in the morning", "after spraying urea"]
+ASKS = ["what should i spray", "is it a disease", "how do i stop it", "what is the cause", "will it spread"]
+
+def zipf(items: list):
+    return random.choices(items, weights=[1 / (rank + 1) for rank in range(len(items))])[0]
+
+def question() -> tuple:
+    crop = random.randrange(len(CROPS)) if random.random() < 0.5 else CROPS.index(zipf(CROPS))
+    text = (f"{zipf(SYMPTOMS)} on {CROPS[crop]} {zipf(PARTS)} in {zipf(PLACES)} {zipf(WHEN)}, "
+            f"{zipf(ASKS)}? field {random.randrange(5000)}")
+    return text, crop
+
+def reworded(asked: tuple) -> tuple:
+    # Same question typed differently: case, punctuation and filler words
+    words = asked[0].replace(",", "").replace("?", "").split()
+    words.insert(random.randrange(len(words)), random.choice(["the", "my", "is", "a"]))
+    text = " ".join(words)
+    return (text.upper() if random.random() < 0.2 else text.capitalize()) + random.choice(["?", "??", " !", ""]), asked[1]
+
+def percentile(timings: list, share: float) -> float:
+    return sorted(timings)[int(share * (len(timings) - 1))] * 1000
+
+def main():
+    random.seed(7)
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else SIZE
+    asked = [question() for _ in range(size)]
+
+    started = time.perf_counter()
+    index = TextIndex([text for text, _ in asked], range(size), [crop for _, crop in asked])
+    build = time.perf_counter() - started
+    print(f"{size:,} questions  build {build:.1f}s\n")
+
+    for label, make in (
+        ("repeat questions", lambda: reworded(random.choice(asked))),
+        ("new questions", question),
+    ):
+        queries = [make() for _ in range(QUERIES)]
+        timings, reused, matched = [], 0, 0
+        for text, group in queries:
+            started = time.perf_counter()
+            found = index.search(text, settings.QUESTION_CONTEXT_TOP_K, settings.QUESTION_CONTEXT_MIN_SCORE, group)
+            timings.append(time.perf_counter() - started)
+            matched += bool(found)
+            reused += bool(found) and found[0][1] >= settings.QUESTION_REUSE_MIN_SCORE
+        print(f"{label:<18} p50 {percentile(timings, 0.5):6.2f}ms  p95 {percentile(timings, 0.95):6.2f}ms  "
+              f"max {max(timings) * 1000:6.2f}ms  reused {reused}/{QUERIES}  context {matched - reused}/{QUERIES}")
+
+if __name__ == "__main__":
+    main()
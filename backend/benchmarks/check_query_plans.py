@@ -0,0 +1,224 @@
+"""
+Query plan check: runs every repository read against a seeded database, EXPLAINs each statement it
+sends and fails when one sequentially scans a table holding SEQ_SCAN_ROW_LIMIT rows or more.
+
+Runs against a throwaway SQLite file unless BENCH_DATABASE_URL is set; point it at a PostgreSQL
+database built with setup_db.py to check the plans production will get. Exits non-zero on a
+regression, so it can gate a deploy. tests/test_query_plans.py runs the same checks on SQLite.
+
+    cd backend
+    python benchmarks/check_query_plans.py
+    BENCH_DATABASE_URL=postgresql://localhost/agroguard_plans python benchmarks/check_query_plans.py
+"""
+import json
+import os
+import re
+import sys
+import tempfile
+from datetime import date, datetime, timedelta, timezone
+
+if __name__ == "__main__":
+    # Imported by the tests, it uses their database instead
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    os.environ["DATABASE_URL"] = os.environ.get("BENCH_DATABASE_URL") or f"sqlite:///{tempfile.mkdtemp()}/plans.db"
+    os.environ["DB_ASYNC"] = "false"
+
+from sqlalchemy import event, func, insert, select, text
+from models.database import UserDB, LandDB, CropDB, HistoryDB, DiscussionDB, NotificationDB, JobDB
+from utils.db_manager import db_manager
+from repository.user_repository import user_repository
+from repository.land_repository import land_repository
+from repository.crop_repository import crop_repository
+from repository.history_repository import history_repository
+from repository.discussion_repository import discussion_repository
+from repository.notification_repository import notification_repository
+from repository.dashboard_repository import dashboard_repository
+from repository.job_repository import job_repository
+
+FARMERS = 20_000
+SEQ_SCAN_ROW_LIMIT = 10_000
+INSERT_CHUNK = 5_000
+TABLES = ("users", "land", "crops", "history", "discussions", "notifications", "jobs")
+STATES = [("Haryana", "Karnal"), ("Punjab", "Ludhiana"), ("Maharashtra", "Pune"), ("Bihar", "Patna")]
+SQLITE_SCAN = re.compile(r"^SCAN (\w+)(.*)$")
+# What a check is allowed to do besides index lookups
+FULL_READ = "full read"  # reads the whole table by design
+KEY_WALK = "key walk"  # walks the primary key in order until LIMIT rows matched
+
+def seed():
+    """FARMERS farmers, each with a land parcel, two crops, a history row, two discussions and notifications."""
+    db = db_manager.get_db()
+    try:
+        if db.execute(select(func.count(UserDB.id))).scalar_one() >= FARMERS:
+            return
+        started = datetime(2026, 1, 1, tzinfo=timezone.utc)
+        for first in range(1, FARMERS + 1, INSERT_CHUNK):
+            ids = range(first, min(FARMERS, first + INSERT_CHUNK - 1) + 1)
+            db.execute(insert(UserDB), [
+                {"id": i, "username": f"plan{i}@example.com", "password": "x", "role": "Farmer",
+                 "full_name": f"Plan Farmer {i}", "mobile": f"9{i:09d}",
+                 "state": STATES[i % len(STATES)][0], "city": STATES[i % len(STATES)][1]}
+                for i in ids
+            ])
+            db.execute(insert(LandDB), [{"id": i, "farmer_id": i, "land_name": "Plot", "area_size": 2.5} for i in ids])
+            db.execute(insert(CropDB), [
+                {"farmer_id": i, "land_id": i, "crop_name": crop, "planted_date": date(2026, 1, 15)}
+                for i in ids for crop in ("Wheat", "Mustard")
+            ])
+            db.execute(insert(HistoryDB), [
+                {"farmer_id": i, "land_id": i, "crop": "Wheat", "year": 2025, "yield_amount": 40} for i in ids
+            ])
+            db.execute(insert(DiscussionDB), [
+                {"farmer_id": i, "heading": "Leaf spots", "question": "Brown spots on leaves", "answer": {"severity": "High", "diseases": ["Leaf Rust"]},
+                 "crop_type": "Wheat", "image_hashes": "0f0f0f0f0f0f0f0f" if n else None,
+                 "created_at": started + timedelta(minutes=i * 2 + n)}
+                for i in ids for n in range(2)
+            ])
+            # Most notifications have been read, as in production
+            db.execute(insert(NotificationDB), [
+                {"farmer_id": i, "title": "Advisory", "message": "Irrigate tomorrow", "type": "Weather",
+                 "is_read": n > 0, "created_at": started + timedelta(minutes=i * 2 + n)}
+                for i in ids for n in range(2)
+            ])
+        db.execute(insert(NotificationDB), [
+            {"farmer_id": None, "title": "Broadcast", "message": "Monsoon update", "type": "General",
+             "created_at": started + timedelta(days=n)}
+            for n in range(20)
+        ])
+        db.execute(insert(JobDB), [{"job_type": "broadcast", "status": "completed"} for _ in range(50)])
+        db.commit()
+        # Planner statistics, so the plans match what a populated database gets
+        db.execute(text("ANALYZE"))
+        db.commit()
+    finally:
+        db.close()
+
+# (label, call, allowance). Full reads are the point of the last three: they feed the in-process
+# search index, the CSV export and the legacy farmer list.
+def catalogue(dialect: str) -> list:
+    farmer_id = FARMERS // 2
+    checks = [
+        ("users.get_user_by_username", lambda db: user_repository.get_user_by_username(db, "plan7@example.com"), None),
+        ("users.get_user_by_id", lambda db: user_repository.get_user_by_id(db, farmer_id), None),
+        ("users.get_users_by_ids", lambda db: user_repository.get_users_by_ids(db, [3, 5, farmer_id]), None),
+        ("users.get_existing_usernames", lambda db: user_repository.get_existing_usernames(db, ["plan1@example.com", "new@example.com"]), None),
+        ("users.search_farmers listing", lambda db: user_repository.search_farmers(db, {}, 20), KEY_WALK),
+        ("users.search_farmer_ids", lambda db: user_repository.search_farmer_ids(db, {}, farmer_id, 500), KEY_WALK),
+        ("lands.get_lands_by_farmer", lambda db: land_repository.get_lands_by_farmer(db, farmer_id), None),
+        ("crops.get_crops_by_farmer", lambda db: crop_repository.get_crops_by_farmer(db, farmer_id), None),
+        ("history.get_history_by_farmer", lambda db: history_repository.get_history_by_farmer(db, farmer_id), None),
+        ("history.get_recent_history", lambda db: history_repository.get_recent_history(db, farmer_id, 5), None),
+        ("discussions.get_discussions_by_farmer", lambda db: discussion_repository.get_discussions_by_farmer(db, farmer_id), None),
+        ("discussions.get_discussion_page", lambda db: discussion_repository.get_discussion_page(db, farmer_id, 20), None),
+        ("discussions.get_discussion_page severity", lambda db: discussion_repository.get_discussion_page(db, farmer_id, 20, None, {"severity": "high"}), None),
+        ("discussions.get_discussion_by_id", lambda db: discussion_repository.get_discussion_by_id(db, farmer_id), None),
+        ("discussions.get_hashed_discussions", lambda db: discussion_repository.get_hashed_discussions(db, farmer_id, "Wheat", 50), None),
+        ("discussions.get_discussions_by_ids", lambda db: discussion_repository.get_discussions_by_ids(db, [3, 5, farmer_id]), None),
+        ("notifications.get_recent_notifications", lambda db: notification_repository.get_recent_notifications(db, farmer_id), None),
+        ("notifications.get_notification_page", lambda db: notification_repository.get_notification_page(db, farmer_id, 20), None),
+        ("notifications.count_unread", lambda db: notification_repository.count_unread(db, farmer_id), None),
+        ("dashboard.get_summary_counts", lambda db: dashboard_repository.get_summary_counts(db, farmer_id), None),
+        ("jobs.get_unfinished_job_ids", lambda db: job_repository.get_unfinished_job_ids(db), None),
+        ("users.get_farmer_search_rows", lambda db: user_repository.get_farmer_search_rows(db), FULL_READ),
+        ("users.stream_farmer_export", lambda db: [rows for rows in user_repository.stream_farmer_export(db, {}, True, True, 5000)], FULL_READ),
+        ("users.get_all_farmers", lambda db: user_repository.get_all_farmers(db), FULL_READ),
+        ("discussions.get_question_rows", lambda db: discussion_repository.get_question_rows(db, 1000000, "Image-based Analysis"), FULL_READ),
+    ]
+    if dialect == "postgresql":
+        # Substring search is answered by the trigram indexes here; other backends use the n-gram index
+        checks += [
+            ("users.search_farmers q", lambda db: user_repository.search_farmers(db, {"q": "Farmer 77"}, 20), None),
+            ("users.search_farmers name+state", lambda db: user_repository.search_farmers(db, {"full_name": "Plan", "state": "Punj"}, 20), None),
+            ("users.search_farmers mobile", lambda db: user_repository.search_farmers(db, {"mobile": "900001"}, 20), None),
+        ]
+    return checks
+
+def capture(db, call) -> list:
+    """Every SELECT the call sends, with its driver-level parameters."""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if not executemany and statement.lstrip().upper().startswith(("SELECT", "WITH")):
+            statements.append((statement, parameters))
+
+    event.listen(db_manager.engine, "before_cursor_execute", record)
+    try:
+        call(db)
+    finally:
+        event.remove(db_manager.engine, "before_cursor_execute", record)
+    return statements
+
+def sequential_scans(conn, dialect: str, statement: str, parameters, allowance: str = None) -> list:
+    """(table, plan line) for each table the plan reads without an index."""
+    if dialect == "postgresql":
+        plan = conn.exec_driver_sql("EXPLAIN (FORMAT JSON) " + statement, parameters).scalar()
+        plan = json.loads(plan) if isinstance(plan, str) else plan
+        scans, nodes = [], [plan[0]["Plan"]]
+        while nodes:
+            node = nodes.pop()
+            if node["Node Type"] == "Seq Scan":
+                scans.append((node["Relation Name"], f"Seq Scan on {node['Relation Name']}"))
+            nodes.extend(node.get("Plans", []))
+        return scans
+
+    scans, sorted_in_memory = [], False
+    for row in conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters):
+        detail = row[-1]
+        sorted_in_memory |= detail.startswith("USE TEMP B-TREE")
+        match = SQLITE_SCAN.match(detail)
+        # "SCAN t USING [COVERING] INDEX ..." walks an index in order, which LIMIT cuts short
+        if match and "INDEX" not in match.group(2):
+            scans.append((match.group(1), detail))
+    # SQLite shows a rowid-ordered walk as a plain SCAN; it only stops early when nothing is sorted afterwards
+    if allowance == KEY_WALK and not sorted_in_memory:
+        return []
+    return scans
+
+def table_sizes(db) -> dict:
+    return {table: db.execute(text(f"SELECT count(*) FROM {table}")).scalar_one() for table in TABLES}
+
+def check(db, dialect: str, sizes: dict, call, allowance: str = None) -> tuple:
+    """(statements the call sent, (table, plan line) for each sequential scan of a large table)."""
+    statements = capture(db, call)
+    db.rollback()
+    conn = db.connection()
+    problems = [
+        (table, detail)
+        for statement, parameters in statements
+        for table, detail in sequential_scans(conn, dialect, statement, parameters, allowance)
+        if sizes.get(table, 0) >= SEQ_SCAN_ROW_LIMIT
+    ]
+    db.rollback()
+    return statements, problems
+
+def main():
+    db_manager.create_tables()
+    seed()
+    dialect = db_manager.engine.dialect.name
+    db = db_manager.get_db()
+    failures = 0
+    try:
+        sizes = table_sizes(db)
+        print(f"{dialect}, sequential scans fail on tables of {SEQ_SCAN_ROW_LIMIT:,}+ rows\n")
+
+        for label, call, allowance in catalogue(dialect):
+            statements, problems = check(db, dialect, sizes, call, allowance)
+            if allowance == FULL_READ:
+                status = FULL_READ
+            elif problems:
+                status = "FAIL"
+                failures += 1
+            else:
+                status = "ok"
+            print(f"{status:<9} {label:<42} {len(statements)} statement(s)")
+            if status == "FAIL":
+                for table, detail in problems:
+                    print(f"          {detail} ({sizes[table]:,} rows)")
+    finally:
+        db.close()
+
+    print(f"\n{failures} regression(s)")
+    sys.exit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,8 @@ from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
     DATABASE_URL: str = ""
+    ASYNC_DATABASE_URL: str = ""
+    DB_ASYNC: bool = False
     DB_USER: str = ""
     DB_PASSWORD: str = ""
     DB_NAME: str = ""
@@ -12,6 +14,72 @@ class Settings(BaseSettings):
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     GEMINI_API_KEY: str = ""
     GEMINI_MODEL: str = "gemini-1.5-flash"
+    GEMINI_MAX_CONCURRENCY: int = 32
+    GEMINI_TIMEOUT_SECONDS: float = 45
+    GEMINI_MAX_RETRIES: int = 2
+    GEMINI_RETRY_BUDGET_RATIO: float = 0.1
+    IMAGE_MAX_EDGE: int = 1536
+    IMAGE_JPEG_QUALITY: int = 85
+    IMAGE_WORKERS: int = 2
+    PHASH_MAX_DISTANCE: int = 6
+    PHASH_MAX_AGE_DAYS: int = 14
+    PHASH_INDEX_TTL_SECONDS: int = 3600
+    PHASH_INDEX_MAX_KEYS: int = 10000
+    PHASH_INDEX_LOAD_LIMIT: int = 5000
+    DIAGNOSIS_LOCAL_CONFIDENCE: float = 0.75
+    # Off by default: /diagnosis/analyze answers with Gemini and the local classifier only screens out
+    # non-leaf photos and covers Gemini outages. The instant local answer stays disabled until a
+    # DISEASE_MODEL_PATH has been validated on labelled photos; turn this on only for such a model.
+    DIAGNOSIS_LOCAL_FIRST: bool = False
+    DIAGNOSIS_MIN_LEAF_FRACTION: float = 0.35
+    QUESTION_INDEX_ENABLED: bool = True
+    QUESTION_REUSE_MIN_SCORE: float = 0.9
+    QUESTION_CONTEXT_MIN_SCORE: float = 0.5
+    QUESTION_CONTEXT_TOP_K: int = 3
+    QUESTION_INDEX_LOAD_LIMIT: int = 1000000
+    QUESTION_INDEX_TTL_SECONDS: int = 3600
+    QUESTION_INDEX_MAX_DELTA: int = 20000
+    DISEASE_MODEL_PATH: str = ""
+    CHAT_BATCH_CONCURRENCY: int = 8
+    CHAT_BATCH_MAX_ITEMS: int = 100
+    UPLOAD_MAX_FILE_BYTES: int = 15 * 1024 * 1024
+    UPLOAD_MAX_REQUEST_BYTES: int = 60 * 1024 * 1024
+    UPLOAD_MAX_BATCH_BYTES: int = 400 * 1024 * 1024
+    UPLOAD_FORM_OVERHEAD_BYTES: int = 1024 * 1024
+    UPLOAD_SPOOL_BYTES: int = 1024 * 1024
+    UPLOAD_CHUNK_BYTES: int = 256 * 1024
+    USER_CACHE_TTL_SECONDS: int = 60
+    USER_CACHE_MAX_SIZE: int = 10000
+    CHAT_CONTEXT_TTL_SECONDS: int = 120
+    CHAT_CONTEXT_MAX_SIZE: int = 10000
+    CHAT_HISTORY_LIMIT: int = 5
+    DISCUSSION_FLUSH_INTERVAL_SECONDS: float = 1.0
+    DISCUSSION_FLUSH_BATCH_SIZE: int = 200
+    DISCUSSION_QUEUE_MAX_SIZE: int = 5000
+    DISCUSSION_RETRY_SECONDS: float = 5.0
+    DISCUSSION_SPILL_PATH: str = "discussion_spill.jsonl"
+    BCRYPT_ROUNDS: int = 12
+    HASH_WORKERS: int = 2
+    HASH_MAX_PENDING: int = 64
+    SEARCH_MIN_SCORE: float = 0.5
+    SEARCH_INDEX_TTL_SECONDS: int = 600
+    SEARCH_INDEX_MAX_DELTA: int = 5000
+    EXPORT_BATCH_SIZE: int = 5000
+    IMPORT_BATCH_SIZE: int = 1000
+    IMPORT_HASH_WORKERS: int = 0 # 0 = one per CPU
+    DASHBOARD_CACHE_TTL_SECONDS: int = 0
+    DASHBOARD_CACHE_MAX_SIZE: int = 10000
+    JOB_WORKERS: int = 4
+    JOB_LEASE_SECONDS: int = 300
+    BROADCAST_CHUNK_SIZE: int = 5000
+    WEATHER_BASE_URL: str = "https://wttr.in"
+    WEATHER_CACHE_TTL_SECONDS: int = 1800
+    WEATHER_STALE_SECONDS: int = 1800
+    WEATHER_CACHE_MAX_SIZE: int = 1000
+    DIAGNOSIS_CACHE_TTL_SECONDS: int = 7 * 24 * 3600
+    DIAGNOSIS_CACHE_MAX_SIZE: int = 512
+    DIAGNOSIS_CACHE_PATH: str = ""
+    DIAGNOSIS_CACHE_DISK_MAX_ENTRIES: int = 50000
 
     class Config:
         env_file = ".env"
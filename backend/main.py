@@ -3,6 +3,12 @@ from fastapi.middleware.cors import CORSMiddleware
 from api import auth_api, farmer_api, admin_api, chat_api, discussion_api, diagnosis_api
 
 from seed_db import seed_data
+from service.job_service import job_runner
+from service.weather_service import weather_service
+from service.image_service import image_service
+from service.discussion_writer import discussion_writer
+from utils.uploads import UploadLimitMiddleware
+from utils.password_hasher import password_hasher
 
 app = FastAPI(title="AgroGuard AI API")
 
@@ -11,6 +17,25 @@ def startup_db_seed():
     print('seeding database')
     # seed_data()
 
+@app.on_event("startup")
+async def resume_background_jobs():
+    # Broadcasts interrupted by a restart continue from their last committed chunk
+    await job_runner.resume()
+
+@app.on_event("startup")
+async def start_discussion_writer():
+    # Also replays discussions spilled to disk while the database was unavailable
+    discussion_writer.start()
+
+@app.on_event("shutdown")
+async def close_shared_resources():
+    await discussion_writer.close()
+    await weather_service.close()
+    image_service.close()
+    password_hasher.close()
+
+app.add_middleware(UploadLimitMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["http://localhost:5173", "http://127.0.0.1:5173"],
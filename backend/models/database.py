@@ -1,13 +1,27 @@
-from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, Float, Text, Date, DateTime, Numeric
+from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, Float, Text, Date, DateTime, Numeric, Index, DDL, event, text, JSON
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship, DeclarativeBase, Mapped, mapped_column
 from sqlalchemy.sql import func
 from typing import List
+from datetime import datetime, timezone
 
 class Base(DeclarativeBase):
     pass
 
+def trigram_index(name: str, column: str) -> Index:
+    # GIN trigram indexes only exist on PostgreSQL; elsewhere admin search uses the in-process n-gram index
+    return Index(name, column, postgresql_using="gin", postgresql_ops={column: "gin_trgm_ops"}).ddl_if(dialect="postgresql")
+
 class UserDB(Base):
     __tablename__ = "users"
+    __table_args__ = (
+        Index("ix_users_mobile", "mobile"),
+        Index("ix_users_role_state_city", "role", "state", "city"),
+        trigram_index("ix_users_full_name_trgm", "full_name"),
+        trigram_index("ix_users_username_trgm", "username"),
+        trigram_index("ix_users_city_trgm", "city"),
+        trigram_index("ix_users_state_trgm", "state"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     username: Mapped[str] = mapped_column(String(100), unique=True, nullable=False)
@@ -28,8 +42,16 @@ class UserDB(Base):
     discussions: Mapped[List["DiscussionDB"]] = relationship("DiscussionDB", back_populates="farmer")
     notifications: Mapped[List["NotificationDB"]] = relationship("NotificationDB", back_populates="farmer")
 
+event.listen(
+    UserDB.__table__, "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql")
+)
+
 class LandDB(Base):
     __tablename__ = "land"
+    __table_args__ = (
+        Index("ix_land_farmer_id", "farmer_id"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     farmer_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id"))
@@ -58,6 +80,9 @@ class FieldDB(Base):
 
 class CropDB(Base):
     __tablename__ = "crops"
+    __table_args__ = (
+        Index("ix_crops_farmer_id", "farmer_id"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     farmer_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id"))
@@ -73,6 +98,9 @@ class CropDB(Base):
 
 class HistoryDB(Base):
     __tablename__ = "history"
+    __table_args__ = (
+        Index("ix_history_farmer_id", "farmer_id"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     farmer_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id"))
@@ -95,13 +123,32 @@ class DiscussionDB(Base):
     farmer_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id"))
     heading: Mapped[str] = mapped_column(String(255))
     question: Mapped[str] = mapped_column(Text)
-    answer: Mapped[str] = mapped_column(Text) 
-    created_at: Mapped[DateTime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    # The diagnosis as returned by Gemini; JSONB on PostgreSQL so its fields can be filtered in SQL
+    answer: Mapped[dict] = mapped_column(JSON().with_variant(JSONB(), "postgresql"))
+    crop_type: Mapped[str] = mapped_column(String(255), nullable=True)
+    image_hashes: Mapped[str] = mapped_column(Text, nullable=True) # comma-separated 64-bit dHash hex digests
+    # Stamped by the application so SQLite stores the same format that list cursors bind
+    created_at: Mapped[DateTime] = mapped_column(
+        DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), server_default=func.now()
+    )
 
     farmer: Mapped["UserDB"] = relationship("UserDB", back_populates="discussions")
 
+    __table_args__ = (
+        Index("ix_discussions_farmer_crop", "farmer_id", "crop_type"),
+        Index("ix_discussions_farmer_created", "farmer_id", "created_at"),
+    )
+
 class NotificationDB(Base):
     __tablename__ = "notifications"
+    __table_args__ = (
+        Index("ix_notifications_farmer_created", "farmer_id", "created_at"),
+        # Partial: only unread rows are ever counted, and most notifications end up read
+        Index(
+            "ix_notifications_farmer_unread", "farmer_id",
+            postgresql_where=text("NOT is_read"), sqlite_where=text("is_read = 0")
+        ),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     farmer_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id"), nullable=True)
@@ -112,7 +159,27 @@ class NotificationDB(Base):
     city: Mapped[str] = mapped_column(String(100), nullable=True)
     crop: Mapped[str] = mapped_column(String(100), nullable=True)
     is_read: Mapped[bool] = mapped_column(Boolean, default=False)
-    created_at: Mapped[DateTime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    # Stamped by the application, like discussions, so SQLite stores the format feed cursors bind
+    created_at: Mapped[DateTime] = mapped_column(
+        DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), server_default=func.now()
+    )
 
     farmer: Mapped["UserDB"] = relationship("UserDB", back_populates="notifications")
 
+class JobDB(Base):
+    __tablename__ = "jobs"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    job_type: Mapped[str] = mapped_column(String(50))
+    status: Mapped[str] = mapped_column(String(20), default="pending", index=True) # 'pending', 'running', 'completed', 'failed'
+    params: Mapped[str] = mapped_column(Text, nullable=True)
+    checkpoint: Mapped[str] = mapped_column(Text, nullable=True)
+    result: Mapped[str] = mapped_column(Text, nullable=True)
+    error: Mapped[str] = mapped_column(Text, nullable=True)
+    total: Mapped[int] = mapped_column(Integer, default=0)
+    processed: Mapped[int] = mapped_column(Integer, default=0)
+    # The runner holding the job and until when; another may only take it over once the lease has run out
+    owner: Mapped[str] = mapped_column(String(100), nullable=True)
+    lease_expires_at: Mapped[DateTime] = mapped_column(DateTime(timezone=True), nullable=True)
+    created_at: Mapped[DateTime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    updated_at: Mapped[DateTime] = mapped_column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
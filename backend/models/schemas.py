@@ -1,6 +1,6 @@
-from pydantic import BaseModel
-from typing import Optional, List
-from datetime import date
+from pydantic import BaseModel, field_validator
+from typing import Any, Optional, List
+from datetime import date, datetime
 
 class UserBase(BaseModel):
     username: str # Mobile or Email
@@ -15,6 +15,12 @@ class UserBase(BaseModel):
 class UserCreate(UserBase):
     password: str
 
+class FarmerImportRow(UserCreate):
+    # Optional land columns; when area_size is given the farmer is created with one parcel
+    land_name: Optional[str] = None
+    area_size: Optional[float] = None
+    land_location: Optional[str] = None
+
 class UserLogin(BaseModel):
     username: str
     password: str
@@ -26,6 +32,10 @@ class User(UserBase):
     class Config:
         from_attributes = True
 
+class FarmerPage(BaseModel):
+    items: List[User]
+    next_cursor: Optional[str] = None
+
 class Token(BaseModel):
     access_token: str
     token_type: str
@@ -104,3 +114,45 @@ class Notification(NotificationBase):
 
     class Config:
         from_attributes = True
+
+class DiscussionSummary(BaseModel):
+    id: int
+    heading: str
+    created_at: datetime
+    crop_type: Optional[str] = None
+    severity: Optional[str] = None
+    diseases: Optional[list] = None
+    preview: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+
+    # Older diagnoses hold a single disease, a dict or a number where later ones have a list or a string
+    @field_validator("diseases", mode="before")
+    @classmethod
+    def diseases_as_list(cls, value: Any):
+        if value is None or isinstance(value, list):
+            return value
+        if isinstance(value, dict):
+            return [value.get("name") or value.get("disease") or str(value)] if value else []
+        return [str(value)] if str(value).strip() else []
+
+    @field_validator("severity", mode="before")
+    @classmethod
+    def severity_as_text(cls, value: Any):
+        return value if value is None or isinstance(value, str) else str(value)
+
+class DiscussionPage(BaseModel):
+    items: List[DiscussionSummary]
+    next_cursor: Optional[str] = None
+
+class Discussion(BaseModel):
+    id: int
+    heading: str
+    question: str
+    answer: Optional[dict] = None
+    crop_type: Optional[str] = None
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
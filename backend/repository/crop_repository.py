@@ -1,23 +1,30 @@
-from utils.db_manager import db_manager
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from models.database import CropDB
+from repository.threaded_repository import ThreadedRepository
+from config import settings
 
 class CropRepository:
-    def create_crop(self, crop_data: dict):
-        db = db_manager.get_db()
-        try:
-            new_crop = CropDB(**crop_data)
-            db.add(new_crop)
-            db.commit()
-            db.refresh(new_crop)
-            return new_crop
-        finally:
-            db.close()
+    def create_crop(self, db: Session, crop_data: dict):
+        new_crop = CropDB(**crop_data)
+        db.add(new_crop)
+        db.flush()
+        return new_crop
 
-    def get_crops_by_farmer(self, farmer_id: int):
-        db = db_manager.get_db()
-        try:
-            return db.query(CropDB).filter(CropDB.farmer_id == farmer_id).all()
-        finally:
-            db.close()
+    def get_crops_by_farmer(self, db: Session, farmer_id: int):
+        return db.query(CropDB).filter(CropDB.farmer_id == farmer_id).all()
+
+class AsyncCropRepository:
+    async def create_crop(self, db: AsyncSession, crop_data: dict):
+        new_crop = CropDB(**crop_data)
+        db.add(new_crop)
+        await db.flush()
+        return new_crop
+
+    async def get_crops_by_farmer(self, db: AsyncSession, farmer_id: int):
+        result = await db.execute(select(CropDB).where(CropDB.farmer_id == farmer_id))
+        return result.scalars().all()
 
 crop_repository = CropRepository()
+async_crop_repository = AsyncCropRepository() if settings.DB_ASYNC else ThreadedRepository(crop_repository)
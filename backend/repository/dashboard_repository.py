@@ -0,0 +1,28 @@
+from sqlalchemy import select, func
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from models.database import LandDB, CropDB
+from repository.notification_repository import unread_count_query
+from repository.threaded_repository import ThreadedRepository
+from config import settings
+
+def summary_query(farmer_id: int):
+    # Single round trip: every figure is a scalar aggregate, so cost does not grow with row counts sent back
+    return select(
+        select(func.count(LandDB.id)).where(LandDB.farmer_id == farmer_id).scalar_subquery().label("total_lands"),
+        select(func.coalesce(func.sum(LandDB.area_size), 0)).where(LandDB.farmer_id == farmer_id).scalar_subquery().label("total_area"),
+        select(func.count(CropDB.id)).where(CropDB.farmer_id == farmer_id).scalar_subquery().label("active_crops"),
+        unread_count_query(farmer_id).scalar_subquery().label("unread_notifications"),
+    )
+
+class DashboardRepository:
+    def get_summary_counts(self, db: Session, farmer_id: int):
+        return dict(db.execute(summary_query(farmer_id)).mappings().one())
+
+class AsyncDashboardRepository:
+    async def get_summary_counts(self, db: AsyncSession, farmer_id: int):
+        result = await db.execute(summary_query(farmer_id))
+        return dict(result.mappings().one())
+
+dashboard_repository = DashboardRepository()
+async_dashboard_repository = AsyncDashboardRepository() if settings.DB_ASYNC else ThreadedRepository(dashboard_repository)
@@ -1,23 +1,132 @@
-from utils.db_manager import db_manager
+from sqlalchemy import select, insert, func, tuple_
+from typing import List, Optional
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from models.database import DiscussionDB
+from repository.threaded_repository import ThreadedRepository
+from config import settings
+
+def hashed_discussions_query(farmer_id: int, crop_type: str, limit: int):
+    # Only the columns the near-duplicate index needs; answers are fetched once a match is found
+    return (
+        select(DiscussionDB.id, DiscussionDB.question, DiscussionDB.image_hashes, DiscussionDB.created_at)
+        .where(
+            DiscussionDB.farmer_id == farmer_id,
+            DiscussionDB.crop_type == crop_type,
+            DiscussionDB.image_hashes.is_not(None)
+        )
+        .order_by(DiscussionDB.id.desc())
+        .limit(limit)
+    )
+
+def question_rows_query(limit: int, skip_question: str):
+    # Text-only discussions, newest `limit`; answers given with photos depend on what the photos showed
+    return (
+        select(DiscussionDB.id, DiscussionDB.question, DiscussionDB.crop_type)
+        .where(DiscussionDB.image_hashes.is_(None), DiscussionDB.question != skip_question)
+        .order_by(DiscussionDB.id.desc())
+        .limit(limit)
+    )
+
+# Characters of the question sent with each list item
+PREVIEW_LENGTH = 120
+
+def discussion_filters(filters: dict) -> list:
+    # Severity and diseases are read out of the stored diagnosis by the database (->> on JSONB)
+    clauses = []
+    if filters.get("crop_type"):
+        clauses.append(DiscussionDB.crop_type == filters["crop_type"])
+    if filters.get("severity"):
+        clauses.append(func.lower(DiscussionDB.answer["severity"].as_string()) == filters["severity"].lower())
+    if filters.get("disease"):
+        clauses.append(DiscussionDB.answer["diseases"].as_string().ilike(f"%{filters['disease']}%"))
+    return clauses
+
+def discussion_page_query(farmer_id: int, limit: int, cursor: Optional[tuple] = None, filters: dict = None):
+    # List items only: the answer itself never leaves the database, just the fields the list shows
+    query = select(
+        DiscussionDB.id,
+        DiscussionDB.heading,
+        DiscussionDB.created_at,
+        DiscussionDB.crop_type,
+        DiscussionDB.answer["severity"].as_string().label("severity"),
+        DiscussionDB.answer["diseases"].label("diseases"),
+        func.substr(DiscussionDB.question, 1, PREVIEW_LENGTH).label("preview"),
+    ).where(DiscussionDB.farmer_id == farmer_id, *discussion_filters(filters or {}))
+    if cursor:
+        query = query.where(tuple_(DiscussionDB.created_at, DiscussionDB.id) < tuple_(*cursor))
+    return query.order_by(DiscussionDB.created_at.desc(), DiscussionDB.id.desc()).limit(limit)
 
 class DiscussionRepository:
-    def create_discussion(self, discussion_data: dict):
-        db = db_manager.get_db()
-        try:
-            new_discussion = DiscussionDB(**discussion_data)
-            db.add(new_discussion)
-            db.commit()
-            db.refresh(new_discussion)
-            return new_discussion
-        finally:
-            db.close()
-
-    def get_discussions_by_farmer(self, farmer_id: int):
-        db = db_manager.get_db()
-        try:
-            return db.query(DiscussionDB).filter(DiscussionDB.farmer_id == farmer_id).order_by(DiscussionDB.created_at.desc()).all()
-        finally:
-            db.close()
+    def create_discussion(self, db: Session, discussion_data: dict):
+        new_discussion = DiscussionDB(**discussion_data)
+        db.add(new_discussion)
+        db.flush()
+        return new_discussion
+
+    def create_discussions_bulk(self, db: Session, discussions: List[dict]) -> List[int]:
+        # One multi-row INSERT ... RETURNING id instead of an add/flush round trip per row
+        if not discussions:
+            return []
+        return list(db.scalars(insert(DiscussionDB).returning(DiscussionDB.id, sort_by_parameter_order=True), discussions).all())
+
+    def get_discussions_by_farmer(self, db: Session, farmer_id: int):
+        return db.query(DiscussionDB).filter(DiscussionDB.farmer_id == farmer_id).order_by(DiscussionDB.created_at.desc()).all()
+
+    def get_discussion_by_id(self, db: Session, discussion_id: int) -> Optional[DiscussionDB]:
+        return db.get(DiscussionDB, discussion_id)
+
+    def get_discussions_by_ids(self, db: Session, discussion_ids: List[int]) -> List[DiscussionDB]:
+        found = {row.id: row for row in db.execute(select(DiscussionDB).where(DiscussionDB.id.in_(discussion_ids))).scalars()}
+        return [found[discussion_id] for discussion_id in discussion_ids if discussion_id in found]
+
+    def get_question_rows(self, db: Session, limit: int, skip_question: str):
+        return db.execute(question_rows_query(limit, skip_question)).all()
+
+    def get_discussion_page(self, db: Session, farmer_id: int, limit: int, cursor: Optional[tuple] = None, filters: dict = None):
+        return db.execute(discussion_page_query(farmer_id, limit, cursor, filters)).all()
+
+    def get_hashed_discussions(self, db: Session, farmer_id: int, crop_type: str, limit: int):
+        return db.execute(hashed_discussions_query(farmer_id, crop_type, limit)).all()
+
+class AsyncDiscussionRepository:
+    async def create_discussion(self, db: AsyncSession, discussion_data: dict):
+        new_discussion = DiscussionDB(**discussion_data)
+        db.add(new_discussion)
+        await db.flush()
+        return new_discussion
+
+    async def create_discussions_bulk(self, db: AsyncSession, discussions: List[dict]) -> List[int]:
+        if not discussions:
+            return []
+        result = await db.scalars(insert(DiscussionDB).returning(DiscussionDB.id, sort_by_parameter_order=True), discussions)
+        return list(result.all())
+
+    async def get_discussions_by_farmer(self, db: AsyncSession, farmer_id: int):
+        result = await db.execute(
+            select(DiscussionDB).where(DiscussionDB.farmer_id == farmer_id).order_by(DiscussionDB.created_at.desc())
+        )
+        return result.scalars().all()
+
+    async def get_discussion_by_id(self, db: AsyncSession, discussion_id: int) -> Optional[DiscussionDB]:
+        return await db.get(DiscussionDB, discussion_id)
+
+    async def get_discussions_by_ids(self, db: AsyncSession, discussion_ids: List[int]) -> List[DiscussionDB]:
+        result = await db.execute(select(DiscussionDB).where(DiscussionDB.id.in_(discussion_ids)))
+        found = {row.id: row for row in result.scalars()}
+        return [found[discussion_id] for discussion_id in discussion_ids if discussion_id in found]
+
+    async def get_question_rows(self, db: AsyncSession, limit: int, skip_question: str):
+        result = await db.execute(question_rows_query(limit, skip_question))
+        return result.all()
+
+    async def get_discussion_page(self, db: AsyncSession, farmer_id: int, limit: int, cursor: Optional[tuple] = None, filters: dict = None):
+        result = await db.execute(discussion_page_query(farmer_id, limit, cursor, filters))
+        return result.all()
+
+    async def get_hashed_discussions(self, db: AsyncSession, farmer_id: int, crop_type: str, limit: int):
+        result = await db.execute(hashed_discussions_query(farmer_id, crop_type, limit))
+        return result.all()
 
 discussion_repository = DiscussionRepository()
+async_discussion_repository = AsyncDiscussionRepository() if settings.DB_ASYNC else ThreadedRepository(discussion_repository)
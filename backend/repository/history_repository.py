@@ -1,23 +1,46 @@
-from utils.db_manager import db_manager
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from models.database import HistoryDB
+from repository.threaded_repository import ThreadedRepository
+from config import settings
+
+def recent_history_query(farmer_id: int, limit: int):
+    # The farmer's latest seasons first
+    return (
+        select(HistoryDB)
+        .where(HistoryDB.farmer_id == farmer_id)
+        .order_by(HistoryDB.year.desc(), HistoryDB.id.desc())
+        .limit(limit)
+    )
 
 class HistoryRepository:
-    def create_history(self, history_data: dict):
-        db = db_manager.get_db()
-        try:
-            new_history = HistoryDB(**history_data)
-            db.add(new_history)
-            db.commit()
-            db.refresh(new_history)
-            return new_history
-        finally:
-            db.close()
-
-    def get_history_by_farmer(self, farmer_id: int):
-        db = db_manager.get_db()
-        try:
-            return db.query(HistoryDB).filter(HistoryDB.farmer_id == farmer_id).all()
-        finally:
-            db.close()
+    def create_history(self, db: Session, history_data: dict):
+        new_history = HistoryDB(**history_data)
+        db.add(new_history)
+        db.flush()
+        return new_history
+
+    def get_history_by_farmer(self, db: Session, farmer_id: int):
+        return db.query(HistoryDB).filter(HistoryDB.farmer_id == farmer_id).all()
+
+    def get_recent_history(self, db: Session, farmer_id: int, limit: int):
+        return db.execute(recent_history_query(farmer_id, limit)).scalars().all()
+
+class AsyncHistoryRepository:
+    async def create_history(self, db: AsyncSession, history_data: dict):
+        new_history = HistoryDB(**history_data)
+        db.add(new_history)
+        await db.flush()
+        return new_history
+
+    async def get_history_by_farmer(self, db: AsyncSession, farmer_id: int):
+        result = await db.execute(select(HistoryDB).where(HistoryDB.farmer_id == farmer_id))
+        return result.scalars().all()
+
+    async def get_recent_history(self, db: AsyncSession, farmer_id: int, limit: int):
+        result = await db.execute(recent_history_query(farmer_id, limit))
+        return result.scalars().all()
 
 history_repository = HistoryRepository()
+async_history_repository = AsyncHistoryRepository() if settings.DB_ASYNC else ThreadedRepository(history_repository)
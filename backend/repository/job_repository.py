@@ -0,0 +1,85 @@
+from datetime import datetime
+from sqlalchemy import select, update, or_
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from models.database import JobDB
+from repository.threaded_repository import ThreadedRepository
+from config import settings
+
+UNFINISHED_STATUSES = ("pending", "running")
+
+def claim_statement(job_id: int, owner: str, now: datetime, lease_until: datetime):
+    # Atomic: of several runners racing for the job, the one whose UPDATE matches a row wins
+    return (
+        update(JobDB)
+        .where(
+            JobDB.id == job_id,
+            or_(
+                JobDB.status == "pending",
+                (JobDB.status == "running") & (JobDB.lease_expires_at.is_(None) | (JobDB.lease_expires_at < now)),
+            ),
+        )
+        .values(status="running", owner=owner, lease_expires_at=lease_until)
+        .execution_options(synchronize_session=False)
+    )
+
+def owned_update_statement(job_id: int, owner: str, job_data: dict):
+    return (
+        update(JobDB)
+        .where(JobDB.id == job_id, JobDB.owner == owner, JobDB.status == "running")
+        .values(**job_data)
+        .execution_options(synchronize_session=False)
+    )
+
+class JobRepository:
+    def create_job(self, db: Session, job_data: dict):
+        new_job = JobDB(**job_data)
+        db.add(new_job)
+        db.flush()
+        return new_job
+
+    def get_job(self, db: Session, job_id: int):
+        return db.get(JobDB, job_id)
+
+    def update_job(self, db: Session, job_id: int, job_data: dict):
+        db.execute(update(JobDB).where(JobDB.id == job_id).values(**job_data))
+
+    def claim_job(self, db: Session, job_id: int, owner: str, now: datetime, lease_until: datetime) -> bool:
+        return db.execute(claim_statement(job_id, owner, now, lease_until)).rowcount == 1
+
+    def update_owned_job(self, db: Session, job_id: int, owner: str, job_data: dict) -> bool:
+        """Applies `job_data` only while `owner` still holds the job; False once it has been taken over."""
+        return db.execute(owned_update_statement(job_id, owner, job_data)).rowcount == 1
+
+    def get_unfinished_job_ids(self, db: Session):
+        return db.execute(
+            select(JobDB.id).where(JobDB.status.in_(UNFINISHED_STATUSES)).order_by(JobDB.id)
+        ).scalars().all()
+
+class AsyncJobRepository:
+    async def create_job(self, db: AsyncSession, job_data: dict):
+        new_job = JobDB(**job_data)
+        db.add(new_job)
+        await db.flush()
+        return new_job
+
+    async def get_job(self, db: AsyncSession, job_id: int):
+        return await db.get(JobDB, job_id)
+
+    async def update_job(self, db: AsyncSession, job_id: int, job_data: dict):
+        await db.execute(update(JobDB).where(JobDB.id == job_id).values(**job_data))
+
+    async def claim_job(self, db: AsyncSession, job_id: int, owner: str, now: datetime, lease_until: datetime) -> bool:
+        return (await db.execute(claim_statement(job_id, owner, now, lease_until))).rowcount == 1
+
+    async def update_owned_job(self, db: AsyncSession, job_id: int, owner: str, job_data: dict) -> bool:
+        return (await db.execute(owned_update_statement(job_id, owner, job_data))).rowcount == 1
+
+    async def get_unfinished_job_ids(self, db: AsyncSession):
+        result = await db.execute(
+            select(JobDB.id).where(JobDB.status.in_(UNFINISHED_STATUSES)).order_by(JobDB.id)
+        )
+        return result.scalars().all()
+
+job_repository = JobRepository()
+async_job_repository = AsyncJobRepository() if settings.DB_ASYNC else ThreadedRepository(job_repository)
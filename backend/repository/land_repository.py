@@ -1,23 +1,38 @@
-from utils.db_manager import db_manager
+from sqlalchemy import select, insert
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from models.database import LandDB
+from repository.threaded_repository import ThreadedRepository
+from config import settings
 
 class LandRepository:
-    def create_land(self, land_data: dict):
-        db = db_manager.get_db()
-        try:
-            new_land = LandDB(**land_data)
-            db.add(new_land)
-            db.commit()
-            db.refresh(new_land)
-            return new_land
-        finally:
-            db.close()
+    def create_land(self, db: Session, land_data: dict):
+        new_land = LandDB(**land_data)
+        db.add(new_land)
+        db.flush()
+        return new_land
 
-    def get_lands_by_farmer(self, farmer_id: int):
-        db = db_manager.get_db()
-        try:
-            return db.query(LandDB).filter(LandDB.farmer_id == farmer_id).all()
-        finally:
-            db.close()
+    def create_lands_bulk(self, db: Session, lands: list):
+        if lands:
+            db.execute(insert(LandDB), lands)
+
+    def get_lands_by_farmer(self, db: Session, farmer_id: int):
+        return db.query(LandDB).filter(LandDB.farmer_id == farmer_id).all()
+
+class AsyncLandRepository:
+    async def create_land(self, db: AsyncSession, land_data: dict):
+        new_land = LandDB(**land_data)
+        db.add(new_land)
+        await db.flush()
+        return new_land
+
+    async def create_lands_bulk(self, db: AsyncSession, lands: list):
+        if lands:
+            await db.execute(insert(LandDB), lands)
+
+    async def get_lands_by_farmer(self, db: AsyncSession, farmer_id: int):
+        result = await db.execute(select(LandDB).where(LandDB.farmer_id == farmer_id))
+        return result.scalars().all()
 
 land_repository = LandRepository()
+async_land_repository = AsyncLandRepository() if settings.DB_ASYNC else ThreadedRepository(land_repository)
@@ -1,39 +1,116 @@
-from utils.db_manager import db_manager
+from sqlalchemy import select, func, insert, tuple_, union_all
+from sqlalchemy.orm import Session, aliased
+from sqlalchemy.ext.asyncio import AsyncSession
 from models.database import NotificationDB
+from repository.threaded_repository import ThreadedRepository
+from config import settings
 from typing import List, Optional
 
+# Rows per executemany batch, bounding memory held by the driver for very large fan-outs
+NOTIFICATION_BATCH_SIZE = 1000
+
+def feed_query(user_id: int, limit: int, cursor: Optional[tuple] = None):
+    # Personal and global rows are paged separately so each branch is an ordered range scan on
+    # (farmer_id, created_at); the merged result is then cut back down to one page.
+    branches = []
+    for owner_filter in (NotificationDB.farmer_id == user_id, NotificationDB.farmer_id == None):
+        branch = select(NotificationDB).where(owner_filter)
+        if cursor:
+            branch = branch.where(tuple_(NotificationDB.created_at, NotificationDB.id) < tuple_(*cursor))
+        branch = branch.order_by(NotificationDB.created_at.desc(), NotificationDB.id.desc()).limit(limit)
+        branches.append(select(branch.subquery()))
+    feed = aliased(NotificationDB, union_all(*branches).subquery())
+    return select(feed).order_by(feed.created_at.desc(), feed.id.desc()).limit(limit)
+
+def unread_count_query(user_id: int):
+    return select(func.count(NotificationDB.id)).where(
+        (NotificationDB.farmer_id == user_id) | (NotificationDB.farmer_id == None),
+        NotificationDB.is_read == False
+    )
+
 class NotificationRepository:
-    def create_notification(self, notification_data: dict):
-        db = db_manager.get_db()
-        try:
-            new_notif = NotificationDB(**notification_data)
-            db.add(new_notif)
-            db.commit()
-            db.refresh(new_notif)
-            return new_notif
-        finally:
-            db.close()
-
-    def get_notifications_for_user(self, user_id: int):
-        db = db_manager.get_db()
-        try:
-            return db.query(NotificationDB).filter(
-                (NotificationDB.farmer_id == user_id) | 
+    def create_notification(self, db: Session, notification_data: dict):
+        new_notif = NotificationDB(**notification_data)
+        db.add(new_notif)
+        db.flush()
+        return new_notif
+
+    def create_notifications_bulk(self, db: Session, notifications: List[dict], batch_size: int = NOTIFICATION_BATCH_SIZE):
+        # No ORM objects and no refresh: one executemany per batch inside the caller's transaction,
+        # which SQLAlchemy renders as multi-row INSERT ... VALUES statements
+        for start in range(0, len(notifications), batch_size):
+            db.execute(insert(NotificationDB), notifications[start:start + batch_size])
+        return len(notifications)
+
+    def get_notifications_for_user(self, db: Session, user_id: int):
+        return db.query(NotificationDB).filter(
+            (NotificationDB.farmer_id == user_id) | 
+            (NotificationDB.farmer_id == None)
+        ).order_by(NotificationDB.created_at.desc()).all()
+
+    def get_recent_notifications(self, db: Session, user_id: int, limit: int = 3):
+        return db.query(NotificationDB).filter(
+            (NotificationDB.farmer_id == user_id) |
+            (NotificationDB.farmer_id == None)
+        ).order_by(NotificationDB.created_at.desc()).limit(limit).all()
+
+    def get_notification_page(self, db: Session, user_id: int, limit: int, cursor: Optional[tuple] = None):
+        return db.execute(feed_query(user_id, limit, cursor)).scalars().all()
+
+    def count_unread(self, db: Session, user_id: int):
+        return db.execute(unread_count_query(user_id)).scalar_one()
+
+    def mark_as_read(self, db: Session, notification_id: int):
+        notif = db.query(NotificationDB).filter(NotificationDB.id == notification_id).first()
+        if notif:
+            notif.is_read = True
+            db.flush()
+        return notif
+
+class AsyncNotificationRepository:
+    async def create_notification(self, db: AsyncSession, notification_data: dict):
+        new_notif = NotificationDB(**notification_data)
+        db.add(new_notif)
+        await db.flush()
+        return new_notif
+
+    async def create_notifications_bulk(self, db: AsyncSession, notifications: List[dict], batch_size: int = NOTIFICATION_BATCH_SIZE):
+        for start in range(0, len(notifications), batch_size):
+            await db.execute(insert(NotificationDB), notifications[start:start + batch_size])
+        return len(notifications)
+
+    async def get_notifications_for_user(self, db: AsyncSession, user_id: int):
+        result = await db.execute(
+            select(NotificationDB).where(
+                (NotificationDB.farmer_id == user_id) |
+                (NotificationDB.farmer_id == None)
+            ).order_by(NotificationDB.created_at.desc())
+        )
+        return result.scalars().all()
+
+    async def get_recent_notifications(self, db: AsyncSession, user_id: int, limit: int = 3):
+        result = await db.execute(
+            select(NotificationDB).where(
+                (NotificationDB.farmer_id == user_id) |
                 (NotificationDB.farmer_id == None)
-            ).order_by(NotificationDB.created_at.desc()).all()
-        finally:
-            db.close()
-
-    def mark_as_read(self, notification_id: int):
-        db = db_manager.get_db()
-        try:
-            notif = db.query(NotificationDB).filter(NotificationDB.id == notification_id).first()
-            if notif:
-                notif.is_read = True
-                db.commit()
-                return True
-            return False
-        finally:
-            db.close()
+            ).order_by(NotificationDB.created_at.desc()).limit(limit)
+        )
+        return result.scalars().all()
+
+    async def get_notification_page(self, db: AsyncSession, user_id: int, limit: int, cursor: Optional[tuple] = None):
+        result = await db.execute(feed_query(user_id, limit, cursor))
+        return result.scalars().all()
+
+    async def count_unread(self, db: AsyncSession, user_id: int):
+        result = await db.execute(unread_count_query(user_id))
+        return result.scalar_one()
+
+    async def mark_as_read(self, db: AsyncSession, notification_id: int):
+        notif = await db.get(NotificationDB, notification_id)
+        if notif:
+            notif.is_read = True
+            await db.flush()
+        return notif
 
 notification_repository = NotificationRepository()
+async_notification_repository = AsyncNotificationRepository() if settings.DB_ASYNC else ThreadedRepository(notification_repository)
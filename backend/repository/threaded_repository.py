@@ -0,0 +1,34 @@
+from fastapi.concurrency import run_in_threadpool
+
+class ThreadedRepository:
+    """
+    Awaitable facade over a sync repository, used when DB_ASYNC is off.
+    Every call runs on the threadpool so a blocking query never stalls the event loop.
+    """
+    def __init__(self, repository):
+        self._repository = repository
+
+    def __getattr__(self, name):
+        method = getattr(self._repository, name)
+        if not callable(method):
+            return method
+
+        async def call(*args, **kwargs):
+            return await run_in_threadpool(method, *args, **kwargs)
+        return call
+
+
+async def iterate_batches(batches):
+    """
+    Async iteration over the batches of a streaming repository call: async repositories hand back
+    an async iterator, threaded ones a plain generator whose every step runs on the threadpool.
+    """
+    if hasattr(batches, "__aiter__"):
+        async for batch in batches:
+            yield batch
+        return
+    while True:
+        batch = await run_in_threadpool(next, batches, None)
+        if batch is None:
+            return
+        yield batch
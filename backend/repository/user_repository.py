@@ -1,116 +1,316 @@
-from utils.db_manager import db_manager
-from models.database import UserDB
+from sqlalchemy import select, insert, func, and_, or_, case, literal
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from models.database import UserDB, LandDB, CropDB
+from repository.threaded_repository import ThreadedRepository
+from config import settings
+
+def farmer_search_filters(filters: dict):
+    clauses = [UserDB.role == "Farmer"]
+    if filters.get("full_name"):
+        clauses.append(UserDB.full_name.ilike(f"%{filters['full_name']}%"))
+    if filters.get("mobile"):
+        clauses.append(UserDB.mobile.ilike(f"%{filters['mobile']}%"))
+    if filters.get("email"):
+        clauses.append(UserDB.username.ilike(f"%{filters['email']}%"))
+    if filters.get("city"):
+        clauses.append(UserDB.city.ilike(f"%{filters['city']}%"))
+    if filters.get("state"):
+        clauses.append(UserDB.state.ilike(f"%{filters['state']}%"))
+    return clauses
+
+# Admin search filter -> column; each one is served by a gin_trgm_ops index on PostgreSQL
+SEARCH_COLUMNS = {
+    "full_name": UserDB.full_name,
+    "email": UserDB.username,
+    "city": UserDB.city,
+    "state": UserDB.state,
+}
+
+def is_mobile_prefix(text: str) -> bool:
+    return "".join(text.split()).lstrip("+").isdigit()
+
+def mobile_prefix_clause(prefix: str):
+    # A range instead of LIKE 'x%' so the plain btree index on mobile serves it on every backend;
+    # None when nothing is left of the prefix once whitespace is dropped
+    prefix = "".join(prefix.split())
+    if not prefix:
+        return None
+    upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+    return and_(UserDB.mobile >= prefix, UserDB.mobile < upper)
+
+def trigram_terms(column, text: str):
+    # Substring and word-similarity (`<%`) matches are both answered by the trigram index
+    text = " ".join(text.lower().split())
+    clause = or_(column.icontains(text, autoescape=True), literal(text).op("<%")(column))
+    return clause, func.word_similarity(text, column) + 0.1 * func.similarity(text, column)
+
+def farmer_search_query(filters: dict, limit: int, after=None):
+    """
+    Ranked admin search for PostgreSQL: every given field filter must match and adds its rank, `q`
+    matches any searchable column or a mobile prefix and adds its best rank. Rows come back as
+    (UserDB, rank) ordered by rank then id, newest first; `after` is the (rank, id) keyset of the last row seen.
+    """
+    clauses, ranks = [UserDB.role == "Farmer"], []
+    for name, column in SEARCH_COLUMNS.items():
+        if filters.get(name):
+            clause, rank = trigram_terms(column, filters[name])
+            clauses.append(clause)
+            ranks.append(rank)
+    mobile = mobile_prefix_clause(filters.get("mobile") or "")
+    if mobile is not None:
+        clauses.append(mobile)
+    if filters.get("q"):
+        terms = [trigram_terms(column, filters["q"]) for column in SEARCH_COLUMNS.values()]
+        matches = [clause for clause, _ in terms]
+        best = func.greatest(*[rank for _, rank in terms])
+        mobile = mobile_prefix_clause(filters["q"]) if is_mobile_prefix(filters["q"]) else None
+        if mobile is not None:
+            matches.append(mobile)
+            best = func.greatest(best, case((mobile, 1.0), else_=0.0))
+        clauses.append(or_(*matches))
+        ranks.append(best)
+
+    if not ranks:
+        # Unfiltered listings rank every farmer alike and walk the primary key
+        if after:
+            clauses.append(UserDB.id < after[1])
+        return select(UserDB, literal(0.0).label("rank")).where(*clauses).order_by(UserDB.id.desc()).limit(limit)
+
+    rank = sum(ranks[1:], ranks[0])
+    if after:
+        clauses.append(or_(rank < after[0], and_(rank == after[0], UserDB.id < after[1])))
+    return (
+        select(UserDB, rank.label("rank"))
+        .where(*clauses)
+        .order_by(rank.desc(), UserDB.id.desc())
+        .limit(limit)
+    )
+
+def farmer_search_rows_query():
+    return select(
+        UserDB.id, UserDB.full_name, UserDB.username, UserDB.mobile, UserDB.city, UserDB.state
+    ).where(UserDB.role == "Farmer").order_by(UserDB.id)
+
+# Never includes the password hash
+EXPORT_COLUMNS = [
+    UserDB.id, UserDB.username, UserDB.full_name, UserDB.mobile, UserDB.location,
+    UserDB.city, UserDB.state, UserDB.is_active, UserDB.created_at,
+]
+
+def farmer_export_query(filters: dict, with_land: bool = False, with_crops: bool = False):
+    # Holdings are aggregated once per table and joined, not looked up with a subquery per farmer
+    query = select(*EXPORT_COLUMNS).where(*farmer_search_filters(filters))
+    if with_land:
+        land = (
+            select(
+                LandDB.farmer_id,
+                func.count(LandDB.id).label("land_count"),
+                func.sum(LandDB.area_size).label("land_area"),
+            )
+            .group_by(LandDB.farmer_id)
+            .subquery()
+        )
+        query = query.add_columns(
+            func.coalesce(land.c.land_count, 0).label("land_count"),
+            func.coalesce(land.c.land_area, 0).label("land_area"),
+        ).outerjoin(land, land.c.farmer_id == UserDB.id)
+    if with_crops:
+        crops = (
+            select(CropDB.farmer_id, func.count(CropDB.id).label("crop_count"))
+            .group_by(CropDB.farmer_id)
+            .subquery()
+        )
+        query = query.add_columns(
+            func.coalesce(crops.c.crop_count, 0).label("crop_count")
+        ).outerjoin(crops, crops.c.farmer_id == UserDB.id)
+    return query.order_by(UserDB.id)
+
+def farmer_export_columns(with_land: bool = False, with_crops: bool = False) -> list:
+    return list(farmer_export_query({}, with_land, with_crops).selected_columns.keys())
+
+def farmer_ids_query(filters: dict, after_id: int = 0, limit: int = None):
+    # Ordered by id so large fan-outs can walk the matching farmers in resumable chunks
+    query = select(UserDB.id).where(*farmer_search_filters(filters), UserDB.id > after_id).order_by(UserDB.id)
+    return query.limit(limit) if limit else query
 
 class UserRepository:
-    def get_user_by_username(self, username: str):
-        db = db_manager.get_db()
-        try:
-            user = db.query(UserDB).filter(UserDB.username == username).first()
+    def get_user_by_username(self, db: Session, username: str):
+        return db.query(UserDB).filter(UserDB.username == username).first()
+
+    def create_user(self, db: Session, username, hashed_password, role="Farmer"):
+        new_user = UserDB(
+            username=username,
+            password=hashed_password,
+            role=role,
+            is_active=True
+        )
+        db.add(new_user)
+        db.flush()
+        return new_user.id
+
+    def get_existing_usernames(self, db: Session, usernames: list) -> set:
+        return set(db.execute(select(UserDB.username).where(UserDB.username.in_(usernames))).scalars())
+
+    def create_users_bulk(self, db: Session, users: list) -> list:
+        # One multi-row INSERT ... RETURNING id, ids in the order of `users`
+        if not users:
+            return []
+        return list(db.scalars(insert(UserDB).returning(UserDB.id, sort_by_parameter_order=True), users).all())
+
+    def get_all_farmers(self, db: Session):
+        return db.query(UserDB).filter(UserDB.role == "Farmer").all()
+
+    def get_user_by_id(self, db: Session, user_id: int):
+        return db.get(UserDB, user_id)
+
+    def update_profile(self, db: Session, user_id: int, profile_data: dict):
+        user = db.get(UserDB, user_id)
+        if user:
+            for key, value in profile_data.items():
+                if hasattr(user, key):
+                    setattr(user, key, value)
+            db.flush()
             return user
-        finally:
-            db.close()
-
-    def create_user(self, username, hashed_password, role="Farmer"):
-        db = db_manager.get_db()
-        try:
-            new_user = UserDB(
-                username=username,
-                password=hashed_password,
-                role=role,
-                is_active=True
-            )
-            db.add(new_user)
-            db.commit()
-            db.refresh(new_user)
-            return new_user.id
-        finally:
-            db.close()
-
-    def get_all_farmers(self):
-        db = db_manager.get_db()
-        try:
-            farmers = db.query(UserDB).filter(UserDB.role == "Farmer").all()
-            return farmers
-        finally:
-            db.close()
-
-    def get_user_by_id(self, user_id: int):
-        db = db_manager.get_db()
-        try:
-            user = db.query(UserDB).filter(UserDB.id == user_id).first()
+        return None
+
+    def get_users_by_ids(self, db: Session, user_ids: list):
+        users = {user.id: user for user in db.execute(select(UserDB).where(UserDB.id.in_(user_ids))).scalars()}
+        return [users[user_id] for user_id in user_ids if user_id in users]
+
+    def search_farmers(self, db: Session, filters: dict, limit: int, after=None):
+        return db.execute(farmer_search_query(filters, limit, after)).all()
+
+    def get_farmer_search_rows(self, db: Session):
+        return db.execute(farmer_search_rows_query()).all()
+
+    def stream_farmer_export(self, db: Session, filters: dict, with_land: bool, with_crops: bool, batch_size: int):
+        # yield_per reads through a server-side cursor, so only one batch of rows is in memory at a time
+        query = farmer_export_query(filters, with_land, with_crops).execution_options(yield_per=batch_size)
+        return db.execute(query).partitions()
+
+    def search_farmer_ids(self, db: Session, filters: dict, after_id: int = 0, limit: int = None):
+        return db.execute(farmer_ids_query(filters, after_id, limit)).scalars().all()
+
+    def count_farmers(self, db: Session, filters: dict):
+        return db.execute(select(func.count(UserDB.id)).where(*farmer_search_filters(filters))).scalar_one()
+
+    def update_user_status(self, db: Session, user_id: int, is_active: bool):
+        user = db.get(UserDB, user_id)
+        if user:
+            user.is_active = is_active
+            db.flush()
+            return True
+        return False
+
+    def delete_user(self, db: Session, user_id: int):
+        user = db.get(UserDB, user_id)
+        if user:
+            user.is_active = False
+            db.flush()
+            return True
+        return False
+
+    def update_password(self, db: Session, user_id: int, new_hashed_password: str):
+        user = db.get(UserDB, user_id)
+        if user:
+            user.password = new_hashed_password
+            db.flush()
+            return True
+        return False
+
+class AsyncUserRepository:
+    async def get_user_by_username(self, db: AsyncSession, username: str):
+        result = await db.execute(select(UserDB).where(UserDB.username == username))
+        return result.scalars().first()
+
+    async def create_user(self, db: AsyncSession, username, hashed_password, role="Farmer"):
+        new_user = UserDB(
+            username=username,
+            password=hashed_password,
+            role=role,
+            is_active=True
+        )
+        db.add(new_user)
+        await db.flush()
+        return new_user.id
+
+    async def get_existing_usernames(self, db: AsyncSession, usernames: list) -> set:
+        result = await db.execute(select(UserDB.username).where(UserDB.username.in_(usernames)))
+        return set(result.scalars())
+
+    async def create_users_bulk(self, db: AsyncSession, users: list) -> list:
+        if not users:
+            return []
+        result = await db.scalars(insert(UserDB).returning(UserDB.id, sort_by_parameter_order=True), users)
+        return list(result.all())
+
+    async def get_all_farmers(self, db: AsyncSession):
+        result = await db.execute(select(UserDB).where(UserDB.role == "Farmer"))
+        return result.scalars().all()
+
+    async def get_user_by_id(self, db: AsyncSession, user_id: int):
+        return await db.get(UserDB, user_id)
+
+    async def update_profile(self, db: AsyncSession, user_id: int, profile_data: dict):
+        user = await db.get(UserDB, user_id)
+        if user:
+            for key, value in profile_data.items():
+                if hasattr(user, key):
+                    setattr(user, key, value)
+            await db.flush()
             return user
-        finally:
-            db.close()
-
-    def update_profile(self, user_id: int, profile_data: dict):
-        db = db_manager.get_db()
-        try:
-            user = db.query(UserDB).filter(UserDB.id == user_id).first()
-            if user:
-                for key, value in profile_data.items():
-                    if hasattr(user, key):
-                        setattr(user, key, value)
-                db.commit()
-                db.refresh(user)
-                return user
-            return None
-        finally:
-            db.close()
-
-    def search_farmers(self, filters: dict):
-        db = db_manager.get_db()
-        try:
-            query = db.query(UserDB).filter(UserDB.role == "Farmer")
-            
-            if filters.get("full_name"):
-                query = query.filter(UserDB.full_name.ilike(f"%{filters['full_name']}%"))
-            if filters.get("mobile"):
-                query = query.filter(UserDB.mobile.ilike(f"%{filters['mobile']}%"))
-            if filters.get("email"):
-                query = query.filter(UserDB.username.ilike(f"%{filters['email']}%"))
-            if filters.get("city"):
-                query = query.filter(UserDB.city.ilike(f"%{filters['city']}%"))
-            if filters.get("state"):
-                query = query.filter(UserDB.state.ilike(f"%{filters['state']}%"))
-                
-            return query.order_by(UserDB.created_at.desc()).all()
-        finally:
-            db.close()
-
-    def update_user_status(self, user_id: int, is_active: bool):
-        db = db_manager.get_db()
-        try:
-            user = db.query(UserDB).filter(UserDB.id == user_id).first()
-            if user:
-                user.is_active = is_active
-                db.commit()
-                return True
-            return False
-        finally:
-            db.close()
-
-    def delete_user(self, user_id: int):
-        db = db_manager.get_db()
-        try:
-            user = db.query(UserDB).filter(UserDB.id == user_id).first()
-            if user:
-                user.is_active = False
-                db.commit()
-                return True
-            return False
-        finally:
-            db.close()
-
-    def update_password(self, user_id: int, new_hashed_password: str):
-        db = db_manager.get_db()
-        try:
-            user = db.query(UserDB).filter(UserDB.id == user_id).first()
-            if user:
-                user.password = new_hashed_password
-                db.commit()
-                return True
-            return False
-        finally:
-            db.close()
+        return None
+
+    async def get_users_by_ids(self, db: AsyncSession, user_ids: list):
+        result = await db.execute(select(UserDB).where(UserDB.id.in_(user_ids)))
+        users = {user.id: user for user in result.scalars()}
+        return [users[user_id] for user_id in user_ids if user_id in users]
+
+    async def search_farmers(self, db: AsyncSession, filters: dict, limit: int, after=None):
+        result = await db.execute(farmer_search_query(filters, limit, after))
+        return result.all()
+
+    async def get_farmer_search_rows(self, db: AsyncSession):
+        result = await db.execute(farmer_search_rows_query())
+        return result.all()
+
+    async def stream_farmer_export(self, db: AsyncSession, filters: dict, with_land: bool, with_crops: bool, batch_size: int):
+        query = farmer_export_query(filters, with_land, with_crops).execution_options(yield_per=batch_size)
+        result = await db.stream(query)
+        return result.partitions()
+
+    async def search_farmer_ids(self, db: AsyncSession, filters: dict, after_id: int = 0, limit: int = None):
+        result = await db.execute(farmer_ids_query(filters, after_id, limit))
+        return result.scalars().all()
+
+    async def count_farmers(self, db: AsyncSession, filters: dict):
+        result = await db.execute(select(func.count(UserDB.id)).where(*farmer_search_filters(filters)))
+        return result.scalar_one()
+
+    async def update_user_status(self, db: AsyncSession, user_id: int, is_active: bool):
+        user = await db.get(UserDB, user_id)
+        if user:
+            user.is_active = is_active
+            await db.flush()
+            return True
+        return False
+
+    async def delete_user(self, db: AsyncSession, user_id: int):
+        user = await db.get(UserDB, user_id)
+        if user:
+            user.is_active = False
+            await db.flush()
+            return True
+        return False
+
+    async def update_password(self, db: AsyncSession, user_id: int, new_hashed_password: str):
+        user = await db.get(UserDB, user_id)
+        if user:
+            user.password = new_hashed_password
+            await db.flush()
+            return True
+        return False
 
 user_repository = UserRepository()
+async_user_repository = AsyncUserRepository() if settings.DB_ASYNC else ThreadedRepository(user_repository)
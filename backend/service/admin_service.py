@@ -1,23 +1,70 @@
-from repository.user_repository import user_repository
-from repository.notification_repository import notification_repository
+from repository.user_repository import async_user_repository as user_repository, farmer_export_columns
+from repository.threaded_repository import iterate_batches
+from repository.notification_repository import async_notification_repository as notification_repository
+from repository.land_repository import async_land_repository as land_repository
 from service.gemini_service import gemini_service
+from service.diagnosis_cache import diagnosis_cache
 from service.weather_service import weather_service
-from utils.security_manager import security_manager
-from fastapi import HTTPException
+from service.image_service import image_service
+from service.image_index_service import image_index_service
+from service.diagnosis_service import diagnosis_service
+from service.farmer_service import farmer_service
+from service.farmer_search_service import farmer_search_service
+from service.question_index_service import question_index_service
+from service.chat_context_service import chat_context_service
+from service.discussion_writer import discussion_writer
+from service.user_cache import user_cache
+from utils.password_hasher import password_hasher
+from utils.db_manager import db_manager
+from utils.exporters import ENCODERS, encode_rows, gzip_chunks
+from utils.importers import import_format, parse_rows
+from utils.uploads import read_uploads, close_uploads
+from models.schemas import FarmerImportRow, User
+from service.job_service import job_runner, JobContext
+from config import settings
+from fastapi import HTTPException, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from pydantic import ValidationError
+from sqlalchemy.exc import SQLAlchemyError
 from typing import List, Optional
+from datetime import date
+import csv
+import time
 
 class AdminService:
-    def list_farmers(self, filters: dict):
-        return user_repository.search_farmers(filters)
+    async def list_farmers(self, db, filters: dict, limit: int, cursor: str = None):
+        return await farmer_search_service.search(db, filters, limit, cursor)
 
-    def create_farmer(self, farmer_data: dict):
+    def export_farmers(self, filters: dict, fmt: str, with_land: bool, with_crops: bool, compress: bool):
+        """
+        (chunks, media_type, filename) for a streamed farmer export. The chunks open their own session
+        when the response starts sending and hold one EXPORT_BATCH_SIZE batch of rows at a time.
+        """
+        encoder = ENCODERS[fmt](farmer_export_columns(with_land, with_crops))
+
+        async def rows():
+            async with db_manager.session() as db:
+                batches = await user_repository.stream_farmer_export(
+                    db, filters, with_land, with_crops, settings.EXPORT_BATCH_SIZE
+                )
+                async for batch in iterate_batches(batches):
+                    yield batch
+
+        chunks = encode_rows(encoder, rows())
+        filename = f"farmers-{date.today():%Y%m%d}.{encoder.extension}"
+        if compress:
+            return gzip_chunks(chunks), "application/gzip", f"{filename}.gz"
+        return chunks, encoder.media_type, filename
+
+    async def create_farmer(self, db, farmer_data: dict):
         # Check if user already exists
-        existing_user = user_repository.get_user_by_username(farmer_data["username"])
+        existing_user = await user_repository.get_user_by_username(db, farmer_data["username"])
         if existing_user:
             raise HTTPException(status_code=400, detail="Username already exists")
         
-        hashed_password = security_manager.get_password_hash(farmer_data["password"])
-        user_id = user_repository.create_user(
+        hashed_password = await password_hasher.hash(farmer_data["password"])
+        user_id = await user_repository.create_user(
+            db,
             username=farmer_data["username"],
             hashed_password=hashed_password,
             role="Farmer"
@@ -26,46 +73,239 @@ class AdminService:
         # Update other profile details
         profile_data = {k: v for k, v in farmer_data.items() if k not in ["username", "password"]}
         if profile_data:
-            user_repository.update_profile(user_id, profile_data)
+            await user_repository.update_profile(db, user_id, profile_data)
         
-        return user_repository.get_user_by_id(user_id)
+        # User row and profile details land in a single transaction
+        await db_manager.commit(db)
+        user = await user_repository.get_user_by_id(db, user_id)
+        farmer_search_service.upsert(user)
+        return user
+
+    async def import_farmers(self, db, upload: UploadFile, fmt: Optional[str] = None) -> dict:
+        """
+        Bulk onboarding from a CSV or NDJSON file, IMPORT_BATCH_SIZE rows per transaction. Bad rows are
+        reported and skipped; they never stop the rest of the file.
+        """
+        uploads = await read_uploads([upload])
+        try:
+            data = await run_in_threadpool(uploads[0].read) if uploads else b""
+        finally:
+            close_uploads(uploads)
+        try:
+            rows = await run_in_threadpool(lambda: list(parse_rows(data, fmt or import_format(upload.filename))))
+        except (UnicodeDecodeError, csv.Error) as e:
+            raise HTTPException(status_code=400, detail=f"Unreadable import file: {e}")
+
+        report = {"total": len(rows), "created": 0, "failed": 0, "errors": []}
+        seen = {}
+        for start in range(0, len(rows), settings.IMPORT_BATCH_SIZE):
+            await self._import_batch(db, rows[start:start + settings.IMPORT_BATCH_SIZE], seen, report)
+        report["failed"] = len(report["errors"])
+        report["errors"].sort(key=lambda error: error["row"])
+        return report
+
+    async def _import_batch(self, db, rows: list, seen: dict, report: dict):
+        def fail(number, username, errors):
+            report["errors"].append({"row": number, "username": username, "errors": errors})
+
+        # 1. Validate, and catch usernames repeated within the file
+        farmers = []
+        for number, record in rows:
+            if isinstance(record, str):
+                fail(number, None, [record])
+                continue
+            try:
+                farmer = FarmerImportRow.model_validate(record)
+            except ValidationError as e:
+                fail(number, record.get("username"), [
+                    f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}" for error in e.errors()
+                ])
+                continue
+            username = farmer.username.strip()
+            if not username:
+                fail(number, None, ["username: must not be empty"])
+            elif username in seen:
+                fail(number, username, [f"Duplicate of row {seen[username]} in this file"])
+            else:
+                seen[username] = number
+                farmers.append((number, username, farmer))
+
+        # 2. One query for the usernames already taken
+        if farmers:
+            existing = await user_repository.get_existing_usernames(db, [username for _, username, _ in farmers])
+            for number, username, _ in farmers:
+                if username in existing:
+                    fail(number, username, ["Username already exists"])
+            farmers = [entry for entry in farmers if entry[1] not in existing]
+        if not farmers:
+            return
+
+        # 3. Hash in parallel, then insert users and lands with one statement each
+        hashes = await password_hasher.hash_many([farmer.password for _, _, farmer in farmers])
+        users = [
+            {
+                "username": username,
+                "password": hashed,
+                "role": "Farmer",
+                "is_active": True,
+                "full_name": farmer.full_name,
+                "location": farmer.location,
+                "state": farmer.state,
+                "city": farmer.city,
+                "mobile": farmer.mobile,
+                "photo_url": farmer.photo_url,
+            }
+            for (_, username, farmer), hashed in zip(farmers, hashes)
+        ]
+        try:
+            user_ids = await user_repository.create_users_bulk(db, users)
+            await land_repository.create_lands_bulk(db, [
+                {
+                    "farmer_id": user_id,
+                    "land_name": farmer.land_name,
+                    "area_size": farmer.area_size,
+                    "location": farmer.land_location,
+                    "state": farmer.state,
+                    "city": farmer.city,
+                }
+                for user_id, (_, _, farmer) in zip(user_ids, farmers) if farmer.area_size is not None
+            ])
+            await db_manager.commit(db)
+        except SQLAlchemyError as e:
+            # e.g. a username registered by someone else since the duplicate check
+            await db_manager.rollback(db)
+            for number, username, _ in farmers:
+                fail(number, username, [f"Batch rejected by the database: {type(e).__name__}"])
+                # Nothing of the batch was created, so a later row may still claim the username
+                del seen[username]
+            return
 
-    def update_farmer(self, farmer_id: int, farmer_data: dict):
-        user = user_repository.update_profile(farmer_id, farmer_data)
+        report["created"] += len(user_ids)
+        for user_id, user in zip(user_ids, users):
+            farmer_search_service.upsert(User(id=user_id, **{k: v for k, v in user.items() if k != "password"}))
+
+    async def update_farmer(self, db, farmer_id: int, farmer_data: dict):
+        user = await user_repository.update_profile(db, farmer_id, farmer_data)
         if not user:
             raise HTTPException(status_code=404, detail="Farmer not found")
+        await db_manager.commit(db)
+        user_cache.invalidate(farmer_id)
+        farmer_service.invalidate_dashboard(farmer_id)
+        chat_context_service.invalidate(farmer_id)
+        farmer_search_service.upsert(user)
         return user
 
-    def delete_farmer(self, farmer_id: int):
-        success = user_repository.delete_user(farmer_id)
+    async def delete_farmer(self, db, farmer_id: int):
+        success = await user_repository.delete_user(db, farmer_id)
         if not success:
             raise HTTPException(status_code=404, detail="Farmer not found")
+        await db_manager.commit(db)
+        user_cache.invalidate(farmer_id)
         return {"message": "Farmer inactivated successfully"}
 
-    def toggle_farmer_status(self, farmer_id: int, is_active: bool):
-        success = user_repository.update_user_status(farmer_id, is_active)
+    async def toggle_farmer_status(self, db, farmer_id: int, is_active: bool):
+        success = await user_repository.update_user_status(db, farmer_id, is_active)
         if not success:
             raise HTTPException(status_code=404, detail="Farmer not found")
+        await db_manager.commit(db)
+        # The farmer's next request reloads the row and is refused if blocked
+        user_cache.invalidate(farmer_id)
         return {"message": f"Farmer {'activated' if is_active else 'blocked'} successfully"}
 
-    async def broadcast_alert(self, state: str, city: str, alert_type: str, language: str = "English"):
-        print(f"[LOG] Starting broadcast alert: Type={alert_type}, Location={city}, {state}, Language={language}")
-        
-        # 1. Find farmers in the location
-        filters = {"state": state, "city": city}
-        farmers = user_repository.search_farmers(filters)
-        
-        if not farmers:
-            print(f"[LOG] No farmers found in {city}, trying state {state}")
-            filters = {"state": state}
-            farmers = user_repository.search_farmers(filters)
-            
-        if not farmers:
-            print(f"[LOG] No farmers found in state {state}")
-            raise HTTPException(status_code=404, detail="No farmers found in the specified location")
+    async def broadcast_alert(self, db, state: str, city: str, alert_type: str, language: str = "English"):
+        print(f"[LOG] Queueing broadcast alert: Type={alert_type}, Location={city}, {state}, Language={language}")
+        job = await job_runner.submit(db, "broadcast", {
+            "state": state,
+            "city": city,
+            "alert_type": alert_type,
+            "language": language
+        })
+        return job_runner.describe(job)
+
+    async def get_job(self, db, job_id: int):
+        return await job_runner.get_job(db, job_id)
+
+    async def run_broadcast_job(self, job: JobContext):
+        state = job.params["state"]
+        city = job.params["city"]
+        alert_type = job.params["alert_type"]
+        language = job.params.get("language", "English")
+        print(f"[LOG] Starting broadcast job {job.id}: Type={alert_type}, Location={city}, {state}, Language={language}")
+
+        # Audience and alert text are fixed once and checkpointed, so a resumed job sends the same alert
+        checkpoint = job.checkpoint
+        if "content" not in checkpoint:
+            async with db_manager.session() as db:
+                # 1. Find farmers in the location
+                filters = {"state": state, "city": city}
+                total = await user_repository.count_farmers(db, filters)
+
+                if not total:
+                    print(f"[LOG] No farmers found in {city}, trying state {state}")
+                    filters = {"state": state}
+                    total = await user_repository.count_farmers(db, filters)
 
-        print(f"[LOG] Found {len(farmers)} farmers for broadcast")
+                if not total:
+                    print(f"[LOG] No farmers found in state {state}")
+                    raise HTTPException(status_code=404, detail="No farmers found in the specified location")
 
+            print(f"[LOG] Found {total} farmers for broadcast")
+            alert_json = await self.generate_alert_content(state, city, alert_type, language)
+
+            checkpoint = {"filters": filters, "content": alert_json, "last_farmer_id": 0, "elapsed": 0.0}
+            async with db_manager.session() as db:
+                await job.save_progress(db, total=total, checkpoint=checkpoint)
+                await db_manager.commit(db)
+
+        # 4. Save notifications chunk by chunk; each chunk commits together with its checkpoint
+        alert_json = checkpoint["content"]
+        created_count = job.processed
+        while True:
+            async with db_manager.session() as db:
+                farmer_ids = await user_repository.search_farmer_ids(
+                    db,
+                    checkpoint["filters"],
+                    after_id=checkpoint["last_farmer_id"],
+                    limit=settings.BROADCAST_CHUNK_SIZE
+                )
+                if not farmer_ids:
+                    break
+
+                notifications = [
+                    {
+                        "farmer_id": farmer_id,
+                        "title": alert_json["title"],
+                        "message": alert_json["message"],
+                        "type": alert_type,
+                        "state": state,
+                        "city": city,
+                        "is_read": False
+                    }
+                    for farmer_id in farmer_ids
+                ]
+                started = time.perf_counter()
+                created_count += await notification_repository.create_notifications_bulk(db, notifications)
+                checkpoint["last_farmer_id"] = farmer_ids[-1]
+                checkpoint["elapsed"] += time.perf_counter() - started
+                await job.save_progress(db, processed=created_count, checkpoint=checkpoint)
+                await db_manager.commit(db)
+
+            for farmer_id in farmer_ids:
+                farmer_service.invalidate_dashboard(farmer_id)
+
+        elapsed = checkpoint["elapsed"]
+        print(f"[LOG] Successfully saved {created_count} notifications in {language} in {elapsed:.3f}s")
+        return {
+            "message": f"Successfully broadcasted {alert_type} alert to {created_count} farmers in {language}",
+            "content": alert_json,
+            "stats": {
+                "rows_written": created_count,
+                "elapsed_ms": round(elapsed * 1000, 2),
+                "rows_per_second": round(created_count / elapsed) if elapsed > 0 else created_count
+            }
+        }
+
+    async def generate_alert_content(self, state: str, city: str, alert_type: str, language: str):
         # 2. Get context for Gemini (weather for the city)
         weather_data = await weather_service.get_weather(city)
         print(f"[LOG] Weather context for {city}: {weather_data}")
@@ -94,7 +334,7 @@ class AdminService:
         
         print(f"[LOG] Sending prompt to Gemini in {language}...")
         try:
-            response = await gemini_service.model.generate_content_async(prompt)
+            response = await gemini_service.generate(prompt)
             text = response.text
             print(f"[LOG] Raw AI Response: {text}")
 
@@ -126,28 +366,30 @@ class AdminService:
             alert_json = fallbacks.get(language, fallbacks["English"])
             print(f"[LOG] Using fallback alert for {language}")
 
-        # 4. Save notifications
-        created_count = 0
-        for farmer in farmers:
-            notification_data = {
-                "farmer_id": farmer.id,
-                "title": alert_json["title"],
-                "message": alert_json["message"],
-                "type": alert_type,
-                "state": state,
-                "city": city,
-                "is_read": False
-            }
-            notification_repository.create_notification(notification_data)
-            created_count += 1
-            
-        print(f"[LOG] Successfully saved {created_count} notifications in {language}")
-        return {"message": f"Successfully broadcasted {alert_type} alert to {created_count} farmers in {language}", "content": alert_json}
+        return alert_json
 
-    def get_farmer_details(self, farmer_id: int):
-        user = user_repository.get_user_by_id(farmer_id)
+    async def get_farmer_details(self, db, farmer_id: int):
+        user = await user_repository.get_user_by_id(db, farmer_id)
         if not user:
             raise HTTPException(status_code=404, detail="Farmer not found")
         return user
 
+    def get_metrics(self):
+        return {
+            "weather": weather_service.stats(),
+            "dashboard_cache": farmer_service.dashboard_cache.stats(),
+            "diagnosis_cache": diagnosis_cache.stats(),
+            "gemini": gemini_service.stats(),
+            "images": image_service.stats(),
+            "image_index": image_index_service.stats(),
+            "diagnosis": diagnosis_service.stats(),
+            "user_cache": user_cache.stats(),
+            "password_hasher": password_hasher.stats(),
+            "farmer_search": farmer_search_service.stats(),
+            "question_index": question_index_service.stats(),
+            "chat_context": chat_context_service.stats(),
+            "discussion_writer": discussion_writer.stats()
+        }
+
 admin_service = AdminService()
+job_runner.register("broadcast", admin_service.run_broadcast_job)
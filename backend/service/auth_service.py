@@ -1,20 +1,28 @@
-from repository.user_repository import user_repository
+from repository.user_repository import async_user_repository as user_repository
 from utils.security_manager import security_manager
+from utils.password_hasher import password_hasher
+from utils.db_manager import db_manager
+from service.user_cache import user_cache
+from service.farmer_search_service import farmer_search_service
 from fastapi import HTTPException, status
 
 class AuthService:
-    def signup(self, user_data):
-        existing_user = user_repository.get_user_by_username(user_data.username)
+    async def signup(self, db, user_data):
+        existing_user = await user_repository.get_user_by_username(db, user_data.username)
         if existing_user:
             raise HTTPException(status_code=400, detail="Username already registered")
         
-        hashed_password = security_manager.get_password_hash(user_data.password)
-        user_id = user_repository.create_user(user_data.username, hashed_password)
+        hashed_password = await password_hasher.hash(user_data.password)
+        user_id = await user_repository.create_user(db, user_data.username, hashed_password)
+        await db_manager.commit(db)
+        # Still in the session's identity map, so this does not query again
+        farmer_search_service.upsert(await user_repository.get_user_by_id(db, user_id))
         return {"id": user_id, "username": user_data.username, "role": "Farmer"}
 
-    def login(self, username, password):
-        user = user_repository.get_user_by_username(username)
-        if not user or not security_manager.verify_password(password, user.password):
+    async def login(self, db, username, password):
+        user = await user_repository.get_user_by_username(db, username)
+        verified, new_hash = (await password_hasher.verify(password, user.password)) if user else (False, None)
+        if not verified:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Incorrect username or password",
@@ -24,18 +32,25 @@ class AuthService:
         if not user.is_active:
             raise HTTPException(status_code=403, detail="User account is blocked/pending approval")
 
+        if new_hash:
+            # BCRYPT_ROUNDS changed since this password was stored; upgrade it while we have the plaintext
+            await user_repository.update_password(db, user.id, new_hash)
+            await db_manager.commit(db)
+
         access_token = security_manager.create_access_token(
-            data={"sub": user.username, "role": user.role}
+            data={"sub": user.username, "uid": user.id, "role": user.role, "active": user.is_active}
         )
         return {"access_token": access_token, "token_type": "bearer", "role": user.role}
 
-    def reset_password(self, username, new_password):
-        user = user_repository.get_user_by_username(username)
+    async def reset_password(self, db, username, new_password):
+        user = await user_repository.get_user_by_username(db, username)
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
         
-        hashed_password = security_manager.get_password_hash(new_password)
-        user_repository.update_password(user.id, hashed_password)
+        hashed_password = await password_hasher.hash(new_password)
+        await user_repository.update_password(db, user.id, hashed_password)
+        await db_manager.commit(db)
+        user_cache.invalidate(user.id)
         return {"message": "Password updated successfully"}
 
 auth_service = AuthService()
@@ -0,0 +1,99 @@
+import asyncio
+import time
+from typing import Awaitable, Optional
+from repository.history_repository import async_history_repository as history_repository
+from repository.crop_repository import async_crop_repository as crop_repository
+from service.weather_service import weather_service
+from utils.db_manager import db_manager
+from utils.ttl_cache import TTLCache
+from config import settings
+
+STAGES = ("weather", "history", "crops", "images", "context")
+
+def server_timing(timings: dict) -> str:
+    """Stage timings as a Server-Timing header value, readable in the browser's network panel."""
+    return ", ".join(f"{stage};dur={elapsed:.1f}" for stage, elapsed in timings.items())
+
+class ChatContextService:
+    """
+    Farmer context for the chat endpoints: location, weather, the CHAT_HISTORY_LIMIT most recent
+    history records and the crop names used when no crop type is given. Weather, history and crops
+    are fetched at the same time, each query on its own session, so assembling them takes as long as
+    the slowest one. The result is kept per farmer for CHAT_CONTEXT_TTL_SECONDS so follow-up
+    questions skip it, and dropped when the farmer's profile, crops or history change.
+    """
+    def __init__(self):
+        self.cache = TTLCache(settings.CHAT_CONTEXT_TTL_SECONDS, settings.CHAT_CONTEXT_MAX_SIZE)
+        self.history_limit = settings.CHAT_HISTORY_LIMIT
+        self.counters = {"builds": 0, **{f"{stage}_ms": 0.0 for stage in STAGES}}
+
+    async def timed(self, stage: str, work: Awaitable, timings: dict):
+        started = time.perf_counter()
+        try:
+            return await work
+        finally:
+            elapsed = (time.perf_counter() - started) * 1000
+            timings[stage] = elapsed
+            self.counters[f"{stage}_ms"] += elapsed
+
+    async def build(self, user, crop_type: Optional[str], timings: dict) -> dict:
+        """
+        Keyword arguments for the Gemini calls. Fills `timings` with milliseconds per stage;
+        "context" is the whole assembly, cached or not.
+        """
+        return await self.timed("context", self._build(user, crop_type, timings), timings)
+
+    async def _build(self, user, crop_type: Optional[str], timings: dict) -> dict:
+        farmer = self.cache.get(user.id)
+        if farmer is None:
+            weather_data, history, crops = await asyncio.gather(
+                self.timed("weather", weather_service.get_weather(user.city or user.state), timings),
+                self.timed("history", self._history(user.id), timings),
+                self.timed("crops", self._crops(user.id), timings),
+            )
+            farmer = {
+                "location": user.city or user.state or "Unknown Location",
+                "weather_data": weather_data,
+                "history": history,
+                "crops": crops,
+            }
+            self.cache.set(user.id, farmer)
+            self.counters["builds"] += 1
+
+        # If crop_type is missing, use the farmer's current crops
+        if not crop_type or crop_type.strip() == "" or crop_type.lower() == "detect":
+            crop_type = ", ".join(farmer["crops"]) if farmer["crops"] else "General (Not specified)"
+
+        return {
+            "crop_type": crop_type,
+            "location": farmer["location"],
+            "weather_data": farmer["weather_data"],
+            "history": farmer["history"]
+        }
+
+    async def _history(self, farmer_id: int) -> list:
+        async with db_manager.session() as db:
+            records = await history_repository.get_recent_history(db, farmer_id, self.history_limit)
+            return [
+                {
+                    "crop": h.crop,
+                    "year": h.year,
+                    "disease": h.disease_record,
+                    "treatment": h.treatment_record
+                } for h in records
+            ]
+
+    async def _crops(self, farmer_id: int) -> list:
+        async with db_manager.session() as db:
+            return [c.crop_name for c in await crop_repository.get_crops_by_farmer(db, farmer_id)]
+
+    def invalidate(self, farmer_id: int):
+        self.cache.invalidate(farmer_id)
+
+    def stats(self) -> dict:
+        return {
+            **self.cache.stats(),
+            **{key: round(value, 3) if key.endswith("_ms") else value for key, value in self.counters.items()},
+        }
+
+chat_context_service = ChatContextService()
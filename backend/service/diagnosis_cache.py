@@ -0,0 +1,116 @@
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from typing import List, Optional
+from fastapi.concurrency import run_in_threadpool
+from config import settings
+from utils.ttl_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+def weather_bucket(weather_data: Optional[dict]) -> str:
+    # Coarse enough that minor readings drift between calls still hits the same entry
+    if not weather_data or "temperature" not in weather_data:
+        return "unknown"
+    try:
+        temperature = int(float(weather_data.get("temperature", 0)) // 5 * 5)
+        humidity = int(float(weather_data.get("humidity", 0)) // 20 * 20)
+    except (TypeError, ValueError):
+        return "unknown"
+    condition = str(weather_data.get("condition", "")).strip().lower()
+    return f"{temperature}|{humidity}|{condition}"
+
+def normalise(text: Optional[str]) -> str:
+    return " ".join((text or "").lower().split())
+
+class DiagnosisCache:
+    """
+    Content-addressed cache of Gemini diagnoses. An in-memory LRU tier answers repeats instantly;
+    an optional SQLite file (DIAGNOSIS_CACHE_PATH) keeps entries across restarts and workers.
+    """
+    def __init__(self):
+        self.ttl_seconds = settings.DIAGNOSIS_CACHE_TTL_SECONDS
+        self.memory = TTLCache(self.ttl_seconds, settings.DIAGNOSIS_CACHE_MAX_SIZE)
+        self.disk_path = settings.DIAGNOSIS_CACHE_PATH
+        self.disk_max_entries = settings.DIAGNOSIS_CACHE_DISK_MAX_ENTRIES
+        self._conn = None
+        self._lock = threading.Lock()
+        self.counters = {"hits": 0, "disk_hits": 0, "misses": 0, "stores": 0}
+
+    def make_key(self, image_digests: List[str], crop_type: str, language: str, message: Optional[str], weather_data: Optional[dict]) -> str:
+        parts = [
+            ",".join(image_digests),
+            normalise(crop_type),
+            normalise(language),
+            normalise(message),
+            weather_bucket(weather_data),
+        ]
+        return hashlib.sha256("\x1f".join(parts).encode()).hexdigest()
+
+    async def get(self, key: str) -> Optional[dict]:
+        result = self.memory.get(key)
+        if result is not None:
+            self.counters["hits"] += 1
+            return result
+        if self.disk_path:
+            result = await run_in_threadpool(self._disk_get, key)
+            if result is not None:
+                self.counters["hits"] += 1
+                self.counters["disk_hits"] += 1
+                self.memory.set(key, result)
+                return result
+        self.counters["misses"] += 1
+        return None
+
+    async def set(self, key: str, result: dict):
+        self.memory.set(key, result)
+        self.counters["stores"] += 1
+        if self.disk_path:
+            await run_in_threadpool(self._disk_set, key, result)
+
+    def stats(self) -> dict:
+        return {**self.counters, "memory_entries": len(self.memory), "evictions": self.memory.evictions}
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.disk_path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS diagnosis_cache (key TEXT PRIMARY KEY, result TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS ix_diagnosis_cache_created ON diagnosis_cache (created_at)")
+        return self._conn
+
+    def _disk_get(self, key: str) -> Optional[dict]:
+        try:
+            with self._lock:
+                row = self._connection().execute(
+                    "SELECT result FROM diagnosis_cache WHERE key = ? AND created_at > ?",
+                    (key, time.time() - self.ttl_seconds)
+                ).fetchone()
+            return json.loads(row[0]) if row else None
+        except sqlite3.Error as e:
+            logger.error(f"Diagnosis cache read failed: {e}")
+            return None
+
+    def _disk_set(self, key: str, result: dict):
+        try:
+            with self._lock:
+                conn = self._connection()
+                with conn:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO diagnosis_cache (key, result, created_at) VALUES (?, ?, ?)",
+                        (key, json.dumps(result), time.time())
+                    )
+                    # Oldest entries go first once the file exceeds its bound
+                    conn.execute(
+                        "DELETE FROM diagnosis_cache WHERE key IN ("
+                        "SELECT key FROM diagnosis_cache ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+                        (self.disk_max_entries,)
+                    )
+        except sqlite3.Error as e:
+            logger.error(f"Diagnosis cache write failed: {e}")
+
+diagnosis_cache = DiagnosisCache()
@@ -0,0 +1,162 @@
+# Seven-day action plans for the labels the local classifier can produce, keyed by label and language.
+# Gemini-generated plans use the same shape: {"disease_name", "plan": [{"day", "title", "tasks", ...}], "recovery_percentage"}
+
+PLANS = {
+    "Leaf Blight": {
+        "en": {
+            "disease_name": "Leaf Blight",
+            "recovery_percentage": 85,
+            "plan": [
+                {"day": "Day 1", "title": "Immediate Control", "tasks": ["Remove visibly infected leaves", "Spray Fungicide X (2ml per liter of water)", "Spray during early morning", "Wear gloves and mask"], "voice_note": "Spray completed?", "reminder": "Spray completed?"},
+                {"day": "Day 2", "title": "Soil Monitoring", "tasks": ["Avoid overwatering", "Check drainage condition", "Apply organic compost (light layer)"]},
+                {"day": "Day 3", "title": "Preventive Spray", "tasks": ["Apply Neem-based biopesticide", "Maintain 12-hour gap from irrigation"]},
+                {"day": "Day 4", "title": "Field Observation", "tasks": ["Capture new image for progress check", "AI compares before-after condition"]},
+                {"day": "Day 5", "title": "Nutrient Boost", "tasks": ["Add potassium-rich fertilizer", "Avoid nitrogen-heavy fertilizers"]},
+                {"day": "Day 6", "title": "Secondary Inspection", "tasks": ["Inspect lower leaves", "Remove newly affected areas"]},
+                {"day": "Day 7", "title": "Final Assessment", "tasks": ["Upload updated image", "System evaluates recovery %", "Suggest continuation or stop plan"]}
+            ]
+        },
+        "hi": {
+            "disease_name": "लीफ ब्लाइट (झुलसा रोग)",
+            "recovery_percentage": 85,
+            "plan": [
+                {"day": "दिन 1", "title": "तत्काल नियंत्रण", "tasks": ["दृष्टतः संक्रमित पत्तियों को हटा दें", "कवकनाशी एक्स (2 मिली प्रति लीटर पानी) का छिड़काव करें", "सुबह-सुबह स्प्रे करें", "दस्ताने और मास्क पहनें"], "voice_note": "क्या स्प्रे पूरा हो गया?", "reminder": "क्या स्प्रे पूरा हो गया?"},
+                {"day": "दिन 2", "title": "मिट्टी की निगरानी", "tasks": ["अधिक पानी देने से बचें", "जल निकासी की स्थिति की जाँच करें", "जैविक खाद (हल्की परत) लगाएं"]},
+                {"day": "दिन 3", "title": "निवारक स्प्रे", "tasks": ["नीम आधारित जैव कीटनाशक का प्रयोग करें", "सिंचाई से 12 घंटे का अंतर बनाए रखें"]},
+                {"day": "दिन 4", "title": "क्षेत्र अवलोकन", "tasks": ["प्रगति की जाँच के लिए नई छवि कैप्चर करें", "एआई स्थिति की तुलना करता है"]},
+                {"day": "दिन 5", "title": "पोषक तत्व बूस्ट", "tasks": ["पोटैशियम युक्त खाद डालें", "नाइट्रोजन भारी उर्वरक से बचें"]},
+                {"day": "दिन 6", "title": "द्वितीयक निरीक्षण", "tasks": ["निचली पत्तियों का निरीक्षण करें", "नए प्रभावित क्षेत्रों को हटा दें"]},
+                {"day": "दिन 7", "title": "अंतिम मूल्यांकन", "tasks": ["अद्यतन छवि अपलोड करें", "सिस्टम रिकवरी % का मूल्यांकन करता है", "योजना जारी रखने या रोकने का सुझाव दें"]}
+            ]
+        }
+    },
+    "Rust": {
+        "en": {
+            "disease_name": "Rust",
+            "recovery_percentage": 80,
+            "plan": [
+                {"day": "Day 1", "title": "Immediate Control", "tasks": ["Spray Propiconazole 25 EC (1ml per liter of water)", "Cover both sides of the leaves", "Spray in calm weather, early morning or evening", "Wear gloves and mask"], "voice_note": "Spray completed?", "reminder": "Spray completed?"},
+                {"day": "Day 2", "title": "Stop the Spread", "tasks": ["Do not walk through wet fields, spores stick to clothes", "Clean tools after use in infected rows"]},
+                {"day": "Day 3", "title": "Irrigation Control", "tasks": ["Irrigate in the morning only", "Avoid water standing in the field"]},
+                {"day": "Day 4", "title": "Field Observation", "tasks": ["Capture new image for progress check", "Look for fresh orange pustules on upper leaves"]},
+                {"day": "Day 5", "title": "Nutrient Balance", "tasks": ["Add potassium-rich fertilizer", "Stop extra urea until the rust is controlled"]},
+                {"day": "Day 6", "title": "Neighbouring Fields", "tasks": ["Inform neighbouring farmers", "Check nearby fields for yellow or brown pustules"]},
+                {"day": "Day 7", "title": "Final Assessment", "tasks": ["Upload updated image", "Repeat spray after 15 days if new pustules appear"]}
+            ]
+        },
+        "hi": {
+            "disease_name": "रतुआ (रस्ट) रोग",
+            "recovery_percentage": 80,
+            "plan": [
+                {"day": "दिन 1", "title": "तत्काल नियंत्रण", "tasks": ["प्रोपिकोनाज़ोल 25 ईसी (1 मिली प्रति लीटर पानी) का छिड़काव करें", "पत्तियों के दोनों ओर छिड़काव करें", "शांत मौसम में सुबह या शाम को स्प्रे करें", "दस्ताने और मास्क पहनें"], "voice_note": "क्या स्प्रे पूरा हो गया?", "reminder": "क्या स्प्रे पूरा हो गया?"},
+                {"day": "दिन 2", "title": "फैलाव रोकें", "tasks": ["गीले खेत में न चलें, बीजाणु कपड़ों पर चिपकते हैं", "संक्रमित कतारों में उपयोग के बाद औज़ार साफ करें"]},
+                {"day": "दिन 3", "title": "सिंचाई नियंत्रण", "tasks": ["केवल सुबह सिंचाई करें", "खेत में पानी जमा न होने दें"]},
+                {"day": "दिन 4", "title": "क्षेत्र अवलोकन", "tasks": ["प्रगति की जाँच के लिए नई छवि कैप्चर करें", "ऊपरी पत्तियों पर नए नारंगी धब्बे देखें"]},
+                {"day": "दिन 5", "title": "पोषक संतुलन", "tasks": ["पोटैशियम युक्त खाद डालें", "रतुआ नियंत्रित होने तक अतिरिक्त यूरिया न डालें"]},
+                {"day": "दिन 6", "title": "पड़ोसी खेत", "tasks": ["पड़ोसी किसानों को सूचित करें", "आसपास के खेतों में पीले या भूरे धब्बे देखें"]},
+                {"day": "दिन 7", "title": "अंतिम मूल्यांकन", "tasks": ["अद्यतन छवि अपलोड करें", "नए धब्बे दिखें तो 15 दिन बाद स्प्रे दोहराएं"]}
+            ]
+        }
+    },
+    "Powdery Mildew": {
+        "en": {
+            "disease_name": "Powdery Mildew",
+            "recovery_percentage": 85,
+            "plan": [
+                {"day": "Day 1", "title": "Immediate Control", "tasks": ["Spray wettable sulphur (2g per liter of water)", "Do not spray in afternoon heat", "Wear gloves and mask"], "voice_note": "Spray completed?", "reminder": "Spray completed?"},
+                {"day": "Day 2", "title": "Improve Air Flow", "tasks": ["Remove heavily coated leaves", "Keep weeds down between rows"]},
+                {"day": "Day 3", "title": "Irrigation Control", "tasks": ["Water at the base, not over the leaves", "Avoid evening irrigation"]},
+                {"day": "Day 4", "title": "Field Observation", "tasks": ["Capture new image for progress check", "Check whether the white coating is spreading"]},
+                {"day": "Day 5", "title": "Nutrient Balance", "tasks": ["Avoid nitrogen-heavy fertilizers", "Add potassium-rich fertilizer"]},
+                {"day": "Day 6", "title": "Preventive Spray", "tasks": ["Apply Neem-based biopesticide", "Maintain 12-hour gap from irrigation"]},
+                {"day": "Day 7", "title": "Final Assessment", "tasks": ["Upload updated image", "System evaluates recovery %"]}
+            ]
+        },
+        "hi": {
+            "disease_name": "चूर्णिल आसिता (पाउडरी मिल्ड्यू)",
+            "recovery_percentage": 85,
+            "plan": [
+                {"day": "दिन 1", "title": "तत्काल नियंत्रण", "tasks": ["घुलनशील गंधक (2 ग्राम प्रति लीटर पानी) का छिड़काव करें", "दोपहर की गर्मी में स्प्रे न करें", "दस्ताने और मास्क पहनें"], "voice_note": "क्या स्प्रे पूरा हो गया?", "reminder": "क्या स्प्रे पूरा हो गया?"},
+                {"day": "दिन 2", "title": "हवा का संचार", "tasks": ["अधिक सफेद परत वाली पत्तियाँ हटा दें", "कतारों के बीच खरपतवार साफ रखें"]},
+                {"day": "दिन 3", "title": "सिंचाई नियंत्रण", "tasks": ["पत्तियों पर नहीं, जड़ों में पानी दें", "शाम को सिंचाई से बचें"]},
+                {"day": "दिन 4", "title": "क्षेत्र अवलोकन", "tasks": ["प्रगति की जाँच के लिए नई छवि कैप्चर करें", "देखें कि सफेद परत फैल रही है या नहीं"]},
+                {"day": "दिन 5", "title": "पोषक संतुलन", "tasks": ["नाइट्रोजन भारी उर्वरक से बचें", "पोटैशियम युक्त खाद डालें"]},
+                {"day": "दिन 6", "title": "निवारक स्प्रे", "tasks": ["नीम आधारित जैव कीटनाशक का प्रयोग करें", "सिंचाई से 12 घंटे का अंतर बनाए रखें"]},
+                {"day": "दिन 7", "title": "अंतिम मूल्यांकन", "tasks": ["अद्यतन छवि अपलोड करें", "सिस्टम रिकवरी % का मूल्यांकन करता है"]}
+            ]
+        }
+    },
+    "Chlorosis": {
+        "en": {
+            "disease_name": "Chlorosis (Nutrient Deficiency)",
+            "recovery_percentage": 90,
+            "plan": [
+                {"day": "Day 1", "title": "Check the Cause", "tasks": ["Check whether old or new leaves are yellowing", "Get a soil test at the nearest centre if possible"], "voice_note": "Soil sample taken?", "reminder": "Soil sample taken?"},
+                {"day": "Day 2", "title": "Foliar Feed", "tasks": ["Spray 2% urea solution if older leaves are yellow", "Spray zinc sulphate (5g per liter) if new leaves are yellow"]},
+                {"day": "Day 3", "title": "Drainage", "tasks": ["Drain standing water", "Avoid overwatering"]},
+                {"day": "Day 4", "title": "Field Observation", "tasks": ["Capture new image for progress check", "Compare leaf colour with Day 1"]},
+                {"day": "Day 5", "title": "Soil Support", "tasks": ["Apply organic compost (light layer)", "Follow soil test advice when available"]},
+                {"day": "Day 6", "title": "Secondary Inspection", "tasks": ["Check for spots or pustules, which point to disease instead"]},
+                {"day": "Day 7", "title": "Final Assessment", "tasks": ["Upload updated image", "System evaluates recovery %"]}
+            ]
+        },
+        "hi": {
+            "disease_name": "हरिमाहीनता (पोषक तत्व की कमी)",
+            "recovery_percentage": 90,
+            "plan": [
+                {"day": "दिन 1", "title": "कारण की जाँच", "tasks": ["देखें कि पुरानी या नई पत्तियाँ पीली हो रही हैं", "संभव हो तो नज़दीकी केंद्र पर मिट्टी की जाँच कराएं"], "voice_note": "क्या मिट्टी का नमूना लिया?", "reminder": "क्या मिट्टी का नमूना लिया?"},
+                {"day": "दिन 2", "title": "पत्तियों पर पोषण", "tasks": ["पुरानी पत्तियाँ पीली हों तो 2% यूरिया घोल का छिड़काव करें", "नई पत्तियाँ पीली हों तो जिंक सल्फेट (5 ग्राम प्रति लीटर) का छिड़काव करें"]},
+                {"day": "दिन 3", "title": "जल निकासी", "tasks": ["जमा पानी निकालें", "अधिक पानी देने से बचें"]},
+                {"day": "दिन 4", "title": "क्षेत्र अवलोकन", "tasks": ["प्रगति की जाँच के लिए नई छवि कैप्चर करें", "दिन 1 से पत्तियों के रंग की तुलना करें"]},
+                {"day": "दिन 5", "title": "मिट्टी सहायता", "tasks": ["जैविक खाद (हल्की परत) लगाएं", "मिट्टी जाँच की सलाह का पालन करें"]},
+                {"day": "दिन 6", "title": "द्वितीयक निरीक्षण", "tasks": ["धब्बे या फफोले देखें, वे रोग का संकेत हैं"]},
+                {"day": "दिन 7", "title": "अंतिम मूल्यांकन", "tasks": ["अद्यतन छवि अपलोड करें", "सिस्टम रिकवरी % का मूल्यांकन करता है"]}
+            ]
+        }
+    },
+    "Healthy": {
+        "en": {
+            "disease_name": "No Disease Detected",
+            "recovery_percentage": 100,
+            "plan": [
+                {"day": "Day 1", "title": "Routine Care", "tasks": ["Continue regular irrigation schedule", "Keep weeds down between rows"]},
+                {"day": "Day 4", "title": "Field Observation", "tasks": ["Walk the field and check lower leaves", "Upload a new image if spots appear"]},
+                {"day": "Day 7", "title": "Weekly Check", "tasks": ["Upload updated image", "Review weather alerts for the coming week"]}
+            ]
+        },
+        "hi": {
+            "disease_name": "कोई रोग नहीं मिला",
+            "recovery_percentage": 100,
+            "plan": [
+                {"day": "दिन 1", "title": "नियमित देखभाल", "tasks": ["नियमित सिंचाई जारी रखें", "कतारों के बीच खरपतवार साफ रखें"]},
+                {"day": "दिन 4", "title": "क्षेत्र अवलोकन", "tasks": ["खेत में घूमकर निचली पत्तियाँ जाँचें", "धब्बे दिखें तो नई छवि अपलोड करें"]},
+                {"day": "दिन 7", "title": "साप्ताहिक जाँच", "tasks": ["अद्यतन छवि अपलोड करें", "आने वाले सप्ताह की मौसम चेतावनियाँ देखें"]}
+            ]
+        }
+    },
+    # No leaf recognised in the photo and no model to ask
+    "Unrecognised": {
+        "en": {
+            "disease_name": "Leaf Not Recognised",
+            "recovery_percentage": None,
+            "plan": [
+                {"day": "Day 1", "title": "Retake the Photo", "tasks": ["Photograph one affected leaf in daylight", "Fill most of the frame with the leaf", "Keep the camera steady and the leaf in focus"]}
+            ]
+        },
+        "hi": {
+            "disease_name": "पत्ती पहचानी नहीं गई",
+            "recovery_percentage": None,
+            "plan": [
+                {"day": "दिन 1", "title": "फिर से फोटो लें", "tasks": ["दिन की रोशनी में एक प्रभावित पत्ती की फोटो लें", "फ्रेम का अधिकतर भाग पत्ती से भरें", "कैमरा स्थिर रखें और पत्ती साफ दिखे"]}
+            ]
+        }
+    }
+}
+
+UNRECOGNISED = "Unrecognised"
+UNKNOWN = {"en": "Not specified", "hi": "निर्दिष्ट नहीं"}
+UNAVAILABLE = {"en": "Unavailable", "hi": "उपलब्ध नहीं"}
+
+def get_plan(label: str, lang: str) -> dict:
+    plans = PLANS.get(label, PLANS["Leaf Blight"])
+    return plans.get(lang, plans["en"])
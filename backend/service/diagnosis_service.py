@@ -0,0 +1,122 @@
+import asyncio
+import logging
+import time
+from typing import Optional, Union
+from service.disease_classifier import classify_image
+from service.diagnosis_plans import get_plan, UNKNOWN, UNAVAILABLE, UNRECOGNISED
+from service.gemini_service import gemini_service, image_part
+from service.image_service import image_service
+from service.weather_service import weather_service
+from utils.uploads import SpooledUpload
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+class DiagnosisService:
+    """
+    Tiered engine behind /diagnosis/analyze. The local classifier runs first, off the event loop, and
+    rejects photos that do not show a leaf. Gemini answers by default, so out of the box there is no
+    instant local diagnosis: the built-in colour model is not calibrated, and its confidence only skips
+    Gemini (at DIAGNOSIS_LOCAL_CONFIDENCE or above) once DIAGNOSIS_LOCAL_FIRST is set for a validated
+    DISEASE_MODEL_PATH. If Gemini is missing or fails, the local answer is used so the endpoint keeps
+    working offline; a photo without a leaf then gets the retake advice instead of a disease plan.
+    """
+    def __init__(self):
+        self.confidence_threshold = settings.DIAGNOSIS_LOCAL_CONFIDENCE
+        self.local_first = settings.DIAGNOSIS_LOCAL_FIRST
+        self.min_leaf_fraction = settings.DIAGNOSIS_MIN_LEAF_FRACTION
+        self.model_path = settings.DISEASE_MODEL_PATH or None
+        self.counters = {"local": 0, "gemini": 0, "local_fallback": 0, "not_a_leaf": 0, "local_ms": 0.0}
+
+    async def classify(self, data: bytes) -> dict:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(image_service.pool, classify_image, data, self.model_path, self.min_leaf_fraction)
+
+    async def analyze(self, data: Union[bytes, SpooledUpload], lang: str = "en", crop: Optional[str] = None, location: Optional[str] = None) -> dict:
+        lang = lang if lang in UNKNOWN else "en"
+        part = (await image_service.prepare([data]))[0]
+        local = await self.classify(part["data"])
+        self.counters["local_ms"] += local["elapsed_ms"]
+        if local["label"] is None:
+            self.counters["not_a_leaf"] += 1
+
+        weather = await self._weather_summary(location, lang)
+        context = {
+            "crop": crop or UNKNOWN[lang],
+            "location": location or UNKNOWN[lang],
+            "weather": weather,
+        }
+
+        if self.local_first and local["label"] is not None and local["confidence"] >= self.confidence_threshold:
+            self.counters["local"] += 1
+            return self._local_result(local, lang, context, "local")
+
+        remote = await self._ask_gemini(part, lang, context)
+        if remote is not None:
+            self.counters["gemini"] += 1
+            return {**context, **remote, "confidence": local["confidence"], "source": "gemini"}
+
+        self.counters["local_fallback"] += 1
+        return self._local_result(local, lang, context, "local_fallback")
+
+    def _local_result(self, local: dict, lang: str, context: dict, source: str) -> dict:
+        plan = get_plan(local["label"] or UNRECOGNISED, lang)
+        return {
+            **context,
+            "disease_name": plan["disease_name"],
+            "plan": plan["plan"],
+            "recovery_percentage": plan["recovery_percentage"],
+            "confidence": local["confidence"],
+            "source": source
+        }
+
+    async def _weather_summary(self, location: Optional[str], lang: str) -> str:
+        if not location:
+            return UNAVAILABLE[lang]
+        weather = await weather_service.get_weather(location)
+        if "temperature" not in weather:
+            return UNAVAILABLE[lang]
+        return f"{weather.get('condition', '')}, {weather['temperature']}°C"
+
+    async def _ask_gemini(self, part: dict, lang: str, context: dict) -> Optional[dict]:
+        if not gemini_service.model:
+            return None
+        language = "Hindi" if lang == "hi" else "English"
+        prompt = f"""
+        You are an expert agronomist. Identify the crop disease in the attached leaf photo and write a 7 day action plan.
+        Crop: {context["crop"]}
+        Location: {context["location"]}
+        Weather: {context["weather"]}
+
+        Return STRICTLY a JSON object with these keys:
+        {{
+            "disease_name": "...",
+            "crop": "...",
+            "recovery_percentage": 85,
+            "plan": [{{"day": "Day 1", "title": "...", "tasks": ["...", "..."]}}]
+        }}
+        All text values MUST be in {language}. Keep JSON keys in English.
+        """
+        started = time.perf_counter()
+        try:
+            response = await gemini_service.generate([prompt, image_part(part)])
+            result = gemini_service.parse_json_response(response.text)
+            plan = result.get("plan")
+            if not result.get("disease_name") or not isinstance(plan, list) or not all(
+                isinstance(day, dict) and day.get("day") and day.get("title") and isinstance(day.get("tasks"), list)
+                for day in plan
+            ):
+                raise ValueError("incomplete plan")
+            if result.get("recovery_percentage") is not None:
+                result["recovery_percentage"] = int(result["recovery_percentage"])
+        except Exception as e:
+            logger.error(f"Gemini diagnosis failed after {(time.perf_counter() - started):.2f}s, using local result: {e}")
+            return None
+        if not result.get("crop"):
+            result.pop("crop", None)
+        return result
+
+    def stats(self) -> dict:
+        return {**self.counters, "local_ms": round(self.counters["local_ms"], 2)}
+
+diagnosis_service = DiagnosisService()
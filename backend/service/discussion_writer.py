@@ -0,0 +1,224 @@
+import asyncio
+import glob
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from itertools import chain, islice
+from typing import Callable, Iterable, List, Optional, Tuple
+from fastapi.concurrency import run_in_threadpool
+from repository.discussion_repository import async_discussion_repository as discussion_repository
+from utils.db_manager import db_manager
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+# Called with the new discussion's id once its row is committed
+OnSaved = Callable[[int], None]
+
+def _encode(row: dict) -> str:
+    return json.dumps({**row, "created_at": row["created_at"].isoformat()}) + "\n"
+
+def _decode(line: str) -> dict:
+    row = json.loads(line)
+    row["created_at"] = datetime.fromisoformat(row["created_at"])
+    return row
+
+class DiscussionWriter:
+    """
+    Write-behind queue for discussion records. The chat endpoints hand rows to `submit` and answer
+    without waiting on a commit; a background task writes them with one multi-row INSERT per
+    DISCUSSION_FLUSH_BATCH_SIZE rows, every DISCUSSION_FLUSH_INTERVAL_SECONDS or as soon as a batch
+    is full. Each row keeps the time it was submitted as its created_at.
+
+    At most DISCUSSION_QUEUE_MAX_SIZE rows wait in memory. Rows that cannot go to the database, because
+    an insert failed (no new attempt for DISCUSSION_RETRY_SECONDS) or the queue is full, are appended
+    to the spill file DISCUSSION_SPILL_PATH, one JSON row per line and fsynced. The file is replayed
+    in batches once inserts succeed again, also after a restart. `close` writes what is left on shutdown.
+    """
+    def __init__(self):
+        self.interval = settings.DISCUSSION_FLUSH_INTERVAL_SECONDS
+        self.batch_size = settings.DISCUSSION_FLUSH_BATCH_SIZE
+        self.max_size = settings.DISCUSSION_QUEUE_MAX_SIZE
+        self.retry_seconds = settings.DISCUSSION_RETRY_SECONDS
+        self.spill_path = settings.DISCUSSION_SPILL_PATH
+        self.queue: "deque[Tuple[dict, Optional[OnSaved]]]" = deque()
+        self.spill_depth = 0  # rows this process knows are waiting in the spill file
+        self.retry_at = 0.0
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+        # Appends and the rename that claims the file for replay must not interleave
+        self._file_lock = threading.Lock()
+        self.counters = {
+            "submitted": 0, "written": 0, "flushes": 0, "failed_flushes": 0, "flush_ms": 0.0, "max_flush_ms": 0.0,
+            "spilled": 0, "replayed": 0, "unreadable": 0, "lost": 0,
+        }
+
+    def start(self):
+        if self._task is not None and not self._task.done():
+            return
+        self._closing = False
+        self._wakeup = asyncio.Event()
+        self.spill_depth = self._count_spilled()
+        self._task = asyncio.create_task(self._run())
+
+    async def submit(self, row: dict, on_saved: Optional[OnSaved] = None):
+        row = {**row, "created_at": row.get("created_at") or datetime.now(timezone.utc)}
+        self.counters["submitted"] += 1
+        self.start()
+        if len(self.queue) >= self.max_size:
+            # Memory stays bounded, the row waits on disk; its index callback is skipped
+            await run_in_threadpool(self._spill, [row])
+            return
+        self.queue.append((row, on_saved))
+        if len(self.queue) >= self.batch_size:
+            self._wakeup.set()
+
+    async def _run(self):
+        while not self._closing:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            if self._closing:
+                break
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Discussion flush failed: {e}")
+
+    async def flush(self, replay: bool = True):
+        """Writes every queued row, spilling what the database does not take, then replays the spill file."""
+        while self.queue:
+            batch = [self.queue.popleft() for _ in range(min(self.batch_size, len(self.queue)))]
+            if time.monotonic() < self.retry_at or not await self._write(batch):
+                await run_in_threadpool(self._spill, [row for row, _ in batch])
+        if replay and self.spill_depth and time.monotonic() >= self.retry_at:
+            await self._replay()
+
+    async def _write(self, batch: List[Tuple[dict, Optional[OnSaved]]]) -> bool:
+        started = time.perf_counter()
+        try:
+            async with db_manager.session() as db:
+                ids = await discussion_repository.create_discussions_bulk(db, [row for row, _ in batch])
+                await db_manager.commit(db)
+        except Exception as e:
+            logger.error(f"Writing {len(batch)} discussions failed, retrying in {self.retry_seconds}s: {e}")
+            self.counters["failed_flushes"] += 1
+            self.retry_at = time.monotonic() + self.retry_seconds
+            return False
+
+        elapsed = (time.perf_counter() - started) * 1000
+        self.counters["flushes"] += 1
+        self.counters["written"] += len(batch)
+        self.counters["flush_ms"] += elapsed
+        self.counters["max_flush_ms"] = max(self.counters["max_flush_ms"], elapsed)
+        for (_, on_saved), discussion_id in zip(batch, ids):
+            if on_saved is None:
+                continue
+            try:
+                on_saved(discussion_id)
+            except Exception as e:
+                logger.error(f"Indexing discussion {discussion_id} failed: {e}")
+        return True
+
+    def _append(self, lines: Iterable[str]) -> int:
+        count = 0
+        with self._file_lock, open(self.spill_path, "a+b") as spill:
+            # A line cut short by a crash stays on its own, the next row starts on a fresh line
+            if spill.tell():
+                spill.seek(-1, os.SEEK_END)
+                if spill.read(1) != b"\n":
+                    spill.write(b"\n")
+            for line in lines:
+                spill.write(line.encode())
+                count += 1
+            spill.flush()
+            os.fsync(spill.fileno())
+        return count
+
+    def _spill(self, rows: List[dict]):
+        if not self.spill_path:
+            self.counters["lost"] += len(rows)
+            logger.error(f"{len(rows)} discussions lost: the database is not taking writes and DISCUSSION_SPILL_PATH is not set")
+            return
+        try:
+            self.spill_depth += self._append(_encode(row) for row in rows)
+        except OSError as e:
+            self.counters["lost"] += len(rows)
+            logger.error(f"{len(rows)} discussions lost, the spill file {self.spill_path} is not writable: {e}")
+            return
+        self.counters["spilled"] += len(rows)
+
+    def _claim(self) -> Optional[str]:
+        # Rows appended from now on start a new spill file
+        claimed = f"{self.spill_path}.{os.getpid()}.replay"
+        with self._file_lock:
+            if not os.path.exists(self.spill_path):
+                return None
+            os.replace(self.spill_path, claimed)
+        return claimed
+
+    async def _replay(self):
+        claimed = await run_in_threadpool(self._claim)
+        if claimed is None:
+            self.spill_depth = 0
+            return
+        with open(claimed, encoding="utf-8") as spill:
+            while True:
+                lines = await run_in_threadpool(lambda: list(islice(spill, self.batch_size)))
+                if not lines:
+                    break
+                rows = []
+                for line in lines:
+                    try:
+                        rows.append(_decode(line))
+                    except ValueError:
+                        # A line cut short by a crash mid-append
+                        self.counters["unreadable"] += 1
+                        logger.error(f"Skipping unreadable spilled discussion: {line[:200]!r}")
+                if rows and not await self._write([(row, None) for row in rows]):
+                    # Back on disk with whatever was not read yet, for the next attempt
+                    await run_in_threadpool(self._append, chain(lines, spill))
+                    break
+                self.spill_depth -= len(lines)
+                self.counters["replayed"] += len(rows)
+        os.remove(claimed)
+        self.spill_depth = max(self.spill_depth, 0)
+
+    def _count_spilled(self) -> int:
+        if not self.spill_path:
+            return 0
+        for orphan in glob.glob(f"{glob.escape(self.spill_path)}.*.replay"):
+            # Left by a worker that stopped mid-replay; it may hold rows that were not written yet
+            logger.warning(f"Found {orphan}, a discussion spill file that was being replayed; append it to {self.spill_path} to retry it")
+        if not os.path.exists(self.spill_path):
+            return 0
+        with open(self.spill_path, encoding="utf-8") as spill:
+            return sum(1 for _ in spill)
+
+    async def close(self):
+        """Stops the flush loop and writes, or spills, everything still queued."""
+        if self._task is not None:
+            self._closing = True
+            self._wakeup.set()
+            await self._task
+            self._task = None
+        self.retry_at = 0.0
+        await self.flush(replay=False)
+
+    def stats(self) -> dict:
+        return {
+            "queue_depth": len(self.queue),
+            "spill_depth": self.spill_depth,
+            **self.counters,
+            "flush_ms": round(self.counters["flush_ms"], 3),
+            "max_flush_ms": round(self.counters["max_flush_ms"], 3),
+        }
+
+discussion_writer = DiscussionWriter()
@@ -0,0 +1,100 @@
+import io
+import time
+from typing import Optional, Tuple
+import numpy as np
+from PIL import Image
+
+LABELS = ["Healthy", "Rust", "Leaf Blight", "Powdery Mildew", "Chlorosis"]
+FEATURES = ["green", "yellow", "pustule", "lesion", "dark", "white", "pustule_density"]
+INPUT_EDGE = 128
+# A leaf photo is mostly one connected green or yellowing area; scattered coloured pixels (noise, a
+# patterned background) have a far longer boundary per pixel
+LEAF_MAX_EDGE_DENSITY = 0.3
+
+# Linear softmax model over colour features, rows follow LABELS and columns FEATURES.
+# Hand-calibrated on the sample/ photos; DISEASE_MODEL_PATH can point at a trained .npz instead.
+DEFAULT_WEIGHTS = np.array([
+    [ 4.0, -3.0, -40.0, -60.0, -5.0, -5.0,  0.0],  # Healthy: mostly green, no lesions
+    [ 0.0,  0.0,  35.0,  -5.0,  0.0,  0.0,  6.0],  # Rust: many small saturated orange pustules
+    [ 0.0,  4.0,   8.0,  60.0, 15.0,  0.0, -3.0],  # Leaf Blight: tan/brown lesions, dark centres, yellow halo
+    [ 0.0,  0.0,  -5.0,  -5.0,  0.0, 25.0,  0.0],  # Powdery Mildew: white powdery coating
+    [-2.0, 10.0, -30.0, -30.0,  0.0,  0.0,  0.0],  # Chlorosis: yellowing without lesions
+], dtype=np.float32)
+DEFAULT_BIAS = np.array([0.0, -3.0, -2.0, -1.5, -1.0], dtype=np.float32)
+
+_model = None
+
+def _load_model(model_path: Optional[str]):
+    # Loaded once per worker process
+    global _model
+    if _model is None:
+        if model_path:
+            with np.load(model_path) as data:
+                _model = (data["weights"].astype(np.float32), data["bias"].astype(np.float32), [str(label) for label in data["labels"]])
+        else:
+            _model = (DEFAULT_WEIGHTS, DEFAULT_BIAS, LABELS)
+    return _model
+
+def _edge_density(mask: np.ndarray) -> float:
+    # Boundary length per unit area: many small spots score high, one large blotch scores low
+    area = mask.sum()
+    if not area:
+        return 0.0
+    edges = np.count_nonzero(mask[:, 1:] != mask[:, :-1]) + np.count_nonzero(mask[1:, :] != mask[:-1, :])
+    return float(edges / area / 4)
+
+def extract_features(img: Image.Image) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    (features, leaf mask): fractions of the frame in each colour class, computed on a 128px HSV
+    thumbnail in one vectorised pass, and the pixels coloured like leaf tissue.
+    """
+    img.draft("RGB", (INPUT_EDGE * 2, INPUT_EDGE * 2))
+    hsv = np.asarray(img.convert("RGB").resize((INPUT_EDGE, INPUT_EDGE), Image.BILINEAR).convert("HSV"), dtype=np.float32) / 255.0
+    hue, sat, val = hsv[..., 0] * 360, hsv[..., 1], hsv[..., 2]
+
+    warm = (hue < 50) | (hue >= 330)
+    green = (hue >= 70) & (hue < 170) & (sat > 0.15) & (val > 0.2)
+    yellow = (hue >= 50) & (hue < 70) & (sat > 0.25) & (val > 0.35)
+    pustule = warm & (sat >= 0.45) & (val > 0.35)
+    lesion = warm & (sat >= 0.12) & (sat < 0.45) & (val > 0.25)
+    dark = val < 0.2
+    white = (sat < 0.12) & (val > 0.75)
+
+    features = np.array([
+        green.mean(), yellow.mean(), pustule.mean(), lesion.mean(), dark.mean(), white.mean(), _edge_density(pustule)
+    ], dtype=np.float32)
+    return features, green | yellow
+
+def classify_image(data: bytes, model_path: Optional[str] = None, min_leaf_fraction: float = 0.0) -> dict:
+    """
+    Label, confidence and per-label probabilities for one photo. Runs in a worker process, so it
+    only takes and returns picklable values. Undecodable input, and photos with less than
+    `min_leaf_fraction` of leaf-coloured pixels in one coherent area, come back without a label and
+    with confidence 0: the model only knows leaves and would otherwise be sure about anything.
+    """
+    started = time.perf_counter()
+    weights, bias, labels = _load_model(model_path)
+    try:
+        with Image.open(io.BytesIO(data)) as img:
+            features, leaf = extract_features(img)
+    except (OSError, ValueError):
+        return {"label": None, "confidence": 0.0, "probabilities": {}, "leaf_fraction": 0.0, "elapsed_ms": 0.0}
+
+    leaf_fraction = round(float(leaf.mean()), 4)
+    if leaf_fraction < min_leaf_fraction or _edge_density(leaf) > LEAF_MAX_EDGE_DENSITY:
+        return {
+            "label": None, "confidence": 0.0, "probabilities": {}, "leaf_fraction": leaf_fraction,
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 2),
+        }
+
+    scores = weights @ features + bias
+    probabilities = np.exp(scores - scores.max())
+    probabilities /= probabilities.sum()
+    best = int(probabilities.argmax())
+    return {
+        "label": labels[best],
+        "confidence": round(float(probabilities[best]), 4),
+        "probabilities": {label: round(float(p), 4) for label, p in zip(labels, probabilities)},
+        "leaf_fraction": leaf_fraction,
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 2),
+    }
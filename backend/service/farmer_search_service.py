@@ -0,0 +1,227 @@
+import asyncio
+import logging
+import time
+from typing import List, Optional
+import numpy as np
+from fastapi.concurrency import run_in_threadpool
+from repository.user_repository import async_user_repository as user_repository, is_mobile_prefix
+from utils.db_manager import db_manager
+from utils.ngram_index import Matches, NgramIndex, PrefixIndex, compact, normalise, query_trigrams, score, value_trigrams
+from utils.pagination import decode_rank_cursor, encode_rank_cursor
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+# Search filter -> position of its column in a farmer search row (id, full_name, username, mobile, city, state)
+TEXT_FIELDS = {"full_name": 1, "email": 2, "city": 4, "state": 5}
+MOBILE_FIELD = 3
+# Search filter -> users column, for farmers written since the index was built
+TEXT_COLUMNS = {"full_name": "full_name", "email": "username", "city": "city", "state": "state"}
+
+def _intersect(left: Optional[Matches], right: Matches) -> Matches:
+    # Every filter has to match; their ranks add up
+    if left is None:
+        return right
+    rows, left_at, right_at = np.intersect1d(left[0], right[0], assume_unique=True, return_indices=True)
+    return rows, left[1][left_at] + right[1][right_at]
+
+def _best(matches: List[Matches]) -> Matches:
+    # Any column may match `q`; a row keeps its best rank
+    rows = np.concatenate([found for found, _ in matches])
+    ranks = np.concatenate([rank for _, rank in matches])
+    order = np.lexsort((-ranks, rows))
+    rows, first = np.unique(rows[order], return_index=True)
+    return rows, ranks[order][first]
+
+def _record(user) -> dict:
+    # Trigrams are worked out once per write, not once per search
+    record = {name: value_trigrams(normalise(getattr(user, column))) for name, column in TEXT_COLUMNS.items()}
+    return {**record, "id": user.id, "mobile": compact(user.mobile)}
+
+def _prepare(criteria: dict) -> dict:
+    query = {name: query_trigrams(normalise(criteria[name])) for name in TEXT_FIELDS if criteria.get(name)}
+    if criteria.get("mobile"):
+        query["mobile"] = compact(criteria["mobile"])
+    if criteria.get("q"):
+        query["q"] = query_trigrams(normalise(criteria["q"]))
+        query["q_mobile"] = compact(criteria["q"]) if is_mobile_prefix(criteria["q"]) else None
+    return query
+
+def _score_record(record: dict, query: dict, min_score: float) -> float:
+    """Rank of one pending farmer, computed the same way FarmerSearchIndex ranks its rows; 0 when it does not match."""
+    total = 0.0
+    for name in TEXT_FIELDS:
+        if name in query:
+            rank = score(query[name], record[name], min_score)
+            if not rank:
+                return 0.0
+            total += rank
+    if "mobile" in query:
+        if not record["mobile"].startswith(query["mobile"]):
+            return 0.0
+        total += 1.0
+    if "q" in query:
+        best = max(score(query["q"], record[name], min_score) for name in TEXT_FIELDS)
+        if query["q_mobile"] and record["mobile"].startswith(query["q_mobile"]):
+            best = max(best, 1.0)
+        if not best:
+            return 0.0
+        total += best
+    return total
+
+def _top(ids: np.ndarray, ranks: np.ndarray, limit: int) -> np.ndarray:
+    """Positions of the best `limit` matches by rank then id, both descending, without sorting every match."""
+    if len(ids) > limit:
+        kth = np.partition(ranks, len(ranks) - limit)[len(ranks) - limit]
+        above = np.flatnonzero(ranks > kth)
+        ties = np.flatnonzero(ranks == kth)
+        room = limit - len(above)
+        if len(ties) > room:
+            ties = ties[np.argpartition(-ids[ties], room - 1)[:room]]
+        keep = np.concatenate([above, ties])
+    else:
+        keep = np.arange(len(ids))
+    return keep[np.lexsort((-ids[keep], -ranks[keep]))]
+
+class FarmerSearchIndex:
+    """Immutable n-gram snapshot of the farmer search columns. Rows rewritten since the build are retired."""
+    def __init__(self, rows, min_score: float, built_at: float = None):
+        self.built_at = built_at or time.time()
+        self.ids = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+        self.columns = {
+            name: NgramIndex([row[position] for row in rows], min_score)
+            for name, position in TEXT_FIELDS.items()
+        }
+        self.mobile = PrefixIndex([row[MOBILE_FIELD] for row in rows])
+        self.live = np.ones(len(rows), dtype=bool)
+
+    def retire(self, user_id: int):
+        # Rows are loaded in id order, so the position is a binary search away
+        position = np.searchsorted(self.ids, user_id)
+        if position < len(self.ids) and self.ids[position] == user_id:
+            self.live[position] = False
+
+    def search(self, criteria: dict) -> Matches:
+        """(ids, ranks) of the live farmers matching every filter in `criteria`, unordered."""
+        matches = None
+        for name, index in self.columns.items():
+            if criteria.get(name):
+                matches = _intersect(matches, index.match(criteria[name]))
+        if criteria.get("mobile"):
+            matches = _intersect(matches, self.mobile.match(criteria["mobile"]))
+        if criteria.get("q"):
+            found = [index.match(criteria["q"]) for index in self.columns.values()]
+            if is_mobile_prefix(criteria["q"]):
+                found.append(self.mobile.match(criteria["q"]))
+            matches = _intersect(matches, _best(found))
+        rows, ranks = matches
+        live = self.live[rows]
+        return self.ids[rows[live]], ranks[live]
+
+class FarmerSearchService:
+    """
+    Ranked, paginated admin search over farmers. PostgreSQL answers from its trigram indexes; on other
+    backends a FarmerSearchIndex is built from the users table on first use, patched with farmers
+    written through this process and rebuilt in the background after SEARCH_INDEX_TTL_SECONDS or
+    once SEARCH_INDEX_MAX_DELTA pending rows pile up.
+    """
+    def __init__(self):
+        self.min_score = settings.SEARCH_MIN_SCORE
+        self.ttl_seconds = settings.SEARCH_INDEX_TTL_SECONDS
+        self.max_delta = settings.SEARCH_INDEX_MAX_DELTA
+        self.use_database = db_manager.engine.dialect.name == "postgresql"
+        self.index: Optional[FarmerSearchIndex] = None
+        self.pending = {}  # user id -> (written_at, record) for farmers newer than the index
+        self._build_lock = asyncio.Lock()
+        self._refreshing = False
+        self.counters = {"searches": 0, "search_ms": 0.0, "index_builds": 0, "build_ms": 0.0}
+
+    async def search(self, db, filters: dict, limit: int, cursor: str = None) -> dict:
+        started = time.perf_counter()
+        after = decode_rank_cursor(cursor)
+        criteria = {name: value.strip() for name, value in filters.items() if value and value.strip()}
+        if self.use_database or not criteria:
+            # Plain listings walk the primary key, so they never need the n-gram index
+            rows = await user_repository.search_farmers(db, criteria, limit, after)
+            items = [user for user, _ in rows]
+            keys = [(rank, user.id) for user, rank in rows]
+        else:
+            index = await self._snapshot(db)
+            pending = [record for _, record in self.pending.values()]
+            keys = await run_in_threadpool(self._rank, index, pending, criteria, limit, after)
+            items = await user_repository.get_users_by_ids(db, [user_id for _, user_id in keys])
+
+        self.counters["searches"] += 1
+        self.counters["search_ms"] += (time.perf_counter() - started) * 1000
+        # A full page means there may be more matches after the last one
+        return {"items": items, "next_cursor": encode_rank_cursor(*keys[-1]) if len(keys) == limit else None}
+
+    def _rank(self, index: FarmerSearchIndex, pending: List[tuple], criteria: dict, limit: int, after=None):
+        ids, ranks = index.search(criteria)
+        query = _prepare(criteria)
+        scored = [(record["id"], rank) for record in pending if (rank := _score_record(record, query, self.min_score))]
+        if scored:
+            ids = np.concatenate([ids, [user_id for user_id, _ in scored]])
+            ranks = np.concatenate([ranks, [rank for _, rank in scored]])
+        if after:
+            keep = (ranks < after[0]) | ((ranks == after[0]) & (ids < after[1]))
+            ids, ranks = ids[keep], ranks[keep]
+        order = _top(ids, ranks, limit)
+        return [(float(rank), int(user_id)) for rank, user_id in zip(ranks[order], ids[order])]
+
+    async def _snapshot(self, db) -> FarmerSearchIndex:
+        if self.index is None:
+            async with self._build_lock:
+                if self.index is None:
+                    await self._rebuild(db)
+        elif not self._refreshing and (
+            time.time() - self.index.built_at > self.ttl_seconds or len(self.pending) > self.max_delta
+        ):
+            # Keep answering from the current snapshot while a fresh one loads
+            self._refreshing = True
+            asyncio.create_task(self._refresh())
+        return self.index
+
+    async def _refresh(self):
+        try:
+            async with db_manager.session() as db:
+                await self._rebuild(db)
+        except Exception as e:
+            logger.error(f"Farmer search index rebuild failed: {e}")
+        finally:
+            self._refreshing = False
+
+    async def _rebuild(self, db):
+        started = time.time()
+        perf_started = time.perf_counter()
+        rows = await user_repository.get_farmer_search_rows(db)
+        index = await run_in_threadpool(FarmerSearchIndex, rows, self.min_score, started)
+        # Writes that landed while the rows were loading stay pending on top of the new snapshot
+        self.pending = {user_id: entry for user_id, entry in self.pending.items() if entry[0] >= started}
+        for user_id in self.pending:
+            index.retire(user_id)
+        self.index = index
+        self.counters["index_builds"] += 1
+        self.counters["build_ms"] += (time.perf_counter() - perf_started) * 1000
+
+    def upsert(self, user):
+        """Makes a farmer created or edited through this process searchable before the next rebuild."""
+        if self.use_database or user is None or user.role != "Farmer":
+            return
+        if self.index is None and not self._build_lock.locked():
+            return
+        self.pending[user.id] = (time.time(), _record(user))
+        if self.index is not None:
+            self.index.retire(user.id)
+
+    def stats(self) -> dict:
+        return {
+            "backend": "postgresql" if self.use_database else "ngram",
+            "indexed_rows": len(self.index.ids) if self.index is not None else 0,
+            "pending_rows": len(self.pending),
+            **self.counters,
+            "search_ms": round(self.counters["search_ms"], 3),
+            "build_ms": round(self.counters["build_ms"], 3),
+        }
+
+farmer_search_service = FarmerSearchService()
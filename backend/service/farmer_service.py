@@ -1,91 +1,117 @@
-from repository.user_repository import user_repository
-from repository.land_repository import land_repository
-from repository.crop_repository import crop_repository
-from repository.history_repository import history_repository
-from repository.notification_repository import notification_repository
+from repository.user_repository import async_user_repository as user_repository
+from repository.land_repository import async_land_repository as land_repository
+from repository.crop_repository import async_crop_repository as crop_repository
+from repository.history_repository import async_history_repository as history_repository
+from repository.notification_repository import async_notification_repository as notification_repository
+from repository.dashboard_repository import async_dashboard_repository as dashboard_repository
+from service.user_cache import user_cache
+from service.farmer_search_service import farmer_search_service
+from service.chat_context_service import chat_context_service
+from utils.db_manager import db_manager
+from utils.ttl_cache import TTLCache
+from utils.pagination import decode_cursor, next_cursor
+from config import settings
 from fastapi import HTTPException
 
 class FarmerService:
-    def get_profile(self, username: str):
-        user = user_repository.get_user_by_username(username)
-        if not user:
-            raise HTTPException(status_code=404, detail="User not found")
+    def __init__(self):
+        # Disabled unless DASHBOARD_CACHE_TTL_SECONDS > 0; entries are dropped on every relevant write
+        self.dashboard_cache = TTLCache(settings.DASHBOARD_CACHE_TTL_SECONDS, settings.DASHBOARD_CACHE_MAX_SIZE)
+
+    def invalidate_dashboard(self, farmer_id=None):
+        if farmer_id is None:
+            self.dashboard_cache.clear()
+        else:
+            self.dashboard_cache.invalidate(farmer_id)
+
+    async def get_profile(self, db, current_user: dict):
+        user = await user_cache.get_user(db, current_user)
         return user
 
-    def update_profile(self, username: str, profile_data: dict):
-        user = user_repository.get_user_by_username(username)
-        if not user:
-            raise HTTPException(status_code=404, detail="User not found")
-        return user_repository.update_profile(user.id, profile_data)
+    async def update_profile(self, db, current_user: dict, profile_data: dict):
+        user = await user_cache.get_user(db, current_user)
+        updated_user = await user_repository.update_profile(db, user.id, profile_data)
+        await db_manager.commit(db)
+        user_cache.invalidate(user.id)
+        self.invalidate_dashboard(user.id)
+        chat_context_service.invalidate(user.id)
+        farmer_search_service.upsert(updated_user)
+        return updated_user
 
-    def add_land(self, username: str, land_data: dict):
-        user = user_repository.get_user_by_username(username)
-        if not user:
-            raise HTTPException(status_code=404, detail="User not found")
+    async def add_land(self, db, current_user: dict, land_data: dict):
+        user = await user_cache.get_user(db, current_user)
         land_data['farmer_id'] = user.id
-        return land_repository.create_land(land_data)
-
-    def get_lands(self, username: str):
-        user = user_repository.get_user_by_username(username)
-        if not user:
-            raise HTTPException(status_code=404, detail="User not found")
-        return land_repository.get_lands_by_farmer(user.id)
-
-    def add_crop(self, username: str, crop_data: dict):
-        user = user_repository.get_user_by_username(username)
-        if not user:
-            raise HTTPException(status_code=404, detail="User not found")
+        new_land = await land_repository.create_land(db, land_data)
+        await db_manager.commit(db)
+        self.invalidate_dashboard(user.id)
+        return new_land
+
+    async def get_lands(self, db, current_user: dict):
+        user = await user_cache.get_user(db, current_user)
+        return await land_repository.get_lands_by_farmer(db, user.id)
+
+    async def add_crop(self, db, current_user: dict, crop_data: dict):
+        user = await user_cache.get_user(db, current_user)
         crop_data['farmer_id'] = user.id
-        return crop_repository.create_crop(crop_data)
-
-    def get_crops(self, username: str):
-        user = user_repository.get_user_by_username(username)
-        if not user:
-            raise HTTPException(status_code=404, detail="User not found")
-        return crop_repository.get_crops_by_farmer(user.id)
-
-    def add_history(self, username: str, history_data: dict):
-        user = user_repository.get_user_by_username(username)
-        if not user:
-            raise HTTPException(status_code=404, detail="User not found")
+        new_crop = await crop_repository.create_crop(db, crop_data)
+        await db_manager.commit(db)
+        self.invalidate_dashboard(user.id)
+        chat_context_service.invalidate(user.id)
+        return new_crop
+
+    async def get_crops(self, db, current_user: dict):
+        user = await user_cache.get_user(db, current_user)
+        return await crop_repository.get_crops_by_farmer(db, user.id)
+
+    async def add_history(self, db, current_user: dict, history_data: dict):
+        user = await user_cache.get_user(db, current_user)
         history_data['farmer_id'] = user.id
-        return history_repository.create_history(history_data)
-
-    def get_history(self, username: str):
-        user = user_repository.get_user_by_username(username)
-        if not user:
-            raise HTTPException(status_code=404, detail="User not found")
-        return history_repository.get_history_by_farmer(user.id)
-
-    def get_notifications(self, username: str):
-        user = user_repository.get_user_by_username(username)
-        if not user:
-            raise HTTPException(status_code=404, detail="User not found")
-        return notification_repository.get_notifications_for_user(user.id)
-
-    def mark_notification_read(self, notification_id: int):
-        return notification_repository.mark_as_read(notification_id)
-
-    def get_dashboard_summary(self, username: str):
-        user = user_repository.get_user_by_username(username)
-        if not user:
-            raise HTTPException(status_code=404, detail="User not found")
-        
-        lands = land_repository.get_lands_by_farmer(user.id)
-        crops = crop_repository.get_crops_by_farmer(user.id)
-        notifications = notification_repository.get_notifications_for_user(user.id)
-        
-        total_land_area = sum(float(l.area_size or 0) for l in lands)
-        active_crops_count = len(crops)
-        unread_notifications_count = len([n for n in notifications if not n.is_read])
-        
+        new_history = await history_repository.create_history(db, history_data)
+        await db_manager.commit(db)
+        chat_context_service.invalidate(user.id)
+        return new_history
+
+    async def get_history(self, db, current_user: dict):
+        user = await user_cache.get_user(db, current_user)
+        return await history_repository.get_history_by_farmer(db, user.id)
+
+    async def get_notifications(self, db, current_user: dict, limit: int, cursor: str = None):
+        user = await user_cache.get_user(db, current_user)
+        items = await notification_repository.get_notification_page(db, user.id, limit, decode_cursor(cursor))
+        return {"items": items, "next_cursor": next_cursor(items, limit)}
+
+    async def get_unread_count(self, db, current_user: dict):
+        user = await user_cache.get_user(db, current_user)
+        return {"unread": await notification_repository.count_unread(db, user.id)}
+
+    async def mark_notification_read(self, db, notification_id: int):
+        notif = await notification_repository.mark_as_read(db, notification_id)
+        if not notif:
+            return False
+        await db_manager.commit(db)
+        # Global notifications count towards every farmer's unread total
+        self.invalidate_dashboard(notif.farmer_id)
+        return True
+
+    async def get_dashboard_summary(self, db, current_user: dict):
+        user = await user_cache.get_user(db, current_user)
+
+        summary = self.dashboard_cache.get(user.id)
+        if summary is None:
+            counts = await dashboard_repository.get_summary_counts(db, user.id)
+            recent_notifications = await notification_repository.get_recent_notifications(db, user.id, 3)
+            summary = {
+                "farmer_name": user.full_name,
+                "total_lands": counts["total_lands"],
+                "total_area": round(float(counts["total_area"] or 0), 2),
+                "active_crops": counts["active_crops"],
+                "unread_notifications": counts["unread_notifications"],
+                "recent_notifications": recent_notifications,
+            }
+            self.dashboard_cache.set(user.id, summary)
+
         return {
-            "farmer_name": user.full_name,
-            "total_lands": len(lands),
-            "total_area": round(total_land_area, 2),
-            "active_crops": active_crops_count,
-            "unread_notifications": unread_notifications_count,
-            "recent_notifications": notifications[:3],
+            **summary,
             "weather": {
                 "temp": 28,
                 "condition": "Sunny",
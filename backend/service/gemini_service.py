@@ -1,11 +1,41 @@
 import google.generativeai as genai
-from typing import List, Optional
+from google.api_core import exceptions as google_exceptions
+from contextlib import aclosing
+from typing import List, Optional, Union
+import asyncio
+import hashlib
 import json
 import logging
+import random
 from config import settings
+from service.diagnosis_cache import diagnosis_cache
+from utils.retry_budget import RetryBudget
 
 logger = logging.getLogger(__name__)
 
+RETRYABLE_ERRORS = (
+    asyncio.TimeoutError,
+    google_exceptions.TooManyRequests,
+    google_exceptions.ServiceUnavailable,
+    google_exceptions.InternalServerError,
+    google_exceptions.DeadlineExceeded,
+)
+RETRY_BASE_DELAY_SECONDS = 0.5
+
+# Raw bytes (assumed JPEG) or a preprocessed part from image_service: {"mime_type": ..., "data": ..., "phash": ...}
+ImageInput = Union[bytes, dict]
+
+def _image_digest(img: ImageInput) -> str:
+    # Uploads arrive already hashed by the streaming reader
+    if isinstance(img, dict) and img.get("sha256"):
+        return img["sha256"]
+    return hashlib.sha256(image_part(img)["data"]).hexdigest()
+
+def image_part(img: ImageInput) -> dict:
+    if isinstance(img, dict):
+        return {"mime_type": img["mime_type"], "data": img["data"]}
+    return {"mime_type": "image/jpeg", "data": img}
+
 class GeminiService:
     def __init__(self):
         self.api_key = settings.GEMINI_API_KEY
@@ -16,23 +46,126 @@ class GeminiService:
         else:
             self.model = None
             logger.warning("GEMINI_API_KEY not found in settings.")
+        self.timeout_seconds = settings.GEMINI_TIMEOUT_SECONDS
+        self.max_retries = settings.GEMINI_MAX_RETRIES
+        self.semaphore = asyncio.Semaphore(settings.GEMINI_MAX_CONCURRENCY)
+        self.retry_budget = RetryBudget(ratio=settings.GEMINI_RETRY_BUDGET_RATIO)
+        self.counters = {"calls": 0, "in_flight": 0, "waiting": 0, "timeouts": 0, "retries": 0, "retries_denied": 0, "errors": 0}
 
-    async def analyze_crop_disease(
-        self, 
-        images: List[bytes], 
-        crop_type: str, 
-        location: str, 
-        weather_data: dict, 
-        history: List[dict],
-        language: str = "en",
-        message: Optional[str] = None
-    ):
+    async def generate(self, contents, **kwargs):
+        """
+        Awaitable generate_content: at most GEMINI_MAX_CONCURRENCY calls run at once, each attempt
+        gets GEMINI_TIMEOUT_SECONDS, and transient failures are retried with full jitter while the
+        shared retry budget allows it.
+        """
+        return await self._with_retries(self._generate_once, contents, **kwargs)
+
+    async def _with_retries(self, call, contents, **kwargs):
         if not self.model:
-            return {"error": "Gemini API key not configured"}
+            raise RuntimeError("Gemini API key not configured")
+        self.counters["calls"] += 1
+        self.retry_budget.record_request()
+        attempt = 0
+        while True:
+            try:
+                return await call(contents, **kwargs)
+            except RETRYABLE_ERRORS as e:
+                if isinstance(e, asyncio.TimeoutError):
+                    self.counters["timeouts"] += 1
+                if attempt >= self.max_retries:
+                    self.counters["errors"] += 1
+                    raise
+                if not self.retry_budget.try_spend():
+                    self.counters["retries_denied"] += 1
+                    self.counters["errors"] += 1
+                    raise
+                attempt += 1
+                self.counters["retries"] += 1
+                delay = random.uniform(0, RETRY_BASE_DELAY_SECONDS * 2 ** attempt)
+                logger.warning(f"Gemini call failed ({type(e).__name__}), retry {attempt} in {delay:.2f}s")
+                await asyncio.sleep(delay)
+            except Exception:
+                self.counters["errors"] += 1
+                raise
+
+    async def _acquire(self):
+        self.counters["waiting"] += 1
+        try:
+            await self.semaphore.acquire()
+        finally:
+            self.counters["waiting"] -= 1
+        self.counters["in_flight"] += 1
+
+    def _release(self):
+        self.counters["in_flight"] -= 1
+        self.semaphore.release()
+
+    async def _generate_once(self, contents, **kwargs):
+        await self._acquire()
+        try:
+            return await asyncio.wait_for(
+                self.model.generate_content_async(contents, **kwargs), timeout=self.timeout_seconds
+            )
+        finally:
+            self._release()
+
+    async def _open_stream_once(self, contents):
+        # On success the permit stays taken: generate_stream gives it back after the last chunk
+        await self._acquire()
+        try:
+            return await asyncio.wait_for(
+                self.model.generate_content_async(contents, stream=True), timeout=self.timeout_seconds
+            )
+        except BaseException:
+            self._release()
+            raise
+
+    def stats(self) -> dict:
+        return {**self.counters, "retry_tokens": round(self.retry_budget.tokens, 2)}
 
+    async def generate_stream(self, contents):
+        """
+        Streams the model's text as it arrives. Opening the stream shares the deadline and retry
+        budget of `generate`; each later chunk gets its own deadline. The concurrency permit is held
+        until the stream ends, fails or is closed, so GEMINI_MAX_CONCURRENCY counts streams still
+        being read. Close the generator (`aclosing`) when leaving it early.
+        """
+        response = await self._with_retries(self._open_stream_once, contents)
+        try:
+            chunks = response.__aiter__()
+            while True:
+                try:
+                    chunk = await asyncio.wait_for(chunks.__anext__(), timeout=self.timeout_seconds)
+                except StopAsyncIteration:
+                    return
+                except asyncio.TimeoutError:
+                    self.counters["timeouts"] += 1
+                    raise
+                try:
+                    text = chunk.text
+                except ValueError:
+                    # Chunks carrying only safety or finish metadata have no text part
+                    continue
+                if text:
+                    yield text
+        finally:
+            self._release()
+
+    def _build_contents(
+        self,
+        images: List[ImageInput],
+        crop_type: str,
+        location: str,
+        weather_data: dict,
+        history: List[dict],
+        language: str,
+        message: Optional[str],
+        related: Optional[List[dict]] = None
+    ) -> list:
         # Prepare context strings
         history_str = json.dumps(history, indent=2) if history else "No previous history found."
         weather_str = json.dumps(weather_data, indent=2) if weather_data else "Weather data unavailable."
+        related_str = json.dumps(related, indent=2, ensure_ascii=False) if related else "None."
         
         # Determine language priority
         lang_instruction = f"Respond in {language}."
@@ -49,6 +182,7 @@ class GeminiService:
         - Farmer's Location: {location}
         - Current Weather: {weather_str}
         - Farm History: {history_str}
+        - Answers given to similar questions from other farmers (use only where they fit this farmer's situation): {related_str}
         
         {farmer_query}
         
@@ -82,21 +216,99 @@ class GeminiService:
 
         # Prepare contents for Gemini
         contents = [prompt]
-        for img_bytes in images:
-            contents.append({"mime_type": "image/jpeg", "data": img_bytes})
+        for img in images:
+            contents.append(image_part(img))
+
+        return contents
+
+    def parse_json_response(self, text: str):
+        # Find the JSON block in the response
+        if "```json" in text:
+            text = text.split("```json")[1].split("```")[0].strip()
+        elif "```" in text:
+            text = text.split("```")[1].split("```")[0].strip()
+        return json.loads(text)
+
+    def _cache_key(self, images: List[ImageInput], crop_type: str, language: str, message: Optional[str], weather_data: dict) -> str:
+        # Identical photos asked about the same way under similar weather get the stored answer
+        return diagnosis_cache.make_key(
+            [_image_digest(img) for img in images], crop_type, language, message, weather_data
+        )
+
+    async def analyze_crop_disease(
+        self, 
+        images: List[ImageInput], 
+        crop_type: str, 
+        location: str, 
+        weather_data: dict, 
+        history: List[dict],
+        language: str = "en",
+        message: Optional[str] = None,
+        related: Optional[List[dict]] = None
+    ):
+        if not self.model:
+            return {"error": "Gemini API key not configured"}
+
+        cache_key = self._cache_key(images, crop_type, language, message, weather_data)
+        cached = await diagnosis_cache.get(cache_key)
+        if cached is not None:
+            return {**cached, "cached": True}
+
+        contents = self._build_contents(images, crop_type, location, weather_data, history, language, message, related)
 
         try:
-            response = self.model.generate_content(contents)
-            # Find the JSON block in the response
-            text = response.text
-            if "```json" in text:
-                text = text.split("```json")[1].split("```")[0].strip()
-            elif "```" in text:
-                text = text.split("```")[1].split("```")[0].strip()
-            
-            return json.loads(text)
+            response = await self.generate(contents)
+            result = self.parse_json_response(response.text)
+            if isinstance(result, dict):
+                await diagnosis_cache.set(cache_key, result)
+            return result
         except Exception as e:
             logger.error(f"Error calling Gemini: {e}")
             return {"error": str(e)}
 
+    async def analyze_crop_disease_stream(
+        self,
+        images: List[ImageInput],
+        crop_type: str,
+        location: str,
+        weather_data: dict,
+        history: List[dict],
+        language: str = "en",
+        message: Optional[str] = None,
+        related: Optional[List[dict]] = None
+    ):
+        """
+        Streaming twin of `analyze_crop_disease`. Yields (event, data) pairs: a "status" event when
+        the model starts, "chunk" events with raw model text, then exactly one "result" or "error".
+        """
+        if not self.model:
+            yield "error", {"error": "Gemini API key not configured"}
+            return
+
+        cache_key = self._cache_key(images, crop_type, language, message, weather_data)
+        cached = await diagnosis_cache.get(cache_key)
+        if cached is not None:
+            yield "result", {**cached, "cached": True}
+            return
+
+        contents = self._build_contents(images, crop_type, location, weather_data, history, language, message, related)
+        yield "status", {"stage": "model_started"}
+
+        try:
+            parts = []
+            # Closed right away if the client goes, which gives back the stream's concurrency permit
+            async with aclosing(self.generate_stream(contents)) as stream:
+                async for text in stream:
+                    parts.append(text)
+                    yield "chunk", {"text": text}
+            result = self.parse_json_response("".join(parts))
+        except Exception as e:
+            logger.error(f"Error streaming from Gemini: {e}")
+            yield "error", {"error": str(e)}
+            return
+
+        if isinstance(result, dict):
+            await diagnosis_cache.set(cache_key, result)
+        yield "result", result
+
 gemini_service = GeminiService()
@@ -0,0 +1,100 @@
+import logging
+import time
+from datetime import timezone
+from typing import List, Optional
+from repository.discussion_repository import async_discussion_repository as discussion_repository
+from service.diagnosis_cache import normalise
+from utils.hamming_index import HammingIndex
+from utils.ttl_cache import TTLCache
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_QUESTION = "Image-based Analysis"
+
+def _timestamp(created_at) -> float:
+    if created_at is None:
+        return time.time()
+    if created_at.tzinfo is None:
+        # SQLite hands back naive UTC values
+        created_at = created_at.replace(tzinfo=timezone.utc)
+    return created_at.timestamp()
+
+class ImageIndexService:
+    """
+    Finds recent diagnoses of near-identical photos so a second shot of the same leaf does not cost
+    another model call. One multi-index Hamming table of dHashes per (farmer, crop) is built from the
+    discussions table on first use and kept for PHASH_INDEX_TTL_SECONDS, then rebuilt so old rows age out.
+    """
+    def __init__(self):
+        self.max_distance = settings.PHASH_MAX_DISTANCE
+        self.max_age_seconds = settings.PHASH_MAX_AGE_DAYS * 24 * 3600
+        self.load_limit = settings.PHASH_INDEX_LOAD_LIMIT
+        self.indexes = TTLCache(settings.PHASH_INDEX_TTL_SECONDS, settings.PHASH_INDEX_MAX_KEYS)
+        self.counters = {"lookups": 0, "matches": 0, "index_loads": 0, "lookup_ms": 0.0}
+
+    async def _index(self, db, farmer_id: int, crop_type: str) -> HammingIndex:
+        key = (farmer_id, crop_type)
+        index = self.indexes.get(key)
+        if index is not None:
+            return index
+
+        index = HammingIndex(self.max_distance)
+        rows = await discussion_repository.get_hashed_discussions(db, farmer_id, crop_type, self.load_limit)
+        for row in reversed(rows):
+            payload = (row.id, _timestamp(row.created_at), normalise(row.question))
+            for digest in row.image_hashes.split(","):
+                index.add(int(digest, 16), payload)
+        self.indexes.set(key, index)
+        self.counters["index_loads"] += 1
+        return index
+
+    async def find_match(self, db, farmer_id: int, crop_type: str, hashes: List[Optional[str]], message: Optional[str]) -> Optional[dict]:
+        """
+        The stored answer of the newest recent discussion where every photo has a near-duplicate and
+        the question is the same, marked with `near_duplicate_of`; None when there is nothing to reuse.
+        """
+        if not hashes or None in hashes:
+            return None
+        index = await self._index(db, farmer_id, crop_type)
+        if not len(index):
+            return None
+
+        started = time.perf_counter()
+        question = normalise(message or DEFAULT_QUESTION)
+        cutoff = time.time() - self.max_age_seconds
+        candidates = None
+        for digest in hashes:
+            ids = {
+                discussion_id
+                for _, (discussion_id, created_at, asked) in index.search(int(digest, 16), self.max_distance)
+                if created_at >= cutoff and asked == question
+            }
+            candidates = ids if candidates is None else candidates & ids
+            if not candidates:
+                break
+        self.counters["lookups"] += 1
+        self.counters["lookup_ms"] += (time.perf_counter() - started) * 1000
+        if not candidates:
+            return None
+
+        discussion = await discussion_repository.get_discussion_by_id(db, max(candidates))
+        result = discussion.answer if discussion else None
+        if not isinstance(result, dict):
+            return None
+        self.counters["matches"] += 1
+        return {**result, "cached": True, "near_duplicate_of": discussion.id}
+
+    def add(self, farmer_id: int, crop_type: str, hashes: List[Optional[str]], discussion_id: int, message: Optional[str]):
+        # Indexes not loaded yet will pick the row up from the table when they are built
+        index = self.indexes.get((farmer_id, crop_type))
+        if index is None or not hashes or None in hashes:
+            return
+        payload = (discussion_id, time.time(), normalise(message or DEFAULT_QUESTION))
+        for digest in hashes:
+            index.add(int(digest, 16), payload)
+
+    def stats(self) -> dict:
+        return {**self.counters, "lookup_ms": round(self.counters["lookup_ms"], 3), "indexed_keys": len(self.indexes)}
+
+image_index_service = ImageIndexService()
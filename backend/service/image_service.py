@@ -0,0 +1,150 @@
+import asyncio
+import io
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Union
+from PIL import Image, ImageOps, UnidentifiedImageError
+from config import settings
+from utils.uploads import SpooledUpload
+
+logger = logging.getLogger(__name__)
+
+MIME_TYPES = {
+    "JPEG": "image/jpeg",
+    "PNG": "image/png",
+    "WEBP": "image/webp",
+    "HEIF": "image/heic",
+    "GIF": "image/gif",
+}
+
+def sniff_mime_type(data: bytes) -> str:
+    if data[:3] == b"\xff\xd8\xff":
+        return "image/jpeg"
+    if data[:8] == b"\x89PNG\r\n\x1a\n":
+        return "image/png"
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "image/webp"
+    if data[4:12] in (b"ftypheic", b"ftypheix", b"ftypmif1"):
+        return "image/heic"
+    if data[:6] in (b"GIF87a", b"GIF89a"):
+        return "image/gif"
+    return "application/octet-stream"
+
+def dhash(img: Image.Image) -> str:
+    """64-bit difference hash as 16 hex digits: survives re-encoding, rescaling and small shifts."""
+    pixels = list(img.convert("L").resize((9, 8), Image.BILINEAR).getdata())
+    bits = 0
+    for row in range(8):
+        for col in range(8):
+            bits = (bits << 1) | (pixels[row * 9 + col] > pixels[row * 9 + col + 1])
+    return f"{bits:016x}"
+
+def _raw_bytes(source: Union[bytes, str]) -> bytes:
+    if isinstance(source, bytes):
+        return source
+    with open(source, "rb") as f:
+        return f.read()
+
+def preprocess_image(source: Union[bytes, str], max_edge: int, quality: int) -> dict:
+    """
+    Decode, apply EXIF orientation, downscale to `max_edge` and re-encode as JPEG, computing the
+    perceptual hash on the way. `source` is the image bytes or the path of a spooled upload, which
+    keeps large originals out of the parent process. Runs in a worker process, so it only takes and
+    returns picklable values. Undecodable input and images that would not get smaller are passed
+    through untouched.
+    """
+    try:
+        with Image.open(io.BytesIO(source) if isinstance(source, bytes) else source) as img:
+            source_format = img.format
+            orientation = img.getexif().get(0x0112, 1)
+            needs_resize = max(img.size) > max_edge
+            if source_format == "JPEG" and orientation == 1 and not needs_resize:
+                return {"mime_type": "image/jpeg", "data": _raw_bytes(source), "phash": dhash(img)}
+
+            if needs_resize and source_format == "JPEG":
+                # Let libjpeg decode at 1/2, 1/4 or 1/8 scale instead of inflating every pixel
+                scale = max_edge / max(img.size)
+                img.draft("RGB", (int(img.width * scale), int(img.height * scale)))
+            img = ImageOps.exif_transpose(img)
+            if needs_resize:
+                img.thumbnail((max_edge, max_edge), Image.LANCZOS, reducing_gap=3.0)
+            if img.mode != "RGB":
+                # Transparent areas become white rather than black
+                background = Image.new("RGB", img.size, (255, 255, 255))
+                rgba = img.convert("RGBA")
+                background.paste(rgba, mask=rgba.getchannel("A"))
+                img = background
+
+            phash = dhash(img)
+            out = io.BytesIO()
+            img.save(out, format="JPEG", quality=quality)
+            encoded = out.getvalue()
+    except (UnidentifiedImageError, OSError, ValueError) as e:
+        data = _raw_bytes(source)
+        return {"mime_type": sniff_mime_type(data), "data": data, "phash": None, "error": str(e)}
+
+    if len(encoded) >= (len(source) if isinstance(source, bytes) else os.path.getsize(source)) and not needs_resize and orientation == 1:
+        data = _raw_bytes(source)
+        return {"mime_type": MIME_TYPES.get(source_format, sniff_mime_type(data)), "data": data, "phash": phash}
+    return {"mime_type": "image/jpeg", "data": encoded, "phash": phash}
+
+class ImageService:
+    """
+    Shrinks uploaded photos before they are sent to the model. Decoding and re-encoding is CPU bound,
+    so it runs on a small process pool (IMAGE_WORKERS) instead of the event loop.
+    """
+    def __init__(self):
+        self.max_edge = settings.IMAGE_MAX_EDGE
+        self.quality = settings.IMAGE_JPEG_QUALITY
+        self.workers = settings.IMAGE_WORKERS
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self.counters = {"images": 0, "bytes_in": 0, "bytes_out": 0, "undecodable": 0, "total_ms": 0.0}
+
+    @property
+    def pool(self) -> Optional[ProcessPoolExecutor]:
+        if self._pool is None and self.workers > 0:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers)
+        return self._pool
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    async def prepare(self, images: List[Union[bytes, SpooledUpload]]) -> List[dict]:
+        """
+        Returns image parts ({"mime_type", "data", "phash"}) in the same order as `images`. Parts made
+        from spooled uploads also carry the upload's "sha256", computed while it was streamed in.
+        """
+        if not images:
+            return []
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        # IMAGE_WORKERS=0 falls back to the default thread pool, still off the event loop
+        parts = await asyncio.gather(*(
+            loop.run_in_executor(
+                self.pool, preprocess_image, img.source if isinstance(img, SpooledUpload) else img, self.max_edge, self.quality
+            )
+            for img in images
+        ))
+        elapsed_ms = (time.perf_counter() - started) * 1000
+
+        for original, part in zip(images, parts):
+            self.counters["images"] += 1
+            if isinstance(original, SpooledUpload):
+                self.counters["bytes_in"] += original.size
+                part["sha256"] = original.sha256
+            else:
+                self.counters["bytes_in"] += len(original)
+            self.counters["bytes_out"] += len(part["data"])
+            if part.pop("error", None):
+                self.counters["undecodable"] += 1
+        self.counters["total_ms"] += elapsed_ms
+        return parts
+
+    def stats(self) -> dict:
+        return {**self.counters, "total_ms": round(self.counters["total_ms"], 2)}
+
+image_service = ImageService()
@@ -0,0 +1,154 @@
+import asyncio
+import json
+import logging
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Dict, Optional
+from fastapi import HTTPException
+from repository.job_repository import async_job_repository as job_repository
+from utils.db_manager import db_manager
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+class JobLeaseLost(Exception):
+    """The job's lease ran out and another runner has taken it over; this one must stop."""
+
+def _lease_until(lease_seconds: float) -> datetime:
+    return datetime.now(timezone.utc) + timedelta(seconds=lease_seconds)
+
+class JobContext:
+    """Handed to job handlers: the submitted params plus the last saved checkpoint, for resuming."""
+    def __init__(self, job, owner: str, lease_seconds: float):
+        self.id = job.id
+        self.owner = owner
+        self.lease_seconds = lease_seconds
+        self.job_type = job.job_type
+        self.params = json.loads(job.params) if job.params else {}
+        self.checkpoint = json.loads(job.checkpoint) if job.checkpoint else {}
+        self.total = job.total or 0
+        self.processed = job.processed or 0
+
+    async def save_progress(self, db, processed: Optional[int] = None, total: Optional[int] = None, checkpoint: Optional[dict] = None):
+        """
+        Runs in the handler's own transaction, so a chunk of work and its checkpoint commit together,
+        and renews the lease. Raises JobLeaseLost, before the chunk commits, if the job was taken over.
+        """
+        job_data = {"lease_expires_at": _lease_until(self.lease_seconds)}
+        if processed is not None:
+            self.processed = processed
+            job_data["processed"] = processed
+        if total is not None:
+            self.total = total
+            job_data["total"] = total
+        if checkpoint is not None:
+            self.checkpoint = checkpoint
+            job_data["checkpoint"] = json.dumps(checkpoint)
+        if not await job_repository.update_owned_job(db, self.id, self.owner, job_data):
+            raise JobLeaseLost(f"Job {self.id} is no longer held by {self.owner}")
+
+JobHandler = Callable[[JobContext], Awaitable[dict]]
+
+class JobRunner:
+    """
+    Runs long admin tasks outside the request. Job state lives in the `jobs` table, so
+    unfinished jobs are picked up again by `resume()` after a restart. Every worker process resumes
+    every unfinished job, so a job is claimed with a conditional UPDATE before it runs: only a pending
+    job, or a running one whose JOB_LEASE_SECONDS lease has run out, can be taken, and only by one runner.
+    """
+    def __init__(self, max_workers: int, lease_seconds: float = 300):
+        self.max_workers = max_workers
+        self.lease_seconds = lease_seconds
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.handlers: Dict[str, JobHandler] = {}
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._tasks = set()
+
+    def register(self, job_type: str, handler: JobHandler):
+        self.handlers[job_type] = handler
+
+    async def submit(self, db, job_type: str, params: dict):
+        if job_type not in self.handlers:
+            raise ValueError(f"No handler registered for job type '{job_type}'")
+        job = await job_repository.create_job(db, {
+            "job_type": job_type,
+            "status": "pending",
+            "params": json.dumps(params)
+        })
+        await db_manager.commit(db)
+        self._schedule(job.id)
+        return job
+
+    async def get_job(self, db, job_id: int):
+        job = await job_repository.get_job(db, job_id)
+        if not job:
+            raise HTTPException(status_code=404, detail="Job not found")
+        return self.describe(job)
+
+    async def resume(self):
+        async with db_manager.session() as db:
+            job_ids = await job_repository.get_unfinished_job_ids(db)
+        for job_id in job_ids:
+            logger.info(f"Resuming job {job_id}")
+            self._schedule(job_id)
+
+    def describe(self, job) -> dict:
+        return {
+            "id": job.id,
+            "job_type": job.job_type,
+            "status": job.status,
+            "total": job.total or 0,
+            "processed": job.processed or 0,
+            "progress": round(job.processed / job.total, 4) if job.total else 0.0,
+            "result": json.loads(job.result) if job.result else None,
+            "error": job.error,
+            "created_at": job.created_at,
+            "updated_at": job.updated_at
+        }
+
+    def _schedule(self, job_id: int):
+        task = asyncio.create_task(self._run(job_id))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, job_id: int):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_workers)
+
+        async with self._semaphore:
+            async with db_manager.session() as db:
+                claimed = await job_repository.claim_job(
+                    db, job_id, self.owner, datetime.now(timezone.utc), _lease_until(self.lease_seconds)
+                )
+                await db_manager.commit(db)
+                if not claimed:
+                    # Finished, or running under another runner's lease
+                    return
+                job = await job_repository.get_job(db, job_id)
+                handler = self.handlers.get(job.job_type)
+                context = JobContext(job, self.owner, self.lease_seconds)
+
+            if handler is None:
+                job_data = {"status": "failed", "error": f"No handler registered for job type '{context.job_type}'"}
+            else:
+                try:
+                    result = await handler(context)
+                    job_data = {"status": "completed", "result": json.dumps(result, default=str), "error": None}
+                except JobLeaseLost as e:
+                    logger.warning(f"Job {job_id} stopped: {e}")
+                    return
+                except HTTPException as e:
+                    job_data = {"status": "failed", "error": str(e.detail)}
+                except Exception as e:
+                    logger.exception(f"Job {job_id} failed")
+                    job_data = {"status": "failed", "error": str(e)}
+
+            async with db_manager.session() as db:
+                finished = await job_repository.update_owned_job(db, job_id, self.owner, {**job_data, "lease_expires_at": None})
+                await db_manager.commit(db)
+            if not finished:
+                logger.warning(f"Job {job_id} was taken over before it finished here; its outcome was not recorded")
+
+job_runner = JobRunner(settings.JOB_WORKERS, settings.JOB_LEASE_SECONDS)
@@ -0,0 +1,150 @@
+import asyncio
+import logging
+import time
+from typing import List, Optional, Tuple
+from fastapi.concurrency import run_in_threadpool
+from repository.discussion_repository import async_discussion_repository as discussion_repository
+from service.diagnosis_cache import normalise
+from service.image_index_service import DEFAULT_QUESTION
+from utils.db_manager import db_manager
+from utils.text_index import TextIndex
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+# Markers earlier lookups put on a result; a reused answer only carries the ones of this lookup
+RESULT_FLAGS = ("cached", "near_duplicate_of", "similar_question_of", "similarity", "related_discussions")
+
+def _related(discussion) -> dict:
+    # Enough of a past answer to steer the model without blowing up the prompt
+    answer = discussion.answer if isinstance(discussion.answer, dict) else {}
+    return {
+        "id": discussion.id,
+        "question": discussion.question,
+        "diagnosis": answer.get("diagnosis"),
+        "diseases": answer.get("diseases"),
+        "severity": answer.get("severity"),
+    }
+
+class QuestionIndexService:
+    """
+    Retrieval over the questions of past text-only discussions, so repeat questions about the same
+    crop skip the model. A match at QUESTION_REUSE_MIN_SCORE cosine similarity or above is answered
+    with its stored diagnosis; otherwise the top QUESTION_CONTEXT_TOP_K matches above
+    QUESTION_CONTEXT_MIN_SCORE go to the model as context. The TextIndex is built from the
+    discussions table on first use, extended as discussions are saved, and rebuilt in the background
+    after QUESTION_INDEX_TTL_SECONDS or QUESTION_INDEX_MAX_DELTA additions so term weights stay current.
+    """
+    def __init__(self):
+        self.enabled = settings.QUESTION_INDEX_ENABLED
+        self.reuse_score = settings.QUESTION_REUSE_MIN_SCORE
+        self.context_score = settings.QUESTION_CONTEXT_MIN_SCORE
+        self.context_limit = settings.QUESTION_CONTEXT_TOP_K
+        self.load_limit = settings.QUESTION_INDEX_LOAD_LIMIT
+        self.ttl_seconds = settings.QUESTION_INDEX_TTL_SECONDS
+        self.max_delta = settings.QUESTION_INDEX_MAX_DELTA
+        self.index: Optional[TextIndex] = None
+        self.built_at = 0.0
+        self.crops = {}  # normalised crop type -> group id in the index
+        self.added = []  # (written_at, discussion id, question, group) since the last build started
+        self._build_lock = asyncio.Lock()
+        self._refreshing = False
+        self.counters = {"lookups": 0, "reused": 0, "contexts": 0, "lookup_ms": 0.0, "index_builds": 0, "build_ms": 0.0}
+
+    def _group(self, crop_type: Optional[str]) -> int:
+        return self.crops.setdefault(normalise(crop_type), len(self.crops))
+
+    async def search(self, db, crop_type: str, message: Optional[str]) -> Tuple[Optional[dict], List[dict]]:
+        """
+        (stored answer to reuse, marked with `similar_question_of` and `similarity`, or None;
+        past discussions to give the model as context). Only asked for text-only questions.
+        """
+        if not self.enabled or not message or not message.strip():
+            return None, []
+        index = await self._snapshot(db)
+        started = time.perf_counter()
+        matches = await run_in_threadpool(
+            index.search, message, self.context_limit, self.context_score, self._group(crop_type)
+        )
+        self.counters["lookups"] += 1
+        self.counters["lookup_ms"] += (time.perf_counter() - started) * 1000
+        if not matches:
+            return None, []
+
+        best_id, best_score = matches[0]
+        if best_score >= self.reuse_score:
+            discussion = await discussion_repository.get_discussion_by_id(db, best_id)
+            if discussion is not None and isinstance(discussion.answer, dict):
+                self.counters["reused"] += 1
+                answer = {key: value for key, value in discussion.answer.items() if key not in RESULT_FLAGS}
+                return {**answer, "cached": True, "similar_question_of": discussion.id, "similarity": round(best_score, 3)}, []
+
+        discussions = await discussion_repository.get_discussions_by_ids(db, [discussion_id for discussion_id, _ in matches])
+        self.counters["contexts"] += 1
+        return None, [_related(discussion) for discussion in discussions]
+
+    async def _snapshot(self, db) -> TextIndex:
+        if self.index is None:
+            async with self._build_lock:
+                if self.index is None:
+                    await self._rebuild(db)
+        elif not self._refreshing and (
+            time.time() - self.built_at > self.ttl_seconds or len(self.added) > self.max_delta
+        ):
+            # Keep answering from the current index while a fresh one loads
+            self._refreshing = True
+            asyncio.create_task(self._refresh())
+        return self.index
+
+    async def _refresh(self):
+        try:
+            async with db_manager.session() as db:
+                await self._rebuild(db)
+        except Exception as e:
+            logger.error(f"Question index rebuild failed: {e}")
+        finally:
+            self._refreshing = False
+
+    async def _rebuild(self, db):
+        started = time.time()
+        perf_started = time.perf_counter()
+        rows = await discussion_repository.get_question_rows(db, self.load_limit, DEFAULT_QUESTION)
+        index = await run_in_threadpool(self._build, rows)
+        # Discussions saved while the rows were loading go on top of the new index, unless they made it into the load
+        self.added = [entry for entry in self.added if entry[0] >= started]
+        for _, discussion_id, question, group in self.added:
+            if discussion_id not in index:
+                index.add(question, discussion_id, group)
+        self.index = index
+        self.built_at = started
+        self.counters["index_builds"] += 1
+        self.counters["build_ms"] += (time.perf_counter() - perf_started) * 1000
+
+    def _build(self, rows) -> TextIndex:
+        rows = rows[::-1]  # oldest first, so the index ids ascend
+        return TextIndex(
+            [row.question for row in rows], [row.id for row in rows], [self._group(row.crop_type) for row in rows]
+        )
+
+    def add(self, discussion_id: int, crop_type: str, message: Optional[str]):
+        """Makes a newly saved text-only discussion findable before the next rebuild."""
+        if not self.enabled or not message or not message.strip():
+            return
+        if self.index is None and not self._build_lock.locked():
+            return
+        entry = (time.time(), discussion_id, message, self._group(crop_type))
+        self.added.append(entry)
+        if self.index is not None:
+            self.index.add(message, discussion_id, entry[3])
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "indexed_questions": len(self.index) if self.index is not None else 0,
+            "added_since_build": len(self.added),
+            **self.counters,
+            "lookup_ms": round(self.counters["lookup_ms"], 3),
+            "build_ms": round(self.counters["build_ms"], 3),
+        }
+
+question_index_service = QuestionIndexService()
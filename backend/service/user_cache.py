@@ -0,0 +1,40 @@
+from repository.user_repository import async_user_repository as user_repository
+from models.schemas import User
+from utils.ttl_cache import TTLCache
+from config import settings
+from fastapi import HTTPException
+
+class UserCache:
+    """
+    Resolves the user behind a token without touching the users table on every request.
+    Entries are `User` snapshots keyed by the token's numeric `uid` claim, kept for
+    USER_CACHE_TTL_SECONDS and dropped whenever the profile, status or password changes.
+    """
+    def __init__(self):
+        self.cache = TTLCache(settings.USER_CACHE_TTL_SECONDS, settings.USER_CACHE_MAX_SIZE)
+
+    async def get_user(self, db, claims: dict) -> User:
+        user_id = claims.get("uid")
+        user = self.cache.get(user_id) if user_id is not None else None
+        if user is None:
+            if user_id is not None:
+                record = await user_repository.get_user_by_id(db, user_id)
+            else:
+                # Tokens issued before the uid claim existed only carry the username
+                record = await user_repository.get_user_by_username(db, claims.get("sub"))
+            if not record:
+                raise HTTPException(status_code=404, detail="User not found")
+            user = User.model_validate(record)
+            self.cache.set(user.id, user)
+
+        if not user.is_active:
+            raise HTTPException(status_code=403, detail="User account is blocked/pending approval")
+        return user
+
+    def invalidate(self, user_id: int):
+        self.cache.invalidate(user_id)
+
+    def stats(self) -> dict:
+        return self.cache.stats()
+
+user_cache = UserCache()
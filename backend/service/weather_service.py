@@ -1,34 +1,97 @@
+import asyncio
 import httpx
 import logging
-from typing import Optional
+import time
+from typing import Dict, Optional
+from config import settings
+from utils.ttl_cache import TTLCache
 
 logger = logging.getLogger(__name__)
 
 class WeatherService:
+    def __init__(self):
+        self.base_url = settings.WEATHER_BASE_URL.rstrip("/")
+        self.ttl_seconds = settings.WEATHER_CACHE_TTL_SECONDS
+        self.stale_seconds = settings.WEATHER_STALE_SECONDS
+        # Entries outlive their TTL by the stale window so they can be served while a refresh runs
+        self.cache = TTLCache(self.ttl_seconds + self.stale_seconds, settings.WEATHER_CACHE_MAX_SIZE)
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._client: Optional[httpx.AsyncClient] = None
+        self.counters = {"hits": 0, "stale_hits": 0, "misses": 0, "coalesced": 0, "upstream_calls": 0, "upstream_errors": 0}
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        # One pooled client for the whole service instead of a new connection per lookup
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                timeout=10.0,
+                limits=httpx.Limits(max_connections=20, max_keepalive_connections=10)
+            )
+        return self._client
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
     async def get_weather(self, city: str) -> dict:
         """
         Fetch weather data for a given city using wttr.in (no key required for demo).
+        Results are cached per city; concurrent lookups for the same city share one upstream call.
         """
         if not city:
             return {"status": "error", "message": "No city provided"}
-            
+
+        key = city.strip().lower()
+        entry = self.cache.get(key)
+        if entry is not None:
+            fetched_at, data = entry
+            if time.monotonic() - fetched_at < self.ttl_seconds:
+                self.counters["hits"] += 1
+                return data
+            # Stale: answer immediately and refresh in the background
+            self.counters["stale_hits"] += 1
+            self._refresh(key, city)
+            return data
+
+        if key not in self._inflight:
+            self.counters["misses"] += 1
+        return await asyncio.shield(self._refresh(key, city))
+
+    def stats(self) -> dict:
+        return {**self.counters, "cached_cities": len(self.cache), "inflight": len(self._inflight)}
+
+    def _refresh(self, key: str, city: str) -> asyncio.Task:
+        task = self._inflight.get(key)
+        if task is not None:
+            self.counters["coalesced"] += 1
+            return task
+        task = asyncio.create_task(self._fetch(key, city))
+        self._inflight[key] = task
+        task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return task
+
+    async def _fetch(self, key: str, city: str) -> dict:
+        self.counters["upstream_calls"] += 1
         try:
-            url = f"https://wttr.in/{city}?format=j1"
-            async with httpx.AsyncClient() as client:
-                response = await client.get(url, timeout=10.0)
-                if response.status_code == 200:
-                    data = response.json()
-                    current = data['current_condition'][0]
-                    return {
-                        "temperature": current['temp_C'],
-                        "humidity": current['humidity'],
-                        "rainfall": current['precipMM'],
-                        "condition": current['weatherDesc'][0]['value'],
-                        "wind_speed": current['windspeedKmph']
-                    }
-                else:
-                    return {"status": "error", "message": f"Failed to fetch weather: {response.status_code}"}
+            response = await self.client.get(f"{self.base_url}/{city}", params={"format": "j1"})
+            if response.status_code == 200:
+                data = response.json()
+                current = data['current_condition'][0]
+                weather = {
+                    "temperature": current['temp_C'],
+                    "humidity": current['humidity'],
+                    "rainfall": current['precipMM'],
+                    "condition": current['weatherDesc'][0]['value'],
+                    "wind_speed": current['windspeedKmph']
+                }
+                self.cache.set(key, (time.monotonic(), weather))
+                return weather
+            else:
+                self.counters["upstream_errors"] += 1
+                return {"status": "error", "message": f"Failed to fetch weather: {response.status_code}"}
         except Exception as e:
+            self.counters["upstream_errors"] += 1
             logger.error(f"Weather error: {e}")
             # Mock data as fallback
             return {
@@ -1,6 +1,7 @@
 import psycopg2
 from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
 from config import settings
+from utils.migrations import apply_migrations
 
 def setup_database():
     # Connection parameters from settings
@@ -42,17 +43,13 @@ def setup_database():
             host=host,
             port=port
         )
-        cursor = conn.cursor()
-        
-        print("Executing schema script...")
-        with open('sql/database_schema.sql', 'r') as f:
-            schema_sql = f.read()
-            cursor.execute(schema_sql)
-        
-        conn.commit()
-        print("Schema created successfully.")
-        
-        cursor.close()
+        # Versioned migrations from sql/migrations, each applied once and recorded in schema_migrations
+        print("Applying migrations...")
+        applied = apply_migrations(conn)
+        for migration in applied:
+            print(f"  {migration.version:04d} {migration.name}")
+        print(f"Schema up to date, {len(applied)} migration(s) applied.")
+
         conn.close()
 
     except Exception as e:
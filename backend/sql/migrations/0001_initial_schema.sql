@@ -15,6 +15,14 @@ CREATE TABLE IF NOT EXISTS users (
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
+-- Trigram indexes behind the admin farmer search
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE INDEX IF NOT EXISTS ix_users_mobile ON users (mobile);
+CREATE INDEX IF NOT EXISTS ix_users_full_name_trgm ON users USING gin (full_name gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS ix_users_username_trgm ON users USING gin (username gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS ix_users_city_trgm ON users USING gin (city gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS ix_users_state_trgm ON users USING gin (state gin_trgm_ops);
+
 -- Create Land Table
 CREATE TABLE IF NOT EXISTS land (
     id SERIAL PRIMARY KEY,
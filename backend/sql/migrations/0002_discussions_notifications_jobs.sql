@@ -0,0 +1,52 @@
+-- Tables the application has relied on since chat history, notifications and background jobs landed,
+-- until now only created through SQLAlchemy's create_all
+
+-- Create Discussions Table
+CREATE TABLE IF NOT EXISTS discussions (
+    id SERIAL PRIMARY KEY,
+    farmer_id INTEGER REFERENCES users(id),
+    heading VARCHAR(255),
+    question TEXT,
+    answer TEXT,
+    crop_type VARCHAR(255),
+    image_hashes TEXT,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Databases created before near-duplicate diagnosis lookups lack these two columns
+ALTER TABLE discussions ADD COLUMN IF NOT EXISTS crop_type VARCHAR(255);
+ALTER TABLE discussions ADD COLUMN IF NOT EXISTS image_hashes TEXT;
+CREATE INDEX IF NOT EXISTS ix_discussions_farmer_crop ON discussions (farmer_id, crop_type);
+
+-- Create Notifications Table (farmer_id NULL means a global broadcast)
+CREATE TABLE IF NOT EXISTS notifications (
+    id SERIAL PRIMARY KEY,
+    farmer_id INTEGER REFERENCES users(id),
+    title VARCHAR(255),
+    message TEXT,
+    type VARCHAR(50),
+    state VARCHAR(100),
+    city VARCHAR(100),
+    crop VARCHAR(100),
+    is_read BOOLEAN DEFAULT FALSE,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS ix_notifications_farmer_created ON notifications (farmer_id, created_at);
+
+-- Create Jobs Table
+CREATE TABLE IF NOT EXISTS jobs (
+    id SERIAL PRIMARY KEY,
+    job_type VARCHAR(50),
+    status VARCHAR(20) DEFAULT 'pending',
+    params TEXT,
+    checkpoint TEXT,
+    result TEXT,
+    error TEXT,
+    total INTEGER DEFAULT 0,
+    processed INTEGER DEFAULT 0,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS ix_jobs_status ON jobs (status);
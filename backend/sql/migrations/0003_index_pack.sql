@@ -0,0 +1,18 @@
+-- migrate:no-transaction
+-- Indexes behind every per-farmer lookup. Built CONCURRENTLY so writes keep flowing on a live
+-- database, which is why this file runs outside a transaction, one statement at a time.
+-- A build that fails half way leaves an INVALID index behind: drop it before running again.
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_land_farmer_id ON land (farmer_id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_crops_farmer_id ON crops (farmer_id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_history_farmer_id ON history (farmer_id);
+
+-- Chat history, newest first per farmer
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_discussions_farmer_created ON discussions (farmer_id, created_at);
+
+-- Unread counts only ever read unread rows, which stay a small slice of the table
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_notifications_farmer_unread ON notifications (farmer_id) WHERE NOT is_read;
+DROP INDEX CONCURRENTLY IF EXISTS ix_notifications_farmer_read;
+
+-- Farmer listings and broadcast targeting by region
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_users_role_state_city ON users (role, state, city);
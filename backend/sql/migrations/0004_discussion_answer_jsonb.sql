@@ -0,0 +1,27 @@
+-- Diagnoses become JSONB so the discussion list can read and filter severity and diseases in SQL.
+-- Rows were written with json.dumps; anything that is not a JSON object, including text that only
+-- looks like one, is kept as its reasoning text instead of failing the whole migration.
+-- Rewrites the table under an exclusive lock, so run it in a quiet window on large installs.
+
+CREATE FUNCTION pg_temp.discussion_answer_jsonb(answer TEXT) RETURNS JSONB AS $$
+DECLARE
+    parsed JSONB;
+BEGIN
+    IF answer IS NULL THEN
+        RETURN NULL;
+    END IF;
+    BEGIN
+        parsed := answer::jsonb;
+    EXCEPTION
+        -- Malformed JSON, or a \u0000 escape JSONB cannot store
+        WHEN invalid_text_representation OR untranslatable_character THEN
+            RETURN jsonb_build_object('reasoning', answer);
+    END;
+    IF jsonb_typeof(parsed) = 'object' THEN
+        RETURN parsed;
+    END IF;
+    RETURN jsonb_build_object('reasoning', answer);
+END;
+$$ LANGUAGE plpgsql IMMUTABLE;
+
+ALTER TABLE discussions ALTER COLUMN answer TYPE JSONB USING pg_temp.discussion_answer_jsonb(answer);
@@ -0,0 +1,5 @@
+-- Jobs are claimed with a lease so only one worker process runs each of them; a job whose
+-- lease has run out (its worker died) can be taken over by another.
+
+ALTER TABLE jobs ADD COLUMN IF NOT EXISTS owner VARCHAR(100);
+ALTER TABLE jobs ADD COLUMN IF NOT EXISTS lease_expires_at TIMESTAMP WITH TIME ZONE;
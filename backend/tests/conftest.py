@@ -0,0 +1,77 @@
+"""
+Shared fixtures. The suite runs against a throwaway SQLite file with both engines built
+(DB_ASYNC=true at import); the `db_mode` fixture then runs a test once through the async
+repositories on aiosqlite and once through the threaded sync repositories, the two DB_ASYNC modes.
+"""
+import asyncio
+import os
+import sys
+import tempfile
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND)
+SCRATCH = tempfile.mkdtemp(prefix="agroguard-tests-")
+os.environ.update({
+    "DATABASE_URL": f"sqlite:///{SCRATCH}/test.db",
+    "ASYNC_DATABASE_URL": "",
+    "DB_ASYNC": "true",
+    "GEMINI_API_KEY": "",
+    "SECRET_KEY": "test-secret", "BCRYPT_ROUNDS": "4",
+    "DISCUSSION_SPILL_PATH": f"{SCRATCH}/discussion_spill.jsonl",
+    "DIAGNOSIS_CACHE_PATH": "",
+})
+
+import pytest
+from config import settings
+from repository.threaded_repository import ThreadedRepository
+from utils.db_manager import db_manager
+
+@pytest.fixture(scope="session")
+def loop():
+    # One loop for the whole run: the async engine's pooled connections and the services' locks stay on it
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.run_until_complete(db_manager.async_engine.dispose())
+    loop.close()
+
+@pytest.fixture
+def run(loop):
+    return loop.run_until_complete
+
+@pytest.fixture(autouse=True)
+def tables():
+    db_manager.drop_tables()
+    db_manager.create_tables()
+    from service.user_cache import user_cache
+    from service.farmer_service import farmer_service
+    from service.chat_context_service import chat_context_service
+    # Ids restart with every test, so nothing cached may outlive one
+    for cache in (user_cache.cache, farmer_service.dashboard_cache, chat_context_service.cache):
+        cache.clear()
+    yield
+
+def _threaded_repositories() -> dict:
+    """id of each async repository singleton -> a threaded facade over its sync twin."""
+    swaps = {}
+    for name, module in list(sys.modules.items()):
+        if not name.startswith("repository."):
+            continue
+        for attr, value in vars(module).items():
+            if attr.startswith("async_") and attr.endswith("_repository"):
+                swaps[id(value)] = ThreadedRepository(getattr(module, attr[len("async_"):]))
+    return swaps
+
+@pytest.fixture(params=["async", "sync"])
+def db_mode(request, monkeypatch):
+    """Runs the test with DB_ASYNC on (aiosqlite) and off (sync sessions on the threadpool)."""
+    import main  # noqa: F401  every module that holds a repository is loaded before swapping
+    if request.param == "sync":
+        monkeypatch.setattr(settings, "DB_ASYNC", False)
+        swaps = _threaded_repositories()
+        for name, module in list(sys.modules.items()):
+            if not getattr(module, "__file__", None) or not module.__file__.startswith(BACKEND):
+                continue
+            for attr, value in list(vars(module).items()):
+                if id(value) in swaps:
+                    monkeypatch.setattr(module, attr, swaps[id(value)])
+    return request.param
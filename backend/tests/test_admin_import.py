@@ -0,0 +1,54 @@
+import io
+import pytest
+from fastapi import UploadFile
+from sqlalchemy.exc import IntegrityError
+from starlette.datastructures import Headers
+import service.admin_service as admin_module
+from config import settings
+from service.admin_service import admin_service
+from tests.test_repositories import unit
+from utils.password_hasher import password_hasher
+from utils.security_manager import pwd_context
+
+@pytest.fixture
+def hasher():
+    yield password_hasher
+    password_hasher.close()
+
+def upload(lines) -> UploadFile:
+    data = "\n".join(["username,password,full_name"] + lines).encode()
+    return UploadFile(io.BytesIO(data), filename="district.csv", headers=Headers({"content-type": "text/csv"}))
+
+def test_import_hashes_at_full_cost(run, hasher):
+    hashes = run(hasher.hash_many([f"initial-{i}" for i in range(6)]))
+    assert [pwd_context.verify(f"initial-{i}", hashed) for i, hashed in enumerate(hashes)] == [True] * 6
+    assert all(hashed.split("$")[2] == f"{settings.BCRYPT_ROUNDS:02d}" for hashed in hashes)
+    # Nothing left to raise on first login
+    assert not any(pwd_context.needs_update(hashed) for hashed in hashes)
+
+def test_rejected_batch_releases_usernames(db_mode, run, hasher, monkeypatch):
+    monkeypatch.setattr(settings, "IMPORT_BATCH_SIZE", 2)
+    repository = admin_module.user_repository
+    create_users_bulk = repository.create_users_bulk
+    calls = []
+
+    async def reject_first_batch(db, users):
+        calls.append([user["username"] for user in users])
+        if len(calls) == 1:
+            raise IntegrityError("INSERT", {}, Exception("username taken"))
+        return await create_users_bulk(db, users)
+    monkeypatch.setattr(repository, "create_users_bulk", reject_first_batch)
+
+    async def work(db):
+        return await admin_service.import_farmers(db, upload([
+            "a@example.com,pw-a,A", "b@example.com,pw-b,B",
+            "a@example.com,pw-a,A again", "c@example.com,pw-c,C",
+        ]))
+    report = run(unit(work))
+    assert calls == [["a@example.com", "b@example.com"], ["a@example.com", "c@example.com"]]
+    assert report["created"] == 2
+    assert [(error["row"], error["username"]) for error in report["errors"]] == [(1, "a@example.com"), (2, "b@example.com")]
+
+    async def existing(db):
+        return await repository.get_existing_usernames(db, ["a@example.com", "b@example.com", "c@example.com"])
+    assert run(unit(existing)) == {"a@example.com", "c@example.com"}
@@ -0,0 +1,64 @@
+import asyncio
+from types import SimpleNamespace
+import pytest
+import api.chat_api as chat_api
+from api.chat_api import _discussion_row
+from tests.test_gemini_service import FakeModel
+
+@pytest.mark.parametrize("result, heading", [
+    ({"diagnosis": "Leaf Rust", "severity": "High"}, "Wheat - Leaf Rust"),
+    ({"diagnosis": "x" * 80}, "Wheat - " + "x" * 50),
+    ({"severity": "Low"}, "Wheat - Analysis"),
+    ({"diagnosis": None}, "Wheat - Analysis"),
+    ("Looks like rust, spray a fungicide", "Wheat - Analysis"),
+    (["Leaf Rust"], "Wheat - Analysis"),
+    (None, "Wheat - Analysis"),
+])
+def test_discussion_row_heading(result, heading):
+    row = _discussion_row(1, "Wheat", "What is this?", result, [{"phash": "ab"}])
+    assert row["heading"] == heading
+    assert row["answer"] == result
+    assert row["image_hashes"] == "ab"
+
+def test_stream_releases_gemini_permit_on_disconnect(monkeypatch, run):
+    async def get_user(db, current_user):
+        return SimpleNamespace(id=1, city="Pune", state="Maharashtra")
+
+    async def build(user, crop_type, timings):
+        return {"crop_type": crop_type, "location": "Pune", "weather_data": {}, "history": []}
+
+    async def no_reuse(db, farmer_id, crop_type, message, image_parts):
+        return None, []
+
+    monkeypatch.setattr(chat_api.user_cache, "get_user", get_user)
+    monkeypatch.setattr(chat_api.chat_context_service, "build", build)
+    monkeypatch.setattr(chat_api, "_reuse_answer", no_reuse)
+    monkeypatch.setattr(chat_api.gemini_service, "model", FakeModel(chunk_delay=0.01))
+    monkeypatch.setattr(chat_api.gemini_service, "semaphore", asyncio.Semaphore(1))
+
+    async def main():
+        response = await chat_api.analyze_crop_stream(
+            images=None, crop_type="Wheat", message="Brown spots", language="en", current_user={"sub": "farmer"}
+        )
+        first_chunk = asyncio.Event()
+        sent = []
+
+        async def receive():
+            # The client goes away while the first chunk is still being written
+            await first_chunk.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            sent.append(message)
+            if b"event: chunk" in message.get("body", b""):
+                first_chunk.set()
+                await asyncio.Event().wait()
+
+        await response({"type": "http", "method": "POST", "path": "/chat/analyze/stream", "headers": []}, receive, send)
+        return sent
+
+    sent = run(main())
+    assert any(b"event: chunk" in message.get("body", b"") for message in sent)
+    assert not any(b"event: result" in message.get("body", b"") for message in sent)
+    assert chat_api.gemini_service.counters["in_flight"] == 0
+    assert not chat_api.gemini_service.semaphore.locked()
@@ -0,0 +1,88 @@
+import io
+import json
+import os
+import numpy as np
+import pytest
+from PIL import Image
+from service.diagnosis_service import diagnosis_service
+from service.disease_classifier import classify_image
+from service.gemini_service import gemini_service
+from config import settings
+
+SAMPLES = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "sample")
+
+def jpeg(pixels) -> bytes:
+    buffer = io.BytesIO()
+    Image.fromarray(np.asarray(pixels, dtype=np.uint8)).save(buffer, "JPEG")
+    return buffer.getvalue()
+
+def solid(rgb) -> bytes:
+    return jpeg(np.broadcast_to(np.array(rgb, dtype=np.uint8), (300, 300, 3)))
+
+def sample(name: str) -> bytes:
+    with open(os.path.join(SAMPLES, name), "rb") as photo:
+        return photo.read()
+
+NOT_LEAVES = {
+    "white": solid((255, 255, 255)),
+    "black": solid((0, 0, 0)),
+    "brown": solid((120, 70, 30)),
+    "orange": solid((230, 120, 20)),
+    "red": solid((200, 20, 20)),
+    "noise": jpeg(np.random.default_rng(0).integers(0, 256, (300, 300, 3))),
+}
+
+class FakeGemini:
+    def __init__(self):
+        self.calls = 0
+
+    async def generate_content_async(self, contents, **kwargs):
+        self.calls += 1
+        answer = {"disease_name": "Septoria Leaf Blotch", "recovery_percentage": 70,
+                  "plan": [{"day": "Day 1", "title": "Spray", "tasks": ["Apply a triazole fungicide"]}]}
+        return type("Response", (), {"text": json.dumps(answer)})()
+
+@pytest.fixture
+def gemini(monkeypatch):
+    model = FakeGemini()
+    monkeypatch.setattr(gemini_service, "model", model)
+    return model
+
+@pytest.mark.parametrize("name", NOT_LEAVES)
+def test_non_leaf_gets_no_local_label(name):
+    local = classify_image(NOT_LEAVES[name], None, settings.DIAGNOSIS_MIN_LEAF_FRACTION)
+    assert local["label"] is None and local["confidence"] == 0.0
+
+def test_leaf_photo_is_classified():
+    local = classify_image(sample("wheat rust.jpg"), None, settings.DIAGNOSIS_MIN_LEAF_FRACTION)
+    assert local["label"] == "Rust" and local["leaf_fraction"] >= settings.DIAGNOSIS_MIN_LEAF_FRACTION
+
+@pytest.mark.parametrize("name", NOT_LEAVES)
+def test_non_leaf_goes_to_gemini(name, gemini, run, monkeypatch):
+    # Even with the local model trusted, a photo it was never meant for is not answered locally
+    monkeypatch.setattr(diagnosis_service, "local_first", True)
+    result = run(diagnosis_service.analyze(NOT_LEAVES[name]))
+    assert result["source"] == "gemini" and gemini.calls == 1
+    assert result["disease_name"] == "Septoria Leaf Blotch"
+
+@pytest.mark.parametrize("name", ["wheat.jpg", "wheat2.jpg", "wheat rust.jpg"])
+def test_gemini_answers_leaves_by_default(name, gemini, run):
+    result = run(diagnosis_service.analyze(sample(name)))
+    assert result["source"] == "gemini" and gemini.calls == 1
+
+def test_validated_model_answers_confident_leaves(gemini, run, monkeypatch):
+    monkeypatch.setattr(diagnosis_service, "local_first", True)
+    result = run(diagnosis_service.analyze(sample("wheat rust.jpg")))
+    assert result["source"] == "local" and gemini.calls == 0
+    assert result["confidence"] >= settings.DIAGNOSIS_LOCAL_CONFIDENCE
+
+def test_offline_non_leaf_asks_for_a_new_photo(run, monkeypatch):
+    monkeypatch.setattr(gemini_service, "model", None)
+    result = run(diagnosis_service.analyze(NOT_LEAVES["orange"], lang="hi"))
+    assert result["source"] == "local_fallback" and result["confidence"] == 0.0
+    assert result["disease_name"] == "पत्ती पहचानी नहीं गई"
+
+def test_offline_leaf_uses_local_plan(run, monkeypatch):
+    monkeypatch.setattr(gemini_service, "model", None)
+    result = run(diagnosis_service.analyze(sample("wheat rust.jpg")))
+    assert result["source"] == "local_fallback" and result["disease_name"] != "Leaf Not Recognised"
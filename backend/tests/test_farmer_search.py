@@ -0,0 +1,23 @@
+import pytest
+from sqlalchemy.dialects import postgresql
+from repository.user_repository import farmer_search_query, mobile_prefix_clause
+
+def sql(filters: dict) -> str:
+    return str(farmer_search_query(filters, 20).compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+
+def test_mobile_prefix_is_a_range():
+    clause = str(mobile_prefix_clause(" 98 76 ").compile(compile_kwargs={"literal_binds": True}))
+    assert clause == "users.mobile >= '9876' AND users.mobile < '9877'"
+
+@pytest.mark.parametrize("prefix", ["", "   ", "\t\n"])
+def test_empty_mobile_prefix_gives_no_clause(prefix):
+    assert mobile_prefix_clause(prefix) is None
+
+@pytest.mark.parametrize("filters", [{"mobile": "  "}, {"mobile": ""}, {"q": "+"}, {"q": "  "}, {"q": "+ ", "mobile": " "}])
+def test_search_query_with_nothing_left_of_the_mobile_prefix(filters):
+    # Compiles for PostgreSQL, where these used to raise IndexError, and filters on no mobile range
+    assert "users.mobile >=" not in sql(filters)
+
+def test_search_query_with_mobile_prefix():
+    assert "users.mobile >= '900'" in sql({"mobile": "900"})
+    assert "users.mobile >= '9001'" in sql({"q": "900 1"})
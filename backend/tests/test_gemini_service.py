@@ -0,0 +1,161 @@
+import asyncio
+import pytest
+from google.api_core import exceptions as google_exceptions
+import service.gemini_service as gemini_module
+from service.gemini_service import GeminiService
+from utils.retry_budget import RetryBudget
+
+class Chunk:
+    def __init__(self, text):
+        self.text = text
+
+class FakeModel:
+    """Stands in for genai.GenerativeModel; `script` decides what each call does."""
+    def __init__(self, script=None, chunks=("a", "b", "c"), chunk_delay=0.0):
+        self.script = script
+        self.chunks = chunks
+        self.chunk_delay = chunk_delay
+        self.calls = 0
+        self.running = 0
+        self.peak = 0
+
+    async def _stream(self):
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        try:
+            for text in self.chunks:
+                await asyncio.sleep(self.chunk_delay)
+                yield Chunk(text)
+        finally:
+            self.running -= 1
+
+    async def generate_content_async(self, contents, stream=False):
+        self.calls += 1
+        if stream:
+            return self._stream()
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        try:
+            return await self.script(self.calls)
+        finally:
+            self.running -= 1
+
+@pytest.fixture
+def service(monkeypatch):
+    monkeypatch.setattr(gemini_module, "RETRY_BASE_DELAY_SECONDS", 0.001)
+    service = GeminiService()
+    service.semaphore = asyncio.Semaphore(2)
+    service.timeout_seconds = 0.2
+    return service
+
+def test_stream_holds_permit_until_last_chunk(service, run):
+    service.model = FakeModel(chunk_delay=0.01)
+    seen_in_flight = []
+
+    async def read():
+        parts = []
+        async for text in service.generate_stream(["prompt"]):
+            seen_in_flight.append(service.counters["in_flight"])
+            parts.append(text)
+        return "".join(parts)
+
+    async def main():
+        return await asyncio.gather(*(read() for _ in range(5)))
+    assert run(main()) == ["abc"] * 5
+    # Never more streams being read than permits, and every permit came back
+    assert service.model.peak == 2
+    assert max(seen_in_flight) == 2
+    assert service.counters["in_flight"] == 0 and service.semaphore._value == 2
+
+def test_stream_releases_permit_when_closed_early(service, run):
+    service.model = FakeModel(chunk_delay=0.01)
+
+    async def main():
+        stream = service.generate_stream(["prompt"])
+        assert await stream.__anext__() == "a"
+        assert service.counters["in_flight"] == 1
+        await stream.aclose()
+        assert service.counters["in_flight"] == 0
+
+        # Cancelled while waiting for a chunk
+        task = asyncio.create_task(service.generate_stream(["prompt"]).__anext__())
+        await asyncio.sleep(0.001)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+    run(main())
+    assert service.counters["in_flight"] == 0 and service.semaphore._value == 2
+
+def test_stream_chunk_timeout_releases_permit(service, run):
+    service.model = FakeModel(chunk_delay=1.0)
+
+    async def main():
+        async for _ in service.generate_stream(["prompt"]):
+            pass
+    with pytest.raises(asyncio.TimeoutError):
+        run(main())
+    assert service.counters["timeouts"] == 1
+    assert service.counters["in_flight"] == 0 and service.semaphore._value == 2
+
+def test_concurrency_cap(service, run):
+    waiting = []
+
+    async def answer(call):
+        waiting.append(service.counters["waiting"])
+        await asyncio.sleep(0.02)
+        return f"answer {call}"
+    service.model = FakeModel(answer)
+
+    async def main():
+        return await asyncio.gather(*(service.generate(["prompt"]) for _ in range(10)))
+    assert sorted(run(main())) == sorted(f"answer {call}" for call in range(1, 11))
+    assert service.model.peak == 2
+    assert max(waiting) > 0
+    assert service.counters["calls"] == 10 and service.counters["retries"] == 0
+    assert service.counters["in_flight"] == 0 and service.counters["waiting"] == 0
+
+def test_timeout_is_retried_then_raised(service, run):
+    async def hang(call):
+        await asyncio.sleep(5)
+    service.model = FakeModel(hang)
+    service.timeout_seconds = 0.05
+    service.max_retries = 1
+
+    with pytest.raises(asyncio.TimeoutError):
+        run(service.generate(["prompt"]))
+    assert service.model.calls == 2
+    assert service.counters["timeouts"] == 2 and service.counters["retries"] == 1 and service.counters["errors"] == 1
+    # The timed-out calls were cancelled and gave their permits back
+    assert service.model.running == 0 and service.semaphore._value == 2
+
+def test_transient_failure_is_retried(service, run):
+    async def flaky(call):
+        if call == 1:
+            raise google_exceptions.ServiceUnavailable("busy")
+        return "ok"
+    service.model = FakeModel(flaky)
+    assert run(service.generate(["prompt"])) == "ok"
+    assert service.model.calls == 2 and service.counters["retries"] == 1 and service.counters["errors"] == 0
+
+def test_retries_denied_once_budget_is_spent(service, run):
+    async def down(call):
+        raise google_exceptions.ServiceUnavailable("outage")
+    service.model = FakeModel(down)
+    service.max_retries = 5
+    service.retry_budget = RetryBudget(ratio=0, min_tokens=2)
+
+    for _ in range(3):
+        with pytest.raises(google_exceptions.ServiceUnavailable):
+            run(service.generate(["prompt"]))
+    # Two retries on the first call emptied the budget; later calls fail after their first attempt
+    assert service.model.calls == 3 + 1 + 1
+    assert service.counters["retries"] == 2 and service.counters["retries_denied"] == 3
+    assert service.counters["errors"] == 3
+
+def test_non_retryable_error_is_not_retried(service, run):
+    async def bad_request(call):
+        raise google_exceptions.InvalidArgument("bad image")
+    service.model = FakeModel(bad_request)
+    with pytest.raises(google_exceptions.InvalidArgument):
+        run(service.generate(["prompt"]))
+    assert service.model.calls == 1 and service.counters["retries"] == 0
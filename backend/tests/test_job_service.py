@@ -0,0 +1,71 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+import repository.job_repository as jobs
+from service.job_service import JobRunner
+from tests.test_repositories import unit
+from utils.db_manager import db_manager
+
+def runner(calls: list, delay: float = 0.05, lease_seconds: float = 300) -> JobRunner:
+    job_runner = JobRunner(max_workers=2, lease_seconds=lease_seconds)
+
+    async def handler(job):
+        calls.append(job_runner.owner)
+        await asyncio.sleep(delay)
+        async with db_manager.session() as db:
+            await job.save_progress(db, processed=1, total=1)
+            await db_manager.commit(db)
+        return {"sent": 1}
+    job_runner.register("broadcast", handler)
+    return job_runner
+
+def create_job(run, **job_data) -> int:
+    job = run(unit(lambda db: jobs.async_job_repository.create_job(db, {"job_type": "broadcast", "status": "pending", **job_data})))
+    return job.id
+
+def get_job(run, job_id: int):
+    return run(unit(lambda db: jobs.async_job_repository.get_job(db, job_id)))
+
+def test_two_runners_race_for_one_job(db_mode, run):
+    job_id = create_job(run)
+    calls = []
+    first, second = runner(calls), runner(calls)
+
+    async def race():
+        await asyncio.gather(first._run(job_id), second._run(job_id), first._run(job_id))
+    run(race())
+    assert len(calls) == 1
+    job = get_job(run, job_id)
+    assert job.status == "completed" and job.owner == calls[0] and job.lease_expires_at is None
+    assert job.processed == 1
+
+def test_running_job_is_left_to_its_lease_holder(db_mode, run):
+    lease = datetime.now(timezone.utc) + timedelta(minutes=5)
+    job_id = create_job(run, status="running", owner="other-worker", lease_expires_at=lease)
+    calls = []
+    run(runner(calls)._run(job_id))
+    assert calls == []
+    assert get_job(run, job_id).owner == "other-worker"
+
+def test_expired_lease_is_taken_over(db_mode, run):
+    expired = datetime.now(timezone.utc) - timedelta(seconds=1)
+    job_id = create_job(run, status="running", owner="dead-worker", lease_expires_at=expired)
+    calls = []
+    run(runner(calls)._run(job_id))
+    assert len(calls) == 1 and get_job(run, job_id).status == "completed"
+
+def test_runner_that_lost_its_lease_stops(db_mode, run):
+    job_id = create_job(run)
+    calls = []
+    slow = runner(calls, delay=0.2, lease_seconds=0.05)
+    fast = runner(calls, delay=0.0)
+
+    async def takeover():
+        first = asyncio.create_task(slow._run(job_id))
+        await asyncio.sleep(0.1)  # past the slow runner's lease, before it saves progress
+        await fast._run(job_id)
+        await first
+    run(takeover())
+    assert calls == [slow.owner, fast.owner]
+    job = get_job(run, job_id)
+    # The slow runner's progress save was refused, so the result is the new owner's
+    assert job.status == "completed" and job.owner == fast.owner
@@ -0,0 +1,47 @@
+"""
+Index usage of every repository read, on a seeded SQLite database: the checks of
+benchmarks/check_query_plans.py, one test each. Run that script against PostgreSQL for production plans.
+"""
+import pytest
+from benchmarks.check_query_plans import FULL_READ, SEQ_SCAN_ROW_LIMIT, catalogue, check, seed, table_sizes
+from models.database import HistoryDB
+from utils.db_manager import db_manager
+
+DIALECT = db_manager.engine.dialect.name
+CHECKS = catalogue(DIALECT)
+
+@pytest.fixture(autouse=True)
+def tables():
+    # Overrides the per-test reset: the seeded tables are shared by the whole module
+    yield
+
+@pytest.fixture(scope="module")
+def seeded():
+    db_manager.drop_tables()
+    db_manager.create_tables()
+    seed()
+    db = db_manager.get_db()
+    try:
+        yield db, table_sizes(db)
+    finally:
+        db.close()
+        db_manager.drop_tables()
+        db_manager.create_tables()
+
+def test_seeded_tables_are_large(seeded):
+    _, sizes = seeded
+    assert all(sizes[table] >= SEQ_SCAN_ROW_LIMIT for table in ("users", "land", "crops", "discussions", "notifications"))
+
+@pytest.mark.parametrize("label, call, allowance", CHECKS, ids=[label for label, _, _ in CHECKS])
+def test_reads_use_indexes(seeded, label, call, allowance):
+    db, sizes = seeded
+    statements, problems = check(db, DIALECT, sizes, call, allowance)
+    assert statements, f"{label} sent no SELECT"
+    if allowance != FULL_READ:
+        assert problems == []
+
+def test_unindexed_read_is_caught(seeded):
+    # The check itself: a filter no index covers has to fail it
+    db, sizes = seeded
+    _, problems = check(db, DIALECT, sizes, lambda db: db.query(HistoryDB).filter(HistoryDB.yield_amount == 41).all())
+    assert [table for table, _ in problems] == ["history"]
@@ -0,0 +1,197 @@
+from datetime import date, datetime, timedelta, timezone
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+import repository.user_repository as users
+import repository.land_repository as lands
+import repository.crop_repository as crops
+import repository.history_repository as history
+import repository.notification_repository as notifications
+import repository.dashboard_repository as dashboard
+import repository.discussion_repository as discussions
+import repository.job_repository as jobs
+from service.farmer_service import farmer_service
+from utils.db_manager import db_manager
+from utils.pagination import next_cursor, decode_cursor
+
+async def unit(work):
+    # One committed unit of work, the way the services use a session
+    async with db_manager.session() as db:
+        result = await work(db)
+        await db_manager.commit(db)
+        return result
+
+async def add_farmer(username="farmer@example.com", **profile) -> int:
+    async def work(db):
+        user_id = await users.async_user_repository.create_user(db, username, "hash")
+        if profile:
+            await users.async_user_repository.update_profile(db, user_id, profile)
+        return user_id
+    return await unit(work)
+
+def test_session_matches_mode(db_mode, run):
+    async def check():
+        async with db_manager.session() as db:
+            return isinstance(db, AsyncSession)
+    assert run(check()) == (db_mode == "async")
+
+def test_users(db_mode, run):
+    first = run(add_farmer("a@example.com", full_name="Asha", state="Punjab", city="Ludhiana"))
+    second = run(add_farmer("b@example.com"))
+
+    async def read(db):
+        repo = users.async_user_repository
+        return (
+            await repo.get_user_by_username(db, "a@example.com"),
+            await repo.get_user_by_id(db, second),
+            [user.id for user in await repo.get_users_by_ids(db, [second, 999, first])],
+            await repo.get_existing_usernames(db, ["a@example.com", "c@example.com"]),
+        )
+    by_name, by_id, ordered, existing = run(unit(read))
+    assert (by_name.id, by_name.full_name, by_name.city) == (first, "Asha", "Ludhiana")
+    assert by_id.username == "b@example.com"
+    assert ordered == [second, first]
+    assert existing == {"a@example.com"}
+
+    run(unit(lambda db: users.async_user_repository.update_user_status(db, first, False)))
+    assert run(unit(lambda db: users.async_user_repository.get_user_by_id(db, first))).is_active is False
+
+def test_uncommitted_work_is_rolled_back(db_mode, run):
+    async def abandoned():
+        async with db_manager.session() as db:
+            await users.async_user_repository.create_user(db, "gone@example.com", "hash")
+    run(abandoned())
+    assert run(unit(lambda db: users.async_user_repository.get_user_by_username(db, "gone@example.com"))) is None
+
+def test_farm_records_and_dashboard(db_mode, run):
+    farmer = run(add_farmer())
+    other = run(add_farmer("other@example.com"))
+
+    async def seed(db):
+        land = await lands.async_land_repository.create_land(db, {"farmer_id": farmer, "land_name": "North", "area_size": 2.5})
+        await lands.async_land_repository.create_land(db, {"farmer_id": other, "land_name": "South", "area_size": 9})
+        await crops.async_crop_repository.create_crop(db, {"farmer_id": farmer, "land_id": land.id, "crop_name": "Wheat", "planted_date": date(2025, 11, 1)})
+        for year in (2021, 2024, 2019, 2023):
+            await history.async_history_repository.create_history(db, {
+                "farmer_id": farmer, "land_id": land.id, "crop": "Wheat", "year": year, "yield_amount": 4.0
+            })
+        await notifications.async_notification_repository.create_notifications_bulk(db, [
+            {"farmer_id": farmer, "title": "Rust alert", "message": "m", "type": "Disease"},
+            {"farmer_id": None, "title": "Heat wave", "message": "m", "type": "Weather"},
+            {"farmer_id": other, "title": "Not yours", "message": "m", "type": "General"},
+        ])
+    run(unit(seed))
+
+    async def read(db):
+        return (
+            [land.land_name for land in await lands.async_land_repository.get_lands_by_farmer(db, farmer)],
+            [crop.crop_name for crop in await crops.async_crop_repository.get_crops_by_farmer(db, farmer)],
+            [record.year for record in await history.async_history_repository.get_recent_history(db, farmer, 3)],
+            await dashboard.async_dashboard_repository.get_summary_counts(db, farmer),
+        )
+    land_names, crop_names, years, counts = run(unit(read))
+    assert land_names == ["North"]
+    assert crop_names == ["Wheat"]
+    assert years == [2024, 2023, 2021]
+    assert counts["total_lands"] == 1 and float(counts["total_area"]) == 2.5
+    assert counts["active_crops"] == 1 and counts["unread_notifications"] == 2
+
+def test_notification_feed(db_mode, run):
+    farmer = run(add_farmer())
+    started = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    run(unit(lambda db: notifications.async_notification_repository.create_notifications_bulk(db, [
+        {"farmer_id": farmer if i % 2 else None, "title": f"n{i}", "message": "m", "type": "General",
+         "created_at": started + timedelta(minutes=i)}
+        for i in range(5)
+    ])))
+
+    repo = notifications.async_notification_repository
+    page = run(unit(lambda db: repo.get_notification_page(db, farmer, 3)))
+    assert [item.title for item in page] == ["n4", "n3", "n2"]
+    rest = run(unit(lambda db: repo.get_notification_page(db, farmer, 3, decode_cursor(next_cursor(page, 3)))))
+    assert [item.title for item in rest] == ["n1", "n0"]
+
+    run(unit(lambda db: repo.mark_as_read(db, page[0].id)))
+    assert run(unit(lambda db: repo.count_unread(db, farmer))) == 4
+
+def test_notification_feed_pages_default_timestamps(db_mode, run):
+    # Rows inserted in the same second, stamped by the column default
+    farmer = run(add_farmer())
+    repo = notifications.async_notification_repository
+    run(unit(lambda db: repo.create_notifications_bulk(db, [
+        {"farmer_id": farmer, "title": f"n{i}", "message": "m", "type": "General"} for i in range(5)
+    ])))
+
+    titles, cursor = [], None
+    for _ in range(5):
+        page = run(unit(lambda db: repo.get_notification_page(db, farmer, 2, cursor)))
+        titles += [item.title for item in page]
+        encoded = next_cursor(page, 2)
+        if encoded is None:
+            break
+        cursor = decode_cursor(encoded)
+    assert sorted(titles) == ["n0", "n1", "n2", "n3", "n4"]
+
+def test_discussions(db_mode, run):
+    farmer = run(add_farmer())
+    started = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    rows = [
+        {"farmer_id": farmer, "heading": f"Wheat {i}", "question": "q", "crop_type": "Wheat",
+         "answer": {"diagnosis": "Rust", "severity": "High" if i % 2 else "Low", "diseases": ["Leaf Rust"]},
+         "created_at": started + timedelta(hours=i)}
+        for i in range(5)
+    ]
+    repo = discussions.async_discussion_repository
+    ids = run(unit(lambda db: repo.create_discussions_bulk(db, rows)))
+    assert len(ids) == 5
+
+    page = run(unit(lambda db: repo.get_discussion_page(db, farmer, 2)))
+    assert [item.heading for item in page] == ["Wheat 4", "Wheat 3"]
+    rest = run(unit(lambda db: repo.get_discussion_page(db, farmer, 10, decode_cursor(next_cursor(page, 2)))))
+    assert [item.heading for item in rest] == ["Wheat 2", "Wheat 1", "Wheat 0"]
+    high = run(unit(lambda db: repo.get_discussion_page(db, farmer, 10, None, {"severity": "high"})))
+    assert [item.heading for item in high] == ["Wheat 3", "Wheat 1"]
+
+    found = run(unit(lambda db: repo.get_discussions_by_ids(db, [ids[3], 999, ids[0]])))
+    assert [item.id for item in found] == [ids[3], ids[0]]
+    assert found[0].answer["diseases"] == ["Leaf Rust"]
+
+def test_jobs(db_mode, run):
+    repo = jobs.async_job_repository
+    job = run(unit(lambda db: repo.create_job(db, {"job_type": "broadcast", "status": "pending"})))
+    done = run(unit(lambda db: repo.create_job(db, {"job_type": "broadcast", "status": "pending"})))
+    run(unit(lambda db: repo.update_job(db, done.id, {"status": "completed", "processed": 3})))
+    assert run(unit(lambda db: repo.get_unfinished_job_ids(db))) == [job.id]
+    assert run(unit(lambda db: repo.get_job(db, done.id))).processed == 3
+
+def test_farmer_service_dashboard(db_mode, run):
+    farmer = run(add_farmer(full_name="Asha"))
+    claims = {"uid": farmer, "sub": "farmer@example.com"}
+
+    async def work(db):
+        await farmer_service.add_land(db, claims, {"land_name": "North", "area_size": 1.25})
+        await farmer_service.add_land(db, claims, {"land_name": "South", "area_size": 2})
+        return await farmer_service.get_dashboard_summary(db, claims)
+    summary = run(unit(work))
+    assert summary["farmer_name"] == "Asha"
+    assert (summary["total_lands"], summary["total_area"], summary["active_crops"]) == (2, 3.25, 0)
+
+def test_discussion_page_reads_legacy_diagnoses(db_mode, run):
+    from models.schemas import DiscussionSummary
+    farmer = run(add_farmer())
+    answers = [
+        {"diseases": "Leaf Rust", "severity": "High"},
+        {"diseases": {"name": "Blight"}, "severity": 3},
+        {"diseases": None},
+        "Plain text answer",
+        {"diseases": ["Smut"], "severity": "Low"},
+    ]
+    run(unit(lambda db: discussions.async_discussion_repository.create_discussions_bulk(db, [
+        {"farmer_id": farmer, "heading": f"h{i}", "question": "q", "answer": answer,
+         "created_at": datetime(2026, 1, 1, i, tzinfo=timezone.utc)}
+        for i, answer in enumerate(answers)
+    ])))
+    page = run(unit(lambda db: discussions.async_discussion_repository.get_discussion_page(db, farmer, 10)))
+    items = [DiscussionSummary.model_validate(item) for item in page]
+    assert [(item.diseases, item.severity) for item in items] == [
+        (["Smut"], "Low"), (None, None), (None, None), (["Blight"], "3"), (["Leaf Rust"], "High"),
+    ]
@@ -0,0 +1,53 @@
+from datetime import date
+import repository.discussion_repository as discussions
+from service.chat_context_service import chat_context_service
+from service.discussion_writer import DiscussionWriter
+from service.farmer_service import farmer_service
+from service.weather_service import weather_service
+from tests.test_repositories import add_farmer, unit
+from utils.db_manager import db_manager
+
+def test_chat_context(db_mode, run, monkeypatch):
+    async def weather(city):
+        return {"condition": f"Sunny in {city}"}
+    monkeypatch.setattr(weather_service, "get_weather", weather)
+    farmer = run(add_farmer(city="Ludhiana"))
+    claims = {"uid": farmer, "sub": "farmer@example.com"}
+
+    async def seed(db):
+        land = await farmer_service.add_land(db, claims, {"land_name": "North", "area_size": 1})
+        await farmer_service.add_crop(db, claims, {"land_id": land.id, "crop_name": "Wheat", "planted_date": date(2025, 11, 1)})
+        for year in (2022, 2024):
+            await farmer_service.add_history(db, claims, {"land_id": land.id, "crop": "Wheat", "year": year, "yield_amount": 3})
+    run(unit(seed))
+
+    async def build():
+        async with db_manager.session() as db:
+            user = await farmer_service.get_profile(db, claims)
+        timings = {}
+        return await chat_context_service.build(user, None, timings), timings
+    context, timings = run(build())
+    assert context["crop_type"] == "Wheat"
+    assert context["location"] == "Ludhiana"
+    assert context["weather_data"] == {"condition": "Sunny in Ludhiana"}
+    assert [record["year"] for record in context["history"]] == [2024, 2022]
+    assert {"weather", "history", "crops", "context"} <= set(timings)
+
+def test_discussion_writer_flush(db_mode, run, tmp_path, monkeypatch):
+    farmer = run(add_farmer())
+    writer = DiscussionWriter()
+    writer.spill_path = str(tmp_path / "spill.jsonl")
+    saved = []
+
+    async def submit_and_close():
+        for i in range(3):
+            await writer.submit(
+                {"farmer_id": farmer, "heading": f"q{i}", "question": "q", "crop_type": "Wheat", "answer": {"diagnosis": "Rust"}},
+                saved.append,
+            )
+        await writer.close()
+    run(submit_and_close())
+    assert len(saved) == 3 and writer.stats()["written"] == 3
+
+    page = run(unit(lambda db: discussions.async_discussion_repository.get_discussion_page(db, farmer, 10)))
+    assert sorted(item.id for item in page) == sorted(saved)
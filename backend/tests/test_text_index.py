@@ -0,0 +1,48 @@
+import random
+import numpy as np
+import pytest
+from utils.text_index import TextIndex, term_counts
+
+WORDS = "leaf rust yellow spots wheat rice blight brown stem rot wilt curl aphid fungus water soil dry wet".split()
+
+def question(rng: random.Random) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(2, 7)))
+
+def brute_force(index: TextIndex, texts, groups, text, limit, min_score, group):
+    # Dense TF-IDF cosine similarity against every document, with the build-time idf
+    def vector(doc):
+        counts = term_counts(doc)
+        vec = {feature: (1 + np.log(n)) * float(index.idf[feature]) for feature, n in counts.items()}
+        norm = np.sqrt(sum(w * w for w in vec.values()))
+        return {feature: w / norm for feature, w in vec.items()} if norm else vec
+    query = vector(text)
+    scored = [
+        (row_id, sum(weight * query.get(feature, 0.0) for feature, weight in vector(doc).items()))
+        for row_id, (doc, doc_group) in enumerate(zip(texts, groups), start=1)
+        if group is None or doc_group == group
+    ]
+    scored = [(row_id, score) for row_id, score in scored if score >= min_score]
+    return sorted(scored, key=lambda match: (-match[1], -match[0]))[:limit]
+
+@pytest.mark.parametrize("group", [None, 0, 1, 2])
+def test_search_matches_brute_force(group):
+    rng = random.Random(7)
+    texts = [question(rng) for _ in range(600)]
+    groups = [rng.randrange(3) for _ in texts]
+    built = 500
+    index = TextIndex(texts[:built], range(1, built + 1), groups[:built])
+    for position in range(built, len(texts)):
+        index.add(texts[position], position + 1, groups[position])
+
+    for _ in range(40):
+        text = question(rng)
+        for limit, min_score in ((5, 0.2), (50, 0.05)):
+            found = index.search(text, limit, min_score, group)
+            expected = brute_force(index, texts, groups, text, limit, min_score, group)
+            if not expected:
+                assert found == []
+                continue
+            # Ties may fall either side of the limit; compare scores, then ids where the scores differ
+            assert [score for _, score in found] == pytest.approx([score for _, score in expected], abs=1e-4)
+            assert {row_id for row_id, score in found if score > expected[-1][1] + 1e-4} == \
+                {row_id for row_id, score in expected if score > expected[-1][1] + 1e-4}
@@ -0,0 +1,70 @@
+import pytest
+from config import settings
+from utils.uploads import UploadLimitMiddleware
+
+MB = 1024 * 1024
+CHAT_LIMIT = settings.UPLOAD_MAX_REQUEST_BYTES + settings.UPLOAD_FORM_OVERHEAD_BYTES
+BOUNDARY = "upload-test-boundary"
+
+async def call(app, path: str, body_chunks, content_length=None) -> dict:
+    """Sends one POST through `app` at the ASGI level; returns the status and how much body was read."""
+    headers = [(b"content-type", f"multipart/form-data; boundary={BOUNDARY}".encode())]
+    if content_length is not None:
+        headers.append((b"content-length", str(content_length).encode()))
+    scope = {
+        "type": "http", "http_version": "1.1", "method": "POST", "scheme": "http", "path": path,
+        "raw_path": path.encode(), "root_path": "", "query_string": b"", "headers": headers,
+        "client": ("127.0.0.1", 1234), "server": ("testserver", 80),
+    }
+    chunks = iter(body_chunks)
+    state = {"status": None, "read": 0}
+
+    async def receive():
+        chunk = next(chunks, None)
+        if chunk is None:
+            return {"type": "http.request", "body": b"", "more_body": False}
+        state["read"] += len(chunk)
+        return {"type": "http.request", "body": chunk, "more_body": True}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            state["status"] = message["status"]
+
+    await app(scope, receive, send)
+    return state
+
+def oversized_upload(total: int, chunk_size: int = MB):
+    yield (f"--{BOUNDARY}\r\nContent-Disposition: form-data; name=\"images\"; filename=\"leaf.jpg\"\r\n"
+           "Content-Type: image/jpeg\r\n\r\n").encode()
+    chunk = b"\xff" * chunk_size
+    for _ in range(total // chunk_size):
+        yield chunk
+
+@pytest.fixture
+def app():
+    import main
+    return main.app
+
+def test_declared_oversized_chat_upload_is_rejected_unread(app, run):
+    state = run(call(app, "/chat/analyze", oversized_upload(CHAT_LIMIT + MB), content_length=CHAT_LIMIT + MB))
+    assert state == {"status": 413, "read": 0}
+
+def test_streamed_oversized_chat_upload_stops_at_the_route_cap(app, run):
+    state = run(call(app, "/chat/analyze", oversized_upload(2 * CHAT_LIMIT)))
+    assert state["status"] == 413
+    # Reading stopped at the chat cap, far below the batch cap
+    assert CHAT_LIMIT < state["read"] <= CHAT_LIMIT + 2 * MB
+
+def test_only_the_batch_route_gets_the_batch_cap(run):
+    reached = []
+
+    async def downstream(scope, receive, send):
+        reached.append(scope["path"])
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+    middleware = UploadLimitMiddleware(downstream)
+    size = settings.UPLOAD_MAX_REQUEST_BYTES * 2
+
+    for path, status in (("/chat/analyze/batch", 200), ("/chat/analyze", 413), ("/chat/analyze/stream", 413), ("/diagnosis/analyze", 413)):
+        assert run(call(middleware, path, [], content_length=size))["status"] == status
+    assert reached == ["/chat/analyze/batch"]
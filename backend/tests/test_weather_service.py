@@ -0,0 +1,99 @@
+import asyncio
+import httpx
+import pytest
+from config import settings
+from service.weather_service import WeatherService
+
+def wttr(temperature: str) -> dict:
+    return {"current_condition": [{
+        "temp_C": temperature, "humidity": "60", "precipMM": "0.0",
+        "weatherDesc": [{"value": "Sunny"}], "windspeedKmph": "8",
+    }]}
+
+class Upstream:
+    """wttr.in behind an httpx.MockTransport: counts requests and answers each with the next temperature."""
+    def __init__(self, delay: float = 0.0, status: int = 200):
+        self.delay = delay
+        self.status = status
+        self.requests = []
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request.url.path)
+        await asyncio.sleep(self.delay)
+        return httpx.Response(self.status, json=wttr(str(20 + len(self.requests))))
+
+@pytest.fixture
+def make_service(monkeypatch, loop):
+    services = []
+
+    def make(upstream: Upstream, ttl: float = 60, stale: float = 60) -> WeatherService:
+        monkeypatch.setattr(settings, "WEATHER_CACHE_TTL_SECONDS", ttl)
+        monkeypatch.setattr(settings, "WEATHER_STALE_SECONDS", stale)
+        service = WeatherService()
+        service._client = httpx.AsyncClient(transport=httpx.MockTransport(upstream))
+        services.append(service)
+        return service
+    yield make
+    for service in services:
+        loop.run_until_complete(service.close())
+
+def test_cached_per_city(make_service, run):
+    upstream = Upstream()
+    service = make_service(upstream)
+    first = run(service.get_weather("Ludhiana"))
+    assert first["temperature"] == "21" and first["condition"] == "Sunny"
+    # Same city however it is written, from the cache
+    assert run(service.get_weather(" ludhiana ")) == first
+    assert run(service.get_weather("Karnal"))["temperature"] == "22"
+    assert upstream.requests == ["/Ludhiana", "/Karnal"]
+    assert service.stats()["hits"] == 1 and service.stats()["misses"] == 2
+
+def test_concurrent_lookups_share_one_call(make_service, run):
+    upstream = Upstream(delay=0.05)
+    service = make_service(upstream)
+
+    async def burst():
+        return await asyncio.gather(*(service.get_weather("Ludhiana") for _ in range(50)))
+    results = run(burst())
+    assert len(upstream.requests) == 1
+    assert all(result["temperature"] == "21" for result in results)
+    assert service.stats()["coalesced"] == 49 and service.stats()["inflight"] == 0
+
+def test_cancelled_caller_does_not_cancel_the_shared_call(make_service, run):
+    upstream = Upstream(delay=0.05)
+    service = make_service(upstream)
+
+    async def main():
+        leaving = asyncio.create_task(service.get_weather("Ludhiana"))
+        staying = asyncio.create_task(service.get_weather("Ludhiana"))
+        await asyncio.sleep(0.01)
+        leaving.cancel()
+        return await staying
+    assert run(main())["temperature"] == "21"
+    assert len(upstream.requests) == 1
+
+def test_stale_entry_served_while_refreshing(make_service, run):
+    upstream = Upstream(delay=0.05)
+    service = make_service(upstream, ttl=0.1)
+
+    async def main():
+        fresh = await service.get_weather("Ludhiana")
+        await asyncio.sleep(0.15)
+        # Past the TTL: answered at once with the old reading, refreshed once in the background
+        stale = await asyncio.gather(*(asyncio.wait_for(service.get_weather("Ludhiana"), 0.02) for _ in range(10)))
+        assert service.stats()["inflight"] == 1
+        await asyncio.sleep(0.1)
+        return fresh, stale, await service.get_weather("Ludhiana")
+    fresh, stale, refreshed = run(main())
+    assert fresh["temperature"] == "21"
+    assert all(result["temperature"] == "21" for result in stale)
+    assert refreshed["temperature"] == "22"
+    assert len(upstream.requests) == 2
+    assert service.stats()["stale_hits"] == 10
+
+def test_upstream_failure_is_not_cached(make_service, run):
+    upstream = Upstream(status=503)
+    service = make_service(upstream)
+    assert run(service.get_weather("Ludhiana"))["status"] == "error"
+    assert run(service.get_weather("Ludhiana"))["status"] == "error"
+    assert len(upstream.requests) == 2 and service.stats()["upstream_errors"] == 2
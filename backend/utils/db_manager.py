@@ -1,14 +1,41 @@
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
+from fastapi.concurrency import run_in_threadpool
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Iterator, Union
 from config import settings
 from models.database import Base
 
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+def get_async_database_url() -> str:
+    if settings.ASYNC_DATABASE_URL:
+        return settings.ASYNC_DATABASE_URL
+    scheme, sep, rest = settings.DATABASE_URL.partition("://")
+    return f"{ASYNC_DRIVERS.get(scheme, scheme)}{sep}{rest}"
+
 class DBManager:
     _instance = None
 
     def __init__(self):
-        self.engine = create_engine(settings.DATABASE_URL)
-        self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        # Repositories may run on threadpool workers, so SQLite must allow cross-thread connections
+        connect_args = {"check_same_thread": False} if settings.DATABASE_URL.startswith("sqlite") else {}
+        self.engine = create_engine(settings.DATABASE_URL, connect_args=connect_args)
+        self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=self.engine)
+
+        # Async engine is only built when enabled so the async drivers stay optional
+        self.async_engine = None
+        self.AsyncSessionLocal = None
+        if settings.DB_ASYNC:
+            self.async_engine = create_async_engine(get_async_database_url())
+            self.AsyncSessionLocal = async_sessionmaker(
+                bind=self.async_engine, autoflush=False, expire_on_commit=False
+            )
 
     def __new__(cls):
         if cls._instance is None:
@@ -23,10 +50,65 @@ class DBManager:
             db.close()
             raise e
 
+    def get_async_db(self) -> AsyncSession:
+        if self.AsyncSessionLocal is None:
+            raise RuntimeError("Async database access is disabled, set DB_ASYNC=true to enable it")
+        return self.AsyncSessionLocal()
+
+    @asynccontextmanager
+    async def session(self) -> AsyncIterator[Union[Session, AsyncSession]]:
+        """
+        One session and one transaction for a unit of work, matching the DB_ASYNC mode.
+        Callers commit through `commit()`; anything left uncommitted is rolled back on exit.
+        """
+        if settings.DB_ASYNC:
+            async with self.get_async_db() as db:
+                yield db
+            return
+
+        db = self.get_db()
+        try:
+            yield db
+        finally:
+            await run_in_threadpool(db.close)
+
+    async def get_session(self) -> AsyncIterator[Union[Session, AsyncSession]]:
+        """FastAPI dependency: one session, one connection checkout and one transaction per request."""
+        async with self.session() as db:
+            yield db
+
+    def get_sync_session(self) -> Iterator[Session]:
+        """FastAPI dependency for sync routes, which already run on the threadpool."""
+        db = self.get_db()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    async def commit(self, db: Union[Session, AsyncSession]):
+        if isinstance(db, AsyncSession):
+            await db.commit()
+        else:
+            await run_in_threadpool(db.commit)
+
+    async def rollback(self, db: Union[Session, AsyncSession]):
+        if isinstance(db, AsyncSession):
+            await db.rollback()
+        else:
+            await run_in_threadpool(db.rollback)
+
     def create_tables(self):
         Base.metadata.create_all(bind=self.engine)
 
     def drop_tables(self):
         Base.metadata.drop_all(bind=self.engine)
 
+    async def create_tables_async(self):
+        async with self.async_engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+    async def drop_tables_async(self):
+        async with self.async_engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all)
+
 db_manager = DBManager()
@@ -0,0 +1,68 @@
+import csv
+import io
+import json
+import zlib
+from datetime import date, datetime
+from decimal import Decimal
+from typing import AsyncIterator, List, Sequence
+from fastapi.concurrency import run_in_threadpool
+
+def _plain(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    return value
+
+class CsvEncoder:
+    media_type = "text/csv"
+    extension = "csv"
+
+    def __init__(self, columns: List[str]):
+        self.columns = columns
+
+    def header(self) -> str:
+        return self.encode([self.columns])
+
+    def encode(self, rows: Sequence[Sequence]) -> str:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerows([_plain(value) for value in row] for row in rows)
+        return buffer.getvalue()
+
+class NdjsonEncoder:
+    media_type = "application/x-ndjson"
+    extension = "ndjson"
+
+    def __init__(self, columns: List[str]):
+        self.columns = columns
+
+    def header(self) -> str:
+        return ""
+
+    def encode(self, rows: Sequence[Sequence]) -> str:
+        return "".join(
+            json.dumps({column: _plain(value) for column, value in zip(self.columns, row)}) + "\n"
+            for row in rows
+        )
+
+ENCODERS = {"csv": CsvEncoder, "ndjson": NdjsonEncoder}
+
+async def encode_rows(encoder, batches: AsyncIterator[Sequence[Sequence]]) -> AsyncIterator[bytes]:
+    """One chunk per row batch, so memory tracks the batch size rather than the export size."""
+    header = encoder.header()
+    if header:
+        yield header.encode()
+    async for rows in batches:
+        # Formatting a batch takes milliseconds, which the event loop should not spend
+        text = await run_in_threadpool(encoder.encode, rows)
+        yield text.encode()
+
+async def gzip_chunks(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    # wbits=31 writes a gzip header and trailer around the deflate stream
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    async for chunk in chunks:
+        compressed = await run_in_threadpool(compressor.compress, chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
@@ -0,0 +1,44 @@
+from collections import defaultdict
+from typing import Any, List, Tuple
+
+HASH_BITS = 64
+
+class HammingIndex:
+    """
+    Multi-index hashing over 64-bit perceptual hashes. The bits are split into `radius + 1` chunks,
+    and by pigeonhole any hash within `radius` bits of a query matches it exactly on at least one
+    chunk, so a lookup only verifies the few entries sharing a chunk value with the query instead
+    of scanning everything. Several payloads can share one hash.
+    """
+    def __init__(self, radius: int):
+        self.radius = radius
+        chunks = radius + 1
+        bounds = [HASH_BITS * i // chunks for i in range(chunks + 1)]
+        self._chunks = [(start, (1 << (end - start)) - 1) for start, end in zip(bounds, bounds[1:])]
+        self._tables = [defaultdict(list) for _ in self._chunks]
+        self._payloads = defaultdict(list)
+
+    def add(self, value: int, payload: Any):
+        if value not in self._payloads:
+            for table, (shift, mask) in zip(self._tables, self._chunks):
+                table[(value >> shift) & mask].append(value)
+        self._payloads[value].append(payload)
+
+    def search(self, value: int, radius: int = None) -> List[Tuple[int, Any]]:
+        """(distance, payload) pairs within `radius` (at most the index radius) of `value`, nearest first."""
+        radius = self.radius if radius is None else min(radius, self.radius)
+        seen = set()
+        matches = []
+        for table, (shift, mask) in zip(self._tables, self._chunks):
+            for candidate in table.get((value >> shift) & mask, ()):
+                if candidate in seen:
+                    continue
+                seen.add(candidate)
+                distance = (candidate ^ value).bit_count()
+                if distance <= radius:
+                    matches.extend((distance, payload) for payload in self._payloads[candidate])
+        matches.sort(key=lambda match: match[0])
+        return matches
+
+    def __len__(self) -> int:
+        return len(self._payloads)
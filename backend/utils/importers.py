@@ -0,0 +1,35 @@
+import csv
+import io
+import json
+from typing import Iterator, Optional, Tuple, Union
+
+NDJSON_EXTENSIONS = (".ndjson", ".jsonl")
+
+def import_format(filename: Optional[str]) -> str:
+    return "ndjson" if (filename or "").lower().endswith(NDJSON_EXTENSIONS) else "csv"
+
+def parse_rows(data: bytes, fmt: str) -> Iterator[Tuple[int, Union[dict, str]]]:
+    """
+    (row number, fields) for every record of a CSV or NDJSON file, or (row number, error) when a
+    record cannot be read. CSV cells are stripped and empty ones left out, so Pydantic defaults apply.
+    """
+    text = data.decode("utf-8-sig")
+    if fmt == "csv":
+        for number, row in enumerate(csv.DictReader(io.StringIO(text)), start=1):
+            yield number, {
+                key.strip(): value.strip()
+                for key, value in row.items() if key and isinstance(value, str) and value.strip()
+            }
+        return
+
+    number = 0
+    for line in text.splitlines():
+        if not line.strip():
+            continue
+        number += 1
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield number, f"Invalid JSON: {e}"
+            continue
+        yield number, record if isinstance(record, dict) else "Expected a JSON object"
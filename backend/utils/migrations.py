@@ -0,0 +1,89 @@
+import os
+import re
+from typing import List, NamedTuple
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "sql", "migrations")
+# First line of a migration that has to run outside a transaction, e.g. CREATE INDEX CONCURRENTLY
+NO_TRANSACTION = "-- migrate:no-transaction"
+FILE_PATTERN = re.compile(r"^(\d+)_(\w+)\.sql$")
+
+class Migration(NamedTuple):
+    version: int
+    name: str
+    path: str
+
+    @property
+    def sql(self) -> str:
+        with open(self.path, "r") as f:
+            return f.read()
+
+def discover(directory: str = MIGRATIONS_DIR) -> List[Migration]:
+    """Every NNNN_name.sql file in `directory`, in version order."""
+    migrations = []
+    for filename in os.listdir(directory):
+        match = FILE_PATTERN.match(filename)
+        if match:
+            migrations.append(Migration(int(match.group(1)), match.group(2), os.path.join(directory, filename)))
+    migrations.sort()
+    versions = [migration.version for migration in migrations]
+    if len(set(versions)) != len(versions):
+        raise ValueError(f"Duplicate migration versions in {directory}")
+    return migrations
+
+def split_statements(sql: str) -> List[str]:
+    # Migrations are plain DDL, so a semicolon always ends a statement
+    lines = [line for line in sql.splitlines() if not line.strip().startswith("--")]
+    return [statement.strip() for statement in "\n".join(lines).split(";") if statement.strip()]
+
+def applied_versions(conn) -> set:
+    cursor = conn.cursor()
+    cursor.execute(
+        "CREATE TABLE IF NOT EXISTS schema_migrations ("
+        "version INTEGER PRIMARY KEY, name VARCHAR(255) NOT NULL, "
+        "applied_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP)"
+    )
+    cursor.execute("SELECT version FROM schema_migrations")
+    versions = {row[0] for row in cursor.fetchall()}
+    conn.commit()
+    cursor.close()
+    return versions
+
+def pending_migrations(conn, directory: str = MIGRATIONS_DIR) -> List[Migration]:
+    applied = applied_versions(conn)
+    return [migration for migration in discover(directory) if migration.version not in applied]
+
+def apply_migration(conn, migration: Migration):
+    """
+    Runs one migration and records it in schema_migrations. Ordinary migrations run in a single
+    transaction with their bookkeeping row; no-transaction ones run statement by statement in
+    autocommit and are only recorded once every statement succeeded.
+    """
+    sql = migration.sql
+    cursor = conn.cursor()
+    try:
+        if sql.lstrip().startswith(NO_TRANSACTION):
+            conn.autocommit = True
+            try:
+                for statement in split_statements(sql):
+                    cursor.execute(statement)
+            finally:
+                conn.autocommit = False
+        else:
+            cursor.execute(sql)
+        cursor.execute(
+            "INSERT INTO schema_migrations (version, name) VALUES (%s, %s)", (migration.version, migration.name)
+        )
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+def apply_migrations(conn, directory: str = MIGRATIONS_DIR) -> List[Migration]:
+    """Applies every pending migration in version order, stopping at the first failure."""
+    applied = []
+    for migration in pending_migrations(conn, directory):
+        apply_migration(conn, migration)
+        applied.append(migration)
+    return applied
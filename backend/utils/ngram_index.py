@@ -0,0 +1,122 @@
+import math
+from collections import defaultdict
+from typing import Optional, Sequence, Set, Tuple
+import numpy as np
+
+# Weight of the whole-value similarity next to query containment, so tighter values rank first
+SIMILARITY_WEIGHT = 0.1
+
+Matches = Tuple[np.ndarray, np.ndarray]
+
+def normalise(text: Optional[str]) -> str:
+    return " ".join(text.lower().split()) if text else ""
+
+def compact(text: Optional[str]) -> str:
+    return "".join(text.split()) if text else ""
+
+def _grams(padded: str) -> Set[str]:
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def value_trigrams(text: str) -> Set[str]:
+    """Trigrams of every word padded the way pg_trgm does it, so word starts get grams of their own."""
+    grams = set()
+    for word in text.split():
+        grams |= _grams(f"  {word} ")
+    return grams
+
+def query_trigrams(text: str) -> Set[str]:
+    """
+    Trigrams a value needs to contain `text`. Boundaries between query words are padded like the values,
+    the outer ends are left open so a query also matches mid-word. A lone word shorter than three
+    characters becomes a word-prefix search.
+    """
+    words = text.split()
+    if len(words) == 1 and len(words[0]) < 3:
+        return _grams(f"  {words[0]}")
+    grams = set()
+    for position, word in enumerate(words):
+        head = "  " if position else ""
+        tail = " " if position < len(words) - 1 else ""
+        grams |= _grams(f"{head}{word}{tail}")
+    return grams
+
+def rank(shared, query_size: int, value_size):
+    """Share of the query's trigrams found in the value, nudged by how much of the value they cover."""
+    similarity = shared / (query_size + value_size - shared)
+    return shared / query_size + SIMILARITY_WEIGHT * similarity
+
+def score(query_grams: Set[str], grams: Set[str], min_score: float) -> float:
+    """Rank of one value's trigrams against a query, 0 when it does not match; the scalar twin of NgramIndex.match."""
+    if not query_grams:
+        return 0.0
+    shared = len(query_grams & grams)
+    if not shared or shared < min_score * len(query_grams):
+        return 0.0
+    return rank(shared, len(query_grams), len(grams))
+
+def _empty() -> Matches:
+    return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+
+class _ValueRows:
+    """Row positions grouped by value id, so a handful of matching values expands without touching every row."""
+    def __init__(self, row_value: np.ndarray, size: int):
+        self._order = np.argsort(row_value, kind="stable")
+        self._bounds = np.searchsorted(row_value[self._order], np.arange(size + 1))
+
+    def expand(self, value_ids: np.ndarray, value_ranks: np.ndarray) -> Matches:
+        starts = self._bounds[value_ids]
+        counts = self._bounds[value_ids + 1] - starts
+        total = int(counts.sum())
+        if not total:
+            return _empty()
+        offsets = np.repeat(starts - (np.cumsum(counts) - counts), counts)
+        return self._order[np.arange(total) + offsets], np.repeat(value_ranks, counts)
+
+class NgramIndex:
+    """
+    Trigram postings over the distinct values of one text column, the in-process counterpart of a
+    pg_trgm GIN index. A query counts shared trigrams for every value in one bincount over the posting
+    lists it touches, so typos still match and the cost follows the postings rather than the row count.
+    """
+    def __init__(self, values: Sequence[Optional[str]], min_score: float):
+        self.min_score = min_score
+        value_ids = {}
+        row_value = np.fromiter(
+            (value_ids.setdefault(normalise(value), len(value_ids)) for value in values),
+            dtype=np.int64, count=len(values)
+        )
+        postings = defaultdict(list)
+        self._gram_counts = np.zeros(len(value_ids), dtype=np.int64)
+        for value_id, value in enumerate(value_ids):
+            grams = value_trigrams(value)
+            self._gram_counts[value_id] = len(grams)
+            for gram in grams:
+                postings[gram].append(value_id)
+        self._postings = {gram: np.array(ids, dtype=np.int64) for gram, ids in postings.items()}
+        self._rows = _ValueRows(row_value, len(value_ids))
+
+    def match(self, query: str) -> Matches:
+        """Row positions whose value matches `query`, with their ranks."""
+        grams = query_trigrams(normalise(query))
+        lists = [self._postings[gram] for gram in grams if gram in self._postings]
+        if not lists:
+            return _empty()
+        shared = np.bincount(np.concatenate(lists), minlength=len(self._gram_counts))
+        value_ids = np.flatnonzero(shared >= max(1, math.ceil(self.min_score * len(grams) - 1e-9)))
+        ranks = rank(shared[value_ids], len(grams), self._gram_counts[value_ids])
+        return self._rows.expand(value_ids, ranks)
+
+class PrefixIndex:
+    """Sorted distinct values of one column for prefix lookups such as mobile numbers; every hit ranks 1."""
+    def __init__(self, values: Sequence[Optional[str]]):
+        compacted = np.array([compact(value) for value in values], dtype=str)
+        self._values, row_value = np.unique(compacted, return_inverse=True)
+        self._rows = _ValueRows(row_value.reshape(-1), len(self._values))
+
+    def match(self, prefix: str) -> Matches:
+        prefix = compact(prefix)
+        if not prefix:
+            return _empty()
+        start, end = np.searchsorted(self._values, [prefix, prefix + "\U0010ffff"])
+        value_ids = np.arange(start, end)
+        return self._rows.expand(value_ids, np.ones(len(value_ids)))
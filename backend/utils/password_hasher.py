@@ -0,0 +1,118 @@
+import asyncio
+import logging
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import List, Optional, Tuple
+from fastapi import HTTPException
+from utils.security_manager import pwd_context
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+def _hash(password: str) -> str:
+    return pwd_context.hash(password)
+
+def _hash_many(passwords: List[str]) -> List[str]:
+    return [pwd_context.hash(password) for password in passwords]
+
+def _make_pool(workers: int, name: str) -> Executor:
+    try:
+        return ProcessPoolExecutor(max_workers=workers)
+    except (OSError, NotImplementedError, ImportError) as e:
+        logger.warning(f"Process pool unavailable for {name}, using threads: {e}")
+        return ThreadPoolExecutor(max_workers=workers, thread_name_prefix=name)
+
+def _verify_and_update(password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    # The new hash is only returned when the stored one uses a different bcrypt cost
+    return pwd_context.verify_and_update(password, hashed_password)
+
+class PasswordHasher:
+    """
+    Runs bcrypt on a dedicated pool of HASH_WORKERS (processes where the platform allows, threads
+    otherwise), so a login burst queues here instead of exhausting the shared threadpool. At most
+    HASH_MAX_PENDING operations may be queued or running; beyond that callers get 503 + Retry-After.
+    """
+    def __init__(self):
+        self.workers = settings.HASH_WORKERS
+        self.max_pending = settings.HASH_MAX_PENDING
+        self.bulk_workers = settings.IMPORT_HASH_WORKERS or os.cpu_count() or 1
+        self._executor: Optional[Executor] = None
+        self._bulk_executor: Optional[Executor] = None
+        self.counters = {"pending": 0, "completed": 0, "rejected": 0, "rehashed": 0, "total_ms": 0.0, "bulk_hashed": 0}
+
+    @property
+    def executor(self) -> Executor:
+        if self._executor is None:
+            self._executor = _make_pool(self.workers, "bcrypt")
+        return self._executor
+
+    @property
+    def bulk_executor(self) -> Executor:
+        # Imports get their own pool so a district upload never queues ahead of sign-ins
+        if self._bulk_executor is None:
+            self._bulk_executor = _make_pool(self.bulk_workers, "bcrypt-bulk")
+        return self._bulk_executor
+
+    def close(self):
+        for executor in (self._executor, self._bulk_executor):
+            if executor is not None:
+                executor.shutdown(wait=False, cancel_futures=True)
+        self._executor = None
+        self._bulk_executor = None
+
+    async def _run(self, fn, *args):
+        if self.counters["pending"] >= self.max_pending:
+            self.counters["rejected"] += 1
+            raise HTTPException(
+                status_code=503,
+                detail="Too many sign-in requests, please retry shortly",
+                headers={"Retry-After": "1"}
+            )
+        self.counters["pending"] += 1
+        started = time.perf_counter()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self.executor, fn, *args)
+        finally:
+            self.counters["pending"] -= 1
+            self.counters["completed"] += 1
+            self.counters["total_ms"] += (time.perf_counter() - started) * 1000
+
+    async def hash(self, password: str) -> str:
+        return await self._run(_hash, password)
+
+    async def verify(self, password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """(matches, replacement hash or None); callers store the replacement to pick up a new cost."""
+        verified, new_hash = await self._run(_verify_and_update, password, hashed_password)
+        if new_hash:
+            self.counters["rehashed"] += 1
+        return verified, new_hash
+
+    async def hash_many(self, passwords: List[str]) -> List[str]:
+        """
+        Hashes initial passwords for a bulk import, in order, at BCRYPT_ROUNDS like every other
+        password; the throughput comes from spreading them over IMPORT_HASH_WORKERS.
+        """
+        if not passwords:
+            return []
+        size = -(-len(passwords) // (self.bulk_workers * 4))
+        loop = asyncio.get_running_loop()
+        chunks = await asyncio.gather(*(
+            loop.run_in_executor(self.bulk_executor, _hash_many, passwords[start:start + size])
+            for start in range(0, len(passwords), size)
+        ))
+        self.counters["bulk_hashed"] += len(passwords)
+        return [hashed for chunk in chunks for hashed in chunk]
+
+    def stats(self) -> dict:
+        completed = self.counters["completed"]
+        return {
+            **self.counters,
+            "total_ms": round(self.counters["total_ms"], 2),
+            "avg_ms": round(self.counters["total_ms"] / completed, 2) if completed else 0.0,
+            "workers": self.workers,
+            "bulk_workers": self.bulk_workers,
+            "max_pending": self.max_pending
+        }
+
+password_hasher = PasswordHasher()
@@ -0,0 +1,24 @@
+import threading
+
+class RetryBudget:
+    """
+    Token bucket shared by every caller of an upstream. Each request earns `ratio` of a retry,
+    each retry spends one, so during an outage retries stay a small fraction of traffic
+    instead of multiplying it. `min_tokens` lets a quiet worker still retry occasionally.
+    """
+    def __init__(self, ratio: float = 0.1, min_tokens: float = 10, max_tokens: float = 100):
+        self.ratio = ratio
+        self.max_tokens = max(max_tokens, min_tokens)
+        self.tokens = float(min_tokens)
+        self._lock = threading.Lock()
+
+    def record_request(self):
+        with self._lock:
+            self.tokens = min(self.max_tokens, self.tokens + self.ratio)
+
+    def try_spend(self) -> bool:
+        with self._lock:
+            if self.tokens < 1:
+                return False
+            self.tokens -= 1
+            return True
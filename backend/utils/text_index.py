@@ -0,0 +1,181 @@
+import re
+import zlib
+from collections import defaultdict
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+
+# Words and word pairs are hashed into 2^20 features: no vocabulary to keep, and collisions stay rare
+FEATURE_BITS = 20
+FEATURE_COUNT = 1 << FEATURE_BITS
+FEATURE_MASK = FEATURE_COUNT - 1
+# Whitespace, ASCII punctuation and the Devanagari danda; Hindi vowel signs stay part of their word
+SEPARATORS = re.compile(r"[\s!-/:-@\[-`{-~।॥]+")
+STOPWORDS = frozenset(
+    "a an and are as at be but by can do does for from has have how i in is it its me my of on or our "
+    "should so that the their there these this to was what when which why will with you your".split()
+)
+
+# Float32 weights round differently from the float64 scores they bound
+BOUND_SLACK = 1e-5
+
+Matches = List[Tuple[int, float]]
+
+def terms(text: Optional[str]) -> List[str]:
+    """Content words of `text` plus each pair of neighbouring ones, so word order counts a little."""
+    words = [word for word in SEPARATORS.split((text or "").lower()) if word and word not in STOPWORDS]
+    return words + [f"{first} {second}" for first, second in zip(words, words[1:])]
+
+def term_counts(text: Optional[str]) -> Dict[int, int]:
+    counts = defaultdict(int)
+    for term in terms(text):
+        # crc32 rather than hash(): the same question maps to the same features in every process
+        counts[zlib.crc32(term.encode()) & FEATURE_MASK] += 1
+    return counts
+
+def _normalised(weights: np.ndarray) -> np.ndarray:
+    norm = np.sqrt(np.dot(weights, weights))
+    return weights / norm if norm else weights
+
+class TextIndex:
+    """
+    TF-IDF inverted index over hashed word and word-pair features, scored by cosine similarity.
+    Postings are built once into flat arrays grouped by feature, then by group, then sorted by row, so
+    a search within one group only touches that group's part of each posting list; `add` appends
+    documents to a small mutable tail weighted with the build-time document frequencies.
+
+    Searches use MaxScore pruning: the most common query features are left out of candidate
+    generation as long as, even at their best weight, they could not lift a document to `min_score`
+    on their own. Candidates then get exact scores, with those features looked up by binary search
+    from the rarest to the most common; before each lookup, candidates that could no longer reach the
+    `limit`-th best score so far are dropped. The cost follows the rare features' posting lists and
+    the number of close matches rather than the collection size.
+    """
+    def __init__(self, texts: Sequence[str], ids: Sequence[int], groups: Sequence[int]):
+        # `ids` ascend; `groups` tag each text (a crop) so searches can stay within one
+        counts = [term_counts(text) for text in texts]
+        size = len(counts)
+        lengths = np.fromiter((len(doc) for doc in counts), dtype=np.int64, count=size)
+        total = int(lengths.sum())
+        features = np.fromiter((feature for doc in counts for feature in doc), dtype=np.int32, count=total)
+        frequencies = np.fromiter((n for doc in counts for n in doc.values()), dtype=np.float32, count=total)
+        rows = np.repeat(np.arange(size, dtype=np.int32), lengths)
+        del counts
+
+        self.size = size
+        self.df = np.bincount(features, minlength=FEATURE_COUNT).astype(np.int32)
+        self.idf = (np.log((1 + size) / (1 + self.df)) + 1).astype(np.float32)
+        weights = (1 + np.log(frequencies)) * self.idf[features]
+        norms = np.sqrt(np.bincount(rows, weights=weights * weights, minlength=size)).astype(np.float32)
+        weights /= norms[rows]
+
+        self.ids = np.asarray(ids, dtype=np.int64)
+        self.groups = np.asarray(groups, dtype=np.int32)
+        self.group_count = int(self.groups.max()) + 1 if size else 1
+        # By feature, then group; the stable sort keeps every posting list in row order
+        order = np.argsort(features.astype(np.int64) * self.group_count + self.groups[rows], kind="stable")
+        self.rows = rows[order]
+        self.weights = weights[order]
+        self.posting_groups = self.groups[self.rows].astype(np.min_scalar_type(self.group_count))
+        self.offsets = np.zeros(FEATURE_COUNT + 1, dtype=np.int64)
+        np.cumsum(self.df, out=self.offsets[1:])
+        self.max_weight = np.zeros(FEATURE_COUNT, dtype=np.float32)
+        present = np.flatnonzero(self.df)
+        if len(present):
+            self.max_weight[present] = np.maximum.reduceat(self.weights, self.offsets[present])
+
+        self.tail = defaultdict(list)  # feature -> [(tail position, weight)]
+        self.tail_ids: List[int] = []
+        self.tail_groups: List[int] = []
+
+    def __len__(self) -> int:
+        return self.size + len(self.tail_ids)
+
+    def __contains__(self, row_id: int) -> bool:
+        # Built ids come in ascending order, the tail is small
+        position = np.searchsorted(self.ids, row_id)
+        return bool(position < self.size and self.ids[position] == row_id) or row_id in self.tail_ids
+
+    def _vector(self, text: str) -> Tuple[np.ndarray, np.ndarray]:
+        counts = term_counts(text)
+        features = np.fromiter(counts.keys(), dtype=np.int64, count=len(counts))
+        frequencies = np.fromiter(counts.values(), dtype=np.float32, count=len(counts))
+        return features, _normalised((1 + np.log(frequencies)) * self.idf[features])
+
+    def add(self, text: str, row_id: int, group: int):
+        position = len(self.tail_ids)
+        features, weights = self._vector(text)
+        for feature, weight in zip(features.tolist(), weights.tolist()):
+            self.tail[feature].append((position, weight))
+        self.tail_ids.append(row_id)
+        self.tail_groups.append(group)
+
+    def _postings(self, feature: int, group: Optional[int]) -> Tuple[np.ndarray, np.ndarray]:
+        start, end = self.offsets[feature], self.offsets[feature + 1]
+        if group is not None:
+            # A key of the array's own type, or numpy converts the whole slice before searching it
+            groups, key = self.posting_groups[start:end], self.posting_groups.dtype.type(group)
+            start, end = start + np.searchsorted(groups, key, side="left"), start + np.searchsorted(groups, key, side="right")
+        elif self.group_count > 1:
+            # Across groups the list runs in row order within each group only; the lookups need it in row order
+            order = np.argsort(self.rows[start:end], kind="stable")
+            return self.rows[start:end][order], self.weights[start:end][order]
+        return self.rows[start:end], self.weights[start:end]
+
+    def _search_built(self, features: np.ndarray, weights: np.ndarray, group: Optional[int], limit: int, min_score: float):
+        if group is not None and group >= self.group_count:
+            # A group first seen after the build only has documents in the tail
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+        # Most common first: the longest prefix whose best possible total stays under min_score is not needed
+        # to find candidates, a document has to share one of the remaining features to qualify
+        order = np.argsort(-self.df[features], kind="stable")
+        features, weights = features[order], weights[order]
+        bounds = np.cumsum(weights * self.max_weight[features])
+        optional = int(np.searchsorted(bounds, min_score, side="left"))
+
+        found = [self._postings(feature, group) for feature in features[optional:]]
+        found = [(rows, posting * weight) for (rows, posting), weight in zip(found, weights[optional:]) if len(rows)]
+        if not found:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+        candidates, inverse = np.unique(np.concatenate([rows for rows, _ in found]), return_inverse=True)
+        scores = np.bincount(inverse, weights=np.concatenate([posting for _, posting in found]), minlength=len(candidates))
+
+        for position in range(optional - 1, -1, -1):
+            # Partial scores only grow, so the limit-th best one is a floor for the final results
+            threshold = min_score if len(scores) < limit else max(min_score, np.partition(scores, -limit)[-limit])
+            keep = scores + bounds[position] >= threshold - BOUND_SLACK
+            candidates, scores = candidates[keep], scores[keep]
+            rows, posting = self._postings(features[position], group)
+            if not len(rows) or not len(candidates):
+                continue
+            weight = weights[position]
+            at = np.minimum(np.searchsorted(rows, candidates), len(rows) - 1)
+            hit = rows[at] == candidates
+            scores[hit] += posting[at[hit]] * weight
+        keep = scores >= min_score
+        return self.ids[candidates[keep]], scores[keep]
+
+    def _search_tail(self, features: np.ndarray, weights: np.ndarray, group: Optional[int], min_score: float):
+        scores = defaultdict(float)
+        for feature, weight in zip(features.tolist(), weights.tolist()):
+            for position, posting in self.tail.get(feature, ()):
+                scores[position] += posting * weight
+        return [
+            (self.tail_ids[position], score) for position, score in scores.items()
+            if score >= min_score and (group is None or self.tail_groups[position] == group)
+        ]
+
+    def search(self, text: str, limit: int, min_score: float, group: Optional[int] = None) -> Matches:
+        """Up to `limit` (id, cosine similarity) pairs scoring at least `min_score`, best first."""
+        features, weights = self._vector(text)
+        if not len(features):
+            return []
+        ids, scores = self._search_built(features, weights, group, limit, min_score)
+        tail = self._search_tail(features, weights, group, min_score)
+        if tail:
+            ids = np.concatenate([ids, [row_id for row_id, _ in tail]])
+            scores = np.concatenate([scores, [score for _, score in tail]])
+        if len(ids) > limit:
+            top = np.argpartition(-scores, limit - 1)[:limit]
+            ids, scores = ids[top], scores[top]
+        order = np.lexsort((-ids, -scores))
+        return [(int(row_id), float(score)) for row_id, score in zip(ids[order], scores[order])]
@@ -0,0 +1,167 @@
+import asyncio
+import hashlib
+import os
+import tempfile
+from typing import Dict, List, Optional
+from fastapi import HTTPException, UploadFile
+from fastapi.responses import JSONResponse
+from config import settings
+
+def _megabytes(size: int) -> str:
+    return f"{round(size / (1024 * 1024), 1):g} MB"
+
+def _too_large(detail: str) -> HTTPException:
+    return HTTPException(status_code=413, detail=detail)
+
+class SpooledUpload:
+    """
+    One upload after streaming it in: size and SHA-256 are known, and the bytes are either kept in
+    memory (small files) or in a temp file on disk whose path can be handed to worker processes.
+    """
+    def __init__(self, filename: str, content_type: Optional[str]):
+        self.filename = filename
+        self.content_type = content_type
+        self.size = 0
+        self.sha256 = None
+        self.data: Optional[bytes] = None
+        self.path: Optional[str] = None
+
+    @property
+    def source(self):
+        """Bytes or a file path, whichever holds the upload; both are accepted by image_service."""
+        return self.data if self.path is None else self.path
+
+    def read(self) -> bytes:
+        if self.path is None:
+            return self.data
+        with open(self.path, "rb") as f:
+            return f.read()
+
+    def close(self):
+        if self.path is not None:
+            try:
+                os.unlink(self.path)
+            except OSError:
+                pass
+            self.path = None
+        self.data = None
+
+class _RequestBudget:
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.used = 0
+
+    def spend(self, size: int):
+        self.used += size
+        if self.used > self.limit:
+            raise _too_large(f"Uploads exceed {_megabytes(self.limit)} per request")
+
+async def _spool(upload: UploadFile, budget: _RequestBudget, max_file_bytes: int, spool_threshold: int, chunk_size: int) -> SpooledUpload:
+    spooled = SpooledUpload(upload.filename, upload.content_type)
+    digest = hashlib.sha256()
+    buffer = bytearray()
+    temp = None
+    try:
+        while True:
+            chunk = await upload.read(chunk_size)
+            if not chunk:
+                break
+            spooled.size += len(chunk)
+            if spooled.size > max_file_bytes:
+                raise _too_large(f"{upload.filename} exceeds {_megabytes(max_file_bytes)}")
+            budget.spend(len(chunk))
+            digest.update(chunk)
+            if temp is None:
+                buffer += chunk
+                if len(buffer) > spool_threshold:
+                    # Large uploads move to disk so memory per request stays at about one chunk
+                    temp = tempfile.NamedTemporaryFile(prefix="upload-", delete=False)
+                    spooled.path = temp.name
+                    temp.write(buffer)
+                    buffer = bytearray()
+            else:
+                temp.write(chunk)
+    except BaseException:
+        if temp is not None:
+            temp.close()
+        spooled.close()
+        raise
+    if temp is not None:
+        temp.close()
+    else:
+        spooled.data = bytes(buffer)
+    spooled.sha256 = digest.hexdigest()
+    return spooled
+
+async def read_uploads(
+    uploads: Optional[List[UploadFile]],
+    max_file_bytes: Optional[int] = None,
+    max_request_bytes: Optional[int] = None
+) -> List[SpooledUpload]:
+    """
+    Streams every named upload in CHUNK-sized reads, all files concurrently, hashing as it goes and
+    failing with 413 as soon as a per-file or per-request limit is crossed. Callers must `close()`
+    the results (see `close_uploads`) to remove spooled temp files.
+    """
+    uploads = [upload for upload in uploads or [] if upload.filename]
+    budget = _RequestBudget(max_request_bytes or settings.UPLOAD_MAX_REQUEST_BYTES)
+    results = await asyncio.gather(*(
+        _spool(upload, budget, max_file_bytes or settings.UPLOAD_MAX_FILE_BYTES, settings.UPLOAD_SPOOL_BYTES, settings.UPLOAD_CHUNK_BYTES)
+        for upload in uploads
+    ), return_exceptions=True)
+    errors = [result for result in results if isinstance(result, BaseException)]
+    if errors:
+        close_uploads([result for result in results if isinstance(result, SpooledUpload)])
+        raise errors[0]
+    return results
+
+def close_uploads(uploads: List[SpooledUpload]):
+    for upload in uploads:
+        upload.close()
+
+# Routes that take more than UPLOAD_MAX_REQUEST_BYTES per request
+BATCH_UPLOAD_PATHS = ("/chat/analyze/batch",)
+
+class UploadLimitMiddleware:
+    """
+    Rejects oversized request bodies before the multipart parser buffers and spools them: by
+    Content-Length up front, and by counting streamed bytes for chunked requests that do not declare
+    a length. Each route gets its own cap, its upload limit plus room for form fields:
+    UPLOAD_MAX_REQUEST_BYTES by default, UPLOAD_MAX_BATCH_BYTES on the batch routes.
+    """
+    def __init__(self, app, max_body_bytes: Optional[int] = None, route_limits: Optional[Dict[str, int]] = None):
+        self.app = app
+        overhead = settings.UPLOAD_FORM_OVERHEAD_BYTES
+        self.max_body_bytes = max_body_bytes or settings.UPLOAD_MAX_REQUEST_BYTES + overhead
+        self.route_limits = route_limits if route_limits is not None else {
+            path: settings.UPLOAD_MAX_BATCH_BYTES + overhead for path in BATCH_UPLOAD_PATHS
+        }
+
+    def limit_for(self, path: str) -> int:
+        return self.route_limits.get(path.rstrip("/") or "/", self.max_body_bytes)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        limit = self.limit_for(scope["path"])
+        headers = dict(scope["headers"])
+        content_length = headers.get(b"content-length")
+        if content_length is not None and content_length.isdigit() and int(content_length) > limit:
+            response = JSONResponse({"detail": "Request body too large"}, status_code=413)
+            await response(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    raise _too_large("Request body too large")
+            return message
+
+        await self.app(scope, limited_receive, send)
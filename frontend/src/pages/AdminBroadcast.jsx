@@ -25,7 +25,17 @@ const AdminBroadcast = () => {
 
         try {
             const response = await axios.post(`http://localhost:8000/admin/broadcast?state=${state}&city=${city}&type=${type}&language=${language}`);
-            setResult(response.data);
+            // Broadcasts run as background jobs; poll until the fan-out finishes
+            let job = response.data;
+            while (job.status === 'pending' || job.status === 'running') {
+                await new Promise(resolve => setTimeout(resolve, 1500));
+                job = (await axios.get(`http://localhost:8000/admin/jobs/${job.id}`)).data;
+            }
+            if (job.status === 'failed') {
+                setError(job.error || 'Failed to broadcast alert');
+            } else {
+                setResult(job.result);
+            }
         } catch (err) {
             setError(err.response?.data?.detail || 'Failed to broadcast alert');
         } finally {
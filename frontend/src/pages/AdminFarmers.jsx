@@ -8,6 +8,7 @@ import {
     UserMinus,
     UserCheck,
     Search,
+    Download,
     X
 } from 'lucide-react';
 import { STATES_AND_CITIES } from '../constants';
@@ -16,6 +17,7 @@ const AdminFarmers = () => {
     const { t } = useTranslation();
     const [farmers, setFarmers] = useState([]);
     const [loading, setLoading] = useState(true);
+    const [nextCursor, setNextCursor] = useState(null);
     const [filters, setFilters] = useState({
         full_name: '',
         mobile: '',
@@ -46,15 +48,17 @@ const AdminFarmers = () => {
         fetchFarmers();
     }, []);
 
-    const fetchFarmers = async () => {
+    const fetchFarmers = async (cursor = null) => {
         setLoading(true);
         try {
             const params = new URLSearchParams();
             Object.entries(filters).forEach(([key, value]) => {
                 if (value) params.append(key, value);
             });
+            if (cursor) params.append('cursor', cursor);
             const response = await axios.get(`${API_URL}?${params.toString()}`);
-            setFarmers(response.data);
+            setFarmers(prev => cursor ? [...prev, ...response.data.items] : response.data.items);
+            setNextCursor(response.data.next_cursor);
         } catch (error) {
             console.error('Error fetching farmers:', error);
         } finally {
@@ -62,6 +66,15 @@ const AdminFarmers = () => {
         }
     };
 
+    const handleExport = () => {
+        // Streamed by the server as gzipped CSV with land and crop totals; the browser saves it directly
+        const params = new URLSearchParams({ with_land: 'true', with_crops: 'true', gzip: 'true' });
+        Object.entries(filters).forEach(([key, value]) => {
+            if (value) params.append(key, value);
+        });
+        window.location.href = `${API_URL}/export?${params.toString()}`;
+    };
+
     const handleFilterChange = (e) => {
         setFilters({ ...filters, [e.target.name]: e.target.value });
     };
@@ -190,6 +203,9 @@ const AdminFarmers = () => {
                 <button type="submit" className="btn-search">
                     <Search size={18} /> {t('search')}
                 </button>
+                <button type="button" className="btn-search" onClick={handleExport}>
+                    <Download size={18} /> Export
+                </button>
             </form>
 
             {/* Farmers Table */}
@@ -206,7 +222,7 @@ const AdminFarmers = () => {
                         </tr>
                     </thead>
                     <tbody>
-                        {loading ? (
+                        {loading && farmers.length === 0 ? (
                             <tr><td colSpan="6" className="text-center">Loading...</td></tr>
                         ) : farmers.length === 0 ? (
                             <tr><td colSpan="6" className="text-center">No farmers found</td></tr>
@@ -242,6 +258,11 @@ const AdminFarmers = () => {
                         )}
                     </tbody>
                 </table>
+                {nextCursor && (
+                    <button className="btn-search" disabled={loading} onClick={() => fetchFarmers(nextCursor)}>
+                        {loading ? 'Loading...' : 'Load more'}
+                    </button>
+                )}
             </div>
 
             {/* Add/Edit Modal */}
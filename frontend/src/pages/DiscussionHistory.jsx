@@ -16,18 +16,21 @@ const DiscussionHistory = () => {
   const [discussions, setDiscussions] = useState([]);
   const [loading, setLoading] = useState(true);
   const [selectedChat, setSelectedChat] = useState(null);
+  const [nextCursor, setNextCursor] = useState(null);
 
   useEffect(() => {
     fetchDiscussions();
   }, []);
 
-  const fetchDiscussions = async () => {
+  const fetchDiscussions = async (cursor = null) => {
     try {
       const token = localStorage.getItem('token');
       const response = await axios.get('http://localhost:8000/discussions', {
-        headers: { Authorization: `Bearer ${token}` }
+        headers: { Authorization: `Bearer ${token}` },
+        params: cursor ? { cursor } : {}
       });
-      setDiscussions(response.data);
+      setDiscussions(prev => cursor ? [...prev, ...response.data.items] : response.data.items);
+      setNextCursor(response.data.next_cursor);
     } catch (err) {
       console.error('Error fetching discussions:', err);
     } finally {
@@ -35,6 +38,20 @@ const DiscussionHistory = () => {
     }
   };
 
+  // The list only carries headings; the full answer is fetched when a discussion is opened
+  const selectDiscussion = async (chat) => {
+    setSelectedChat(chat);
+    try {
+      const token = localStorage.getItem('token');
+      const response = await axios.get(`http://localhost:8000/discussions/${chat.id}`, {
+        headers: { Authorization: `Bearer ${token}` }
+      });
+      setSelectedChat(current => current?.id === chat.id ? response.data : current);
+    } catch (err) {
+      console.error('Error fetching discussion:', err);
+    }
+  };
+
   const formatDate = (dateString) => {
     return new Date(dateString).toLocaleDateString(undefined, {
       year: 'numeric',
@@ -45,11 +62,12 @@ const DiscussionHistory = () => {
     });
   };
 
-  const parseAnswer = (answerStr) => {
+  const parseAnswer = (answer) => {
+    if (answer && typeof answer === 'object') return answer;
     try {
-      return JSON.parse(answerStr);
+      return JSON.parse(answer);
     } catch (e) {
-      return { reasoning: answerStr };
+      return { reasoning: answer };
     }
   };
 
@@ -83,17 +101,22 @@ const DiscussionHistory = () => {
               <div
                 key={chat.id}
                 className={`chat-list-item ${selectedChat?.id === chat.id ? 'active' : ''}`}
-                onClick={() => setSelectedChat(chat)}
+                onClick={() => selectDiscussion(chat)}
               >
                 <div className="chat-item-header">
                   <strong>{chat.heading}</strong>
                   <span className="chat-date">{new Date(chat.created_at).toLocaleDateString()}</span>
                 </div>
-                <p className="chat-preview">{chat.question.substring(0, 60)}...</p>
+                <p className="chat-preview">{(chat.preview || '').substring(0, 60)}...</p>
                 <ChevronRight size={16} className="arrow" />
               </div>
             ))
           )}
+          {nextCursor && (
+            <button className="load-more" onClick={() => fetchDiscussions(nextCursor)}>
+              Load more
+            </button>
+          )}
         </div>
 
         <div className="chat-detail-view card">
@@ -110,7 +133,7 @@ const DiscussionHistory = () => {
                 <div className="qa-bubble user">
                   <div className="avatar"><User size={16} /></div>
                   <div className="bubble-content">
-                    <p>{selectedChat.question}</p>
+                    <p>{selectedChat.question ?? selectedChat.preview}</p>
                   </div>
                 </div>
 
@@ -118,6 +141,7 @@ const DiscussionHistory = () => {
                   <div className="avatar"><Bot size={16} /></div>
                   <div className="bubble-content">
                     {(() => {
+                      if (selectedChat.answer === undefined) return <p>Loading...</p>;
                       const ans = parseAnswer(selectedChat.answer);
                       return ans.diagnosis ? (
                         <div className="analysis-result">
@@ -237,6 +261,16 @@ const DiscussionHistory = () => {
           overflow: hidden;
         }
 
+        .load-more {
+          width: 100%;
+          padding: 10px;
+          border: 1px solid #c8e6c9;
+          border-radius: 12px;
+          background: white;
+          color: #2e7d32;
+          cursor: pointer;
+        }
+
         .arrow {
           position: absolute;
           right: 10px;
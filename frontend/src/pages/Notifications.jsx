@@ -7,6 +7,7 @@ const Notifications = () => {
     const { t } = useTranslation();
     const [notifications, setNotifications] = useState([]);
     const [loading, setLoading] = useState(true);
+    const [nextCursor, setNextCursor] = useState(null);
 
     const API_URL = 'http://localhost:8000/farmer/notifications';
 
@@ -14,14 +15,16 @@ const Notifications = () => {
         fetchNotifications();
     }, []);
 
-    const fetchNotifications = async () => {
+    const fetchNotifications = async (cursor = null) => {
         setLoading(true);
         try {
             const token = localStorage.getItem('token');
             const response = await axios.get(API_URL, {
-                headers: { Authorization: `Bearer ${token}` }
+                headers: { Authorization: `Bearer ${token}` },
+                params: cursor ? { cursor } : {}
             });
-            setNotifications(response.data);
+            setNotifications(prev => cursor ? [...prev, ...response.data.items] : response.data.items);
+            setNextCursor(response.data.next_cursor);
         } catch (error) {
             console.error('Error fetching notifications:', error);
         } finally {
@@ -49,7 +52,7 @@ const Notifications = () => {
             </div>
 
             <div className="notifications-list">
-                {loading ? (
+                {loading && notifications.length === 0 ? (
                     <div className="glass p-4 text-center">Loading notifications...</div>
                 ) : notifications.length === 0 ? (
                     <div className="glass p-8 text-center">
@@ -91,6 +94,11 @@ const Notifications = () => {
                         </div>
                     ))
                 )}
+                {nextCursor && (
+                    <button className="mark-read-btn" disabled={loading} onClick={() => fetchNotifications(nextCursor)}>
+                        {loading ? 'Loading...' : 'Load more'}
+                    </button>
+                )}
             </div>
 
             <style>{`